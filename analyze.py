@@ -1,36 +1,379 @@
 import networkx as nx
-import matplotlib.pyplot as plt
 import numpy as np
 import collections
+import math
+from scipy.sparse import csr_matrix
+from csr_graph import CSRGraph
+from graph_io import open_graph, iter_edge_chunks, is_binary_graph, graph_info
+from oracles import splitmix64_array
+
+def _oriented(C):
+    # Returns the adjacency matrix of G with each edge oriented from the endpoint of smaller degree to the one of larger degree
+    # (ties broken by node), as a scipy CSR matrix, together with the arrays of the sources and destinations of its edges.
+    # Each node has at most sqrt(2m) out-neighbors.
+    n = C.number_of_nodes()
+    src = np.repeat(np.arange(n, dtype=np.int64), C.degrees)
+    dst = C.indices.astype(np.int64)
+    keep = (C.degrees[src] < C.degrees[dst]) | ((C.degrees[src] == C.degrees[dst]) & (src < dst))
+    src, dst = src[keep], dst[keep]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return csr_matrix((np.ones(len(dst), dtype=np.int32), dst, indptr), shape=(n, n)), src, dst
+
+def _triangles(C, block):
+    # Returns the number of triangles of each node. With A the oriented adjacency matrix,
+    # every triangle is a path a->b->c with the edge a->c, counted once in M = (A A) * A (elementwise) at M[a, c],
+    # hence a gets the row sums of M and c its column sums; the middle node b gets the row sums of M2 = (A^T A) * A,
+    # since M2[b, c] counts the a with a->b and a->c. Rows are processed in blocks whose products have
+    # about block entries, so that the memory used does not depend on the number of wedges of the whole graph.
+    n = C.number_of_nodes()
+    A, src, dst = _oriented(C)
+    AT = A.T.tocsr()
+    out = np.diff(A.indptr)
+    cost = out + np.bincount(src, weights=out[dst], minlength=n) + np.bincount(dst, weights=out[src], minlength=n)
+    bounds = np.searchsorted(np.cumsum(cost), np.arange(block, cost.sum() + block, block), side='right')
+    bounds = np.unique(np.concatenate(([0], np.minimum(bounds, n), [n])))
+
+    t = np.zeros(n, dtype=np.int64)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        Ab = A[lo:hi]
+        M = (Ab @ A).multiply(Ab).tocoo()
+        t[lo:hi] += np.bincount(M.row, weights=M.data, minlength=hi - lo).astype(np.int64)
+        t += np.bincount(M.col, weights=M.data, minlength=n).astype(np.int64)
+        M2 = (AT[lo:hi] @ A).multiply(Ab).tocoo()
+        t[lo:hi] += np.bincount(M2.row, weights=M2.data, minlength=hi - lo).astype(np.int64)
+    return t
+
+def _has_edges(C, a, b):
+    # Returns the boolean array whose i-th entry is True if (a[i], b[i]) is an edge,
+    # by a binary search of b[i] in the sorted neighbors of a[i], done on all the pairs at once
+    lo = C.indptr[a].astype(np.int64)
+    end = C.indptr[a + 1].astype(np.int64)
+    hi = end.copy()
+    last = max(len(C.indices) - 1, 0)
+    for _ in range(int(C.degrees.max(initial=0)).bit_length() + 1):
+        active = lo < hi
+        mid = (lo + hi) >> 1
+        right = active & (C.indices[np.minimum(mid, last)] < b)
+        left = active & ~right
+        lo = np.where(right, mid + 1, lo)
+        hi = np.where(left, mid, hi)
+    return (lo < end) & (C.indices[np.minimum(lo, last)] == b)
+
+def _neighbors(C, nodes):
+    # Returns the positions in C.indices of the neighbors of the given nodes, and the node each of them comes from
+    first = C.indptr[nodes].astype(np.int64)
+    degrees = C.degrees[nodes].astype(np.int64)
+    owner = np.repeat(np.arange(len(nodes)), degrees)
+    offsets = np.cumsum(degrees) - degrees
+    return np.repeat(first, degrees) + np.arange(len(owner)) - offsets[owner], owner
+
+def _distances(C, s):
+    # Returns the distances (in hops) from s to every node (-1 if not reachable), with a BFS done one level at a time
+    dist = np.full(C.number_of_nodes(), -1, dtype=np.int64)
+    dist[s] = 0
+    frontier = np.array([s], dtype=np.int64)
+    d = 0
+    while len(frontier) > 0:
+        d += 1
+        reached = C.indices[_neighbors(C, frontier)[0]]
+        frontier = np.unique(reached[dist[reached] < 0]).astype(np.int64)
+        dist[frontier] = d
+    return dist
+
+def _eccentricities(C, sources):
+    # Returns the eccentricities of the nodes in sources, with up to 64 w BFS at a time: bit j of the word
+    # frontier[v, i] (resp. visited[v, i]) tells whether v is in the frontier of (resp. has been visited by)
+    # the BFS from the (64 i + j)-th source. A level is expanded by pushing the frontier along the edges of its nodes or,
+    # when they are many, by pulling the words of all the neighbors of each node. The number w of words
+    # per node is chosen so that the words of the edges take a few tens of MB.
+    n = C.number_of_nodes()
+    # Only the rows with edges are reduced: the offsets of isolated nodes may be len(C.indices)
+    pull = C.degrees > 0
+    starts = C.indptr[:-1][pull]
+    words = max(1, min(16, (1 << 22) // max(len(C.indices), n, 1)))
+    sources = np.asarray(sources, dtype=np.int64)
+    ecc = np.zeros(len(sources), dtype=np.int64)
+    for block in range(0, len(sources), 64 * words):
+        group = sources[block:block + 64 * words]
+        position = np.arange(len(group))
+        word, bit = position >> 6, np.left_shift(np.uint64(1), (position & 63).astype(np.uint64))
+        frontier = np.zeros((n, (len(group) + 63) >> 6), dtype=np.uint64)
+        np.bitwise_or.at(frontier, (group, word), bit)
+        visited = frontier.copy()
+        active = np.unique(group)
+        d = 0
+        while True:
+            reached = np.zeros_like(frontier)
+            if C.degrees[active].sum() * 20 > len(C.indices):
+                reached[pull] = np.bitwise_or.reduceat(frontier[C.indices], starts, axis=0)
+            else:
+                positions, owner = _neighbors(C, active)
+                np.bitwise_or.at(reached, C.indices[positions], frontier[active][owner])
+            reached &= ~visited
+            active = np.flatnonzero(reached.any(axis=1))
+            if len(active) == 0:
+                break
+            d += 1
+            found = np.bitwise_or.reduce(reached[active], axis=0)
+            ecc[block + position[(found[word] & bit) != 0]] = d
+            visited |= reached
+            frontier = reached
+    return ecc
+
+def _ifub(C, nodes):
+    # Returns the diameter of the connected component with the given nodes, with the iFUB algorithm
+    # (Crescenzi et al., 2013). A BFS from a root u gives the levels of the nodes; if every node at level i or more
+    # has eccentricity at most lb, then every other pair of nodes is at distance at most 2(i-1) (through u),
+    # hence the eccentricities of the nodes are computed one level at a time, from the farthest one,
+    # until lb >= 2(i-1). The root is either the node of largest degree or the middle of a double sweep from it
+    # (that also gives the starting lower bound), whichever has the fewest nodes in its last levels.
+    if len(nodes) <= 1:
+        return 0
+    hub = _distances(C, int(nodes[np.argmax(C.degrees[nodes])]))
+    a = int(np.argmax(hub))
+    from_a = _distances(C, a)
+    b = int(np.argmax(from_a))
+    lb = int(from_a[b])
+    from_b = _distances(C, b)
+    middle = _distances(C, int(np.flatnonzero((from_a == lb // 2) & (from_b == lb - lb // 2))[0]))
+
+    def cost(level):
+        counts = np.bincount(level[nodes])
+        return counts[lb // 2 + 1:].sum(), len(counts)
+    level = min(hub, middle, key=cost)[nodes]
+
+    order = nodes[np.argsort(-level, kind='stable')]
+    counts = np.bincount(level)
+    i = len(counts) - 1
+    done = 0
+    while i > 0 and lb < 2 * i:
+        lb = max(lb, int(_eccentricities(C, order[done:done + counts[i]]).max()))
+        done += counts[i]
+        i -= 1
+    return lb
+
+def _roots(parent, x):
+    # Returns the roots of the nodes x, following the parents of all of them at once, and makes x point to them
+    r = parent[x]
+    while True:
+        up = parent[r]
+        if np.array_equal(up, r):
+            break
+        r = up
+    parent[x] = r
+    return r
+
+def _union_find(chunks, n=0):
+    # Union-find on arrays, fed with the edges one chunk at a time: returns parent (after full path compression,
+    # parent[v] is the root of the component of v), size (size[r] is the size of the component of root r)
+    # and seen (the nodes that appear in some edge). Arrays grow if a chunk has a node larger than n - 1.
+    # The edges of a chunk are merged in rounds: in each round, the root of every edge whose endpoints are
+    # in different components is hooked to the other one, the smaller to the larger component (ties broken by node,
+    # so that no cycle is created); when a root is hooked by several edges, one of them wins and the others
+    # are merged in the next rounds.
+    parent = np.arange(n, dtype=np.int64)
+    size = np.ones(n, dtype=np.int64)
+    seen = np.zeros(n, dtype=bool)
+    for edges in chunks:
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if len(edges) == 0:
+            continue
+        top = int(edges.max()) + 1
+        if top > len(parent):
+            top = max(top, 2 * len(parent))
+            parent = np.concatenate((parent, np.arange(len(parent), top, dtype=np.int64)))
+            size = np.concatenate((size, np.ones(top - len(size), dtype=np.int64)))
+            seen = np.concatenate((seen, np.zeros(top - len(seen), dtype=bool)))
+        seen[edges.ravel()] = True
+
+        a, b = _roots(parent, edges[:, 0]), _roots(parent, edges[:, 1])
+        while True:
+            split = a != b
+            if not split.any():
+                break
+            a, b = a[split], b[split]
+            larger = (size[a] > size[b]) | ((size[a] == size[b]) & (a < b))
+            big, small = np.where(larger, a, b), np.where(larger, b, a)
+            parent[small] = big
+            hooked = np.unique(small)
+            np.add.at(size, _roots(parent, hooked), size[hooked])
+            a, b = _roots(parent, a), _roots(parent, b)
+
+    while True:
+        up = parent[parent]
+        if np.array_equal(up, parent):
+            break
+        parent = up
+    return parent, size, seen
+
+def _hll_init(n, p, seed):
+    # HyperLogLog counters with 2^p registers of each node, initialized with the node itself:
+    # the hash of the node selects a register (the lowest p bits) and its value is the position
+    # of the lowest bit set in the other bits
+    h = splitmix64_array(np.arange(n, dtype=np.uint64) ^ np.uint64(seed & ((1 << 64) - 1)))
+    registers = np.zeros((n, 1 << p), dtype=np.uint8)
+    rest = h >> np.uint64(p)
+    low = rest & (~rest + np.uint64(1))
+    rank = np.where(rest == 0, 64 - p + 1, np.log2(np.maximum(low, 1).astype(np.float64)).astype(np.int64) + 1)
+    registers[np.arange(n), (h & np.uint64((1 << p) - 1)).astype(np.int64)] = rank
+    return registers
+
+def _hll_count(registers, block=1 << 16):
+    # Returns the sum, over the nodes, of the estimated sizes of their sets (with the small range correction)
+    r = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / r) if r >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}.get(r, 0.7213 / (1 + 1.079 / r))
+    total = 0.0
+    for start in range(0, len(registers), block):
+        R = registers[start:start + block]
+        estimate = alpha * r * r / np.ldexp(1.0, -R.astype(np.int32)).sum(axis=1)
+        zeros = (R == 0).sum(axis=1)
+        small = (estimate <= 2.5 * r) & (zeros > 0)
+        estimate[small] = r * np.log(r / zeros[small])
+        total += estimate.sum()
+    return total
+
+def _degree_histogram(network, mode, source, chunk):
+    # Returns the histogram of the degrees (counts[d] = number of nodes with degree d) of the network or of the edges of source
+    if mode is None:
+        mode = "in" if source is None and network.is_directed() else "total"
+    if mode not in ("in", "out", "total"):
+        raise ValueError("mode must be 'in', 'out' or 'total'")
+    
+    if source is None:
+        if isinstance(network, CSRGraph):
+            return np.bincount(network.degrees)
+        if network.is_directed() and mode != "total":
+            degrees = network.in_degree() if mode == "in" else network.out_degree()
+        else:
+            degrees = network.degree()
+        return np.bincount(np.fromiter((d for _, d in degrees), dtype=np.int64, count=network.number_of_nodes()), minlength=1)
+    
+    # The nodes of a graph (binary file, CSRGraph or networkx graph) are all counted, isolated ones included;
+    # for a text file, an array or an iterator of edges, only the nodes that appear in some edge are
+    n = None
+    if isinstance(source, str) and is_binary_graph(source):
+        n = graph_info(source)[0]
+    elif hasattr(source, "number_of_nodes"):
+        n = source.number_of_nodes()
+    chunks = source if hasattr(source, "__next__") else iter_edge_chunks(source, chunk)
+    degree = np.zeros(n or 0, dtype=np.int64)
+    seen = np.zeros(n or 0, dtype=bool)
+    for edges in chunks:
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if len(edges) == 0:
+            continue
+        ends = edges[:, 1] if mode == "in" else edges[:, 0] if mode == "out" else edges.ravel()
+        counts = np.bincount(ends, minlength=int(edges.max()) + 1)
+        if len(counts) > len(degree):
+            degree = np.concatenate((degree, np.zeros(len(counts) - len(degree), dtype=np.int64)))
+            seen = np.concatenate((seen, np.zeros(len(counts) - len(seen), dtype=bool)))
+        degree[:len(counts)] += counts
+        seen[edges.ravel()] = True
+    if n is not None:
+        return np.bincount(degree, minlength=1)
+    return np.bincount(degree[seen], minlength=1)
+
+def _log_binning(hist, bins):
+    # Returns the edges of bins logarithmic bins over the degrees 1, ..., max and the density of each bin
+    top = len(hist)
+    edges = np.unique(np.floor(np.logspace(0, np.log10(max(top, 2)), bins + 1)).astype(np.int64))
+    edges[-1] = max(edges[-1], top)
+    cumulative = np.concatenate(([0], np.cumsum(hist)))
+    counts = cumulative[np.minimum(edges[1:], top)] - cumulative[np.minimum(edges[:-1], top)]
+    total = max(cumulative[-1] - hist[0], 1)
+    return edges, counts / (total * np.diff(edges))
+
+def _power_law_fit(hist, dmin=None, candidates=100):
+    # Returns alpha, dmin and the Kolmogorov-Smirnov distance of the discrete power law fitted to the degrees >= dmin,
+    # with the approximation alpha = 1 + N / sum(ln(d / (dmin - 1/2))) of the maximum likelihood estimator.
+    # If dmin is None, it is chosen among (at most) candidates degrees as the one with the smallest distance.
+    degrees = np.arange(len(hist))
+    if dmin is None:
+        present = np.flatnonzero(hist[1:]) + 1
+        present = present[np.cumsum(hist[present][::-1])[::-1] >= 10] # at least 10 nodes in the tail
+        if len(present) == 0:
+            return None, None, None
+        choices = np.unique(present[np.linspace(0, len(present) - 1, min(candidates, len(present))).astype(np.int64)])
+    else:
+        choices = [dmin]
+    
+    best = (None, None, None)
+    for d0 in choices:
+        d0 = int(d0)
+        tail = hist[d0:]
+        count = tail.sum()
+        if count == 0:
+            continue
+        logs = np.log(degrees[d0:] / (d0 - 0.5))
+        total = (tail * logs).sum()
+        if total <= 0:
+            continue
+        alpha = 1 + count / total
+        empirical = np.cumsum(tail) / count
+        model = 1 - ((degrees[d0:] + 0.5) / (d0 - 0.5)) ** (1 - alpha)
+        ks = float(np.abs(empirical - model).max())
+        if best[2] is None or ks < best[2]:
+            best = (float(alpha), d0, ks)
+    return best
 
 class Analyzer:
     
     def __init__(self, network):
         self.network = network
+        self.__csr = None
+    
+    def __graph(self):
+        # CSR copy of the network (undirected), built at the first use of a metric that needs it.
+        # If the network is modified, a new Analyzer must be created.
+        if self.__csr is None:
+            if isinstance(self.network, CSRGraph):
+                self.__csr = self.network
+            else:
+                self.__csr = CSRGraph.from_networkx(self.network)
+        return self.__csr
         
-    def get_degree_distribution(self):
-        "Returns the plot of the degree distribution with a log-log scale"
+    def get_degree_distribution(self, mode=None, source=None, log_bins=None, fit=False, dmin=None, plot=True, chunk=1 << 20):
+        "Returns the plot of the degree distribution with a log-log scale (if plot), or the data of the distribution"
+        
+        # mode = "in", "out" or "total" degree; by default, the in-degree if the network is directed, the degree otherwise.
+        # source = where the edges are read from, in one pass, by chunks (as in get_giant_component); by default,
+        #          the degrees of the network. Edges (u, v) of a source count as out-edges of u and in-edges of v.
+        # log_bins = number of logarithmic bins (None for no binning): the density of bin [a, b) is the fraction
+        #            of the nodes with degree in [a, b), divided by b - a.
+        # fit = if True, the exponent alpha of a power law p(d) ~ d^-alpha, for d >= dmin, is fitted by maximum likelihood
+        #       (Clauset et al., 2009); if dmin is None, it is the degree that minimizes the Kolmogorov-Smirnov distance.
+        # The data is a dict with the histogram (histogram[d] = number of nodes with degree d) and, if requested,
+        # bins (their edges) and density, alpha, dmin and ks. If plot is True, matplotlib is imported and the plot is drawn.
+        data = {"histogram": _degree_histogram(self.network, mode, source, chunk)}
+        hist = data["histogram"]
+        
+        if log_bins:
+            data["bins"], data["density"] = _log_binning(hist, log_bins)
+        if fit:
+            data["alpha"], data["dmin"], data["ks"] = _power_law_fit(hist, dmin)
+        if not plot:
+            return data
+        
+        import matplotlib.pyplot as plt
         
-        # if the network is directed, we consider the in-degree
-        if self.network.is_directed():
-            degree_sequence = sorted([d for n, d in self.network.in_degree()], reverse=True)
-        else:
-            degree_sequence = sorted([d for n, d in self.network.degree()], reverse=True)
-            
-        degree_freq = {}
-        for d in degree_sequence:
-            if d in degree_freq:
-                degree_freq[d] += 1
-            else:
-                degree_freq[d] = 1
-                
-        # Extract degrees and frequencies
-        degrees = list(degree_freq.keys())
-        frequencies = list(degree_freq.values())
-
         # Plotting in log-log scale
         plt.figure(figsize=(8, 6))
-        plt.loglog(degrees, frequencies, marker='o', linestyle='None', color='b')
+        if log_bins:
+            edges, density = data["bins"], data["density"]
+            centers = np.sqrt(edges[:-1] * edges[1:])
+            plt.loglog(centers[density > 0], density[density > 0], marker='o', linestyle='None', color='b')
+        else:
+            degrees = np.flatnonzero(hist)
+            degrees = degrees[degrees > 0]
+            plt.loglog(degrees, hist[degrees], marker='o', linestyle='None', color='b')
+        if fit and data["alpha"] is not None:
+            top = len(hist) - 1
+            x = np.logspace(np.log10(data["dmin"]), np.log10(max(top, data["dmin"])), 50)
+            tail = hist[data["dmin"]:].sum()
+            scale = (tail / hist[1:].sum() if log_bins else tail) * (data["alpha"] - 1) / (data["dmin"] - 0.5)
+            plt.loglog(x, scale * (x / (data["dmin"] - 0.5)) ** -data["alpha"], color='r', label='alpha = %.2f' % data["alpha"])
+            plt.legend()
         plt.title('Log-log Degree Distribution')
         plt.xlabel('Degree (log scale)')
         plt.ylabel('Frequency (log scale)')
@@ -38,26 +381,190 @@ class Analyzer:
 
         return plt
     
-    def get_clustering_coefficient(self):
-        pass
+    def get_clustering_coefficient(self, exact=True, epsilon=0.01, delta=0.01, seed=None, block=1 << 22):
+        "Returns the average clustering coefficient and the array of the local ones (None if not exact)"
+        
+        # The network is considered as undirected; local[i] is the coefficient of the i-th node of network.nodes(),
+        # and it is 0 for nodes of degree smaller than 2 (as in networkx).
+        # exact = if True, triangles are counted with sparse matrix products (see _triangles): O(m sqrt(m)) time.
+        # Otherwise, the average is estimated by sampling wedges: a node v is chosen uniformly at random and, if its
+        # degree is at least 2, two distinct random neighbors of v, and the sample is 1 if they are linked.
+        # The mean of k = ln(2/delta)/(2 epsilon^2) samples is within epsilon of the average clustering coefficient
+        # with probability at least 1 - delta (Hoeffding's bound), in time O(k log n) whatever the size of the network.
+        C = self.__graph()
+        n = C.number_of_nodes()
+        if n == 0:
+            return 0.0, (np.zeros(0) if exact else None)
+        
+        if exact:
+            d = C.degrees.astype(np.float64)
+            wedges = d * (d - 1) / 2
+            local = np.divide(_triangles(C, block), wedges, out=np.zeros(n), where=wedges > 0)
+            return float(local.mean()), local
+        
+        rng = np.random.default_rng(seed)
+        k = math.ceil(math.log(2 / delta) / (2 * epsilon**2))
+        closed = 0
+        for start in range(0, k, 1 << 20):
+            v = rng.integers(0, n, size=min(1 << 20, k - start))
+            d = C.degrees[v].astype(np.int64)
+            v, d = v[d >= 2], d[d >= 2]
+            i = (rng.random(len(v)) * d).astype(np.int64)
+            j = (rng.random(len(v)) * (d - 1)).astype(np.int64)
+            j += j >= i
+            first = C.indptr[v].astype(np.int64)
+            closed += int(_has_edges(C, C.indices[first + i], C.indices[first + j]).sum())
+        return closed / k, None
     
-    def get_giant_component(self):
-        pass
+    def get_giant_component(self, source=None, distribution=False, chunk=1 << 20):
+        "Returns size, fraction of the nodes and nodes of the largest connected component (and the distribution of the sizes)"
+        
+        # source = where the edges are read from, in one pass, by chunks: the network (default), a binary graph file
+        # or a text edge list (see graph_io), an (m, 2) array or memmap, or an iterator of (k, 2) arrays.
+        # Only the union-find arrays (three per node) are kept in memory, not the graph (see _union_find).
+        # If the edges come from a text file or an iterator, the nodes are the ones that appear in some edge.
+        # nodes is the sorted array of the nodes of the component (their names, if the network has labels);
+        # if distribution is True, the dict {size: number of components of that size} is also returned.
+        if source is None:
+            C = self.__graph()
+            n, labels, every = C.number_of_nodes(), C.labels, True
+            chunks = iter_edge_chunks(C, chunk)
+        elif hasattr(source, "__next__"):
+            n, labels, every = 0, None, False
+            chunks = source
+        elif isinstance(source, str) and is_binary_graph(source):
+            n, _, labels = graph_info(source)
+            every = True
+            chunks = iter_edge_chunks(source, chunk)
+        else:
+            n, labels, every = 0, None, False
+            chunks = iter_edge_chunks(source, chunk)
+        
+        parent, size, seen = _union_find(chunks, n)
+        nodes = np.arange(len(parent)) if every else np.flatnonzero(seen)
+        if len(nodes) == 0:
+            giant = (0, 0.0, np.zeros(0, dtype=np.int64))
+            return giant + (dict(),) if distribution else giant
+        
+        roots = np.flatnonzero(parent[nodes] == nodes)
+        roots = nodes[roots]
+        root = roots[np.argmax(size[roots])]
+        members = nodes[parent[nodes] == root]
+        if labels is not None:
+            members = np.sort(np.asarray(labels)[members])
+        giant = (int(size[root]), int(size[root]) / len(nodes), members)
+        if not distribution:
+            return giant
+        sizes, counts = np.unique(size[roots], return_counts=True)
+        return giant + (dict(zip(sizes.tolist(), counts.tolist())),)
     
-    def get_diameter(self):
-        pass
+    def get_communities(self, m, delta=None, **kwargs):
+        "Returns the communities found by BigCLAM with m communities, and the matrix F of the affiliations"
         
-if __name__ == '__main__':
-
-    G = nx.Graph()  
+        # delta = affiliation above which a node is in a community (bigclam.threshold by default);
+        # the other arguments are passed to bigclam.fit (e.g., F to warm start, max_iter, workers).
+        # Communities are sorted arrays of nodes (their names, if the network has labels).
+        import bigclam
+        C = self.__graph()
+        F, _ = bigclam.fit(C, m, **kwargs)
+        found = bigclam.communities(F, bigclam.threshold(C) if delta is None else delta)
+        if C.labels is not None:
+            found = [np.sort(np.asarray(C.labels)[nodes]) for nodes in found]
+        return found, F
     
-    f = open('net_2', 'r')
-
-    for line in f:
-        line = line.split()
-        G.add_edge(int(line[0]), int(line[1]))
+    def get_number_of_communities(self, candidates, **kwargs):
+        "Returns the number of communities among candidates chosen by holdout validation, and the score of each candidate"
+        
+        # See bigclam.select_number_of_communities: the candidates are fitted on a pool of processes, each one
+        # warm started from a neighbouring candidate; the other arguments are passed to it (e.g., holdout, processes, seed).
+        import bigclam
+        m, _, scores = bigclam.select_number_of_communities(self.__graph(), candidates, **kwargs)
+        return m, scores
+    
+    def get_diameter(self, exact=True, p=6, max_iter=None, seed=0, source=None, chunk=1 << 18):
+        "Returns the diameter (exact) or the triple approximate diameter, effective diameter and neighbourhood function"
+        
+        # The network is considered as undirected; the diameter is the largest distance between two connected nodes.
+        # exact = if True, the diameter of each connected component is computed by iFUB (see _ifub), that usually
+        # needs a few BFS; components are visited by decreasing size, and skipped when too small to matter.
+        # Otherwise, HyperANF (Boldi et al., 2011): each node keeps a HyperLogLog counter with 2^p registers
+        # (relative error about 1.04/sqrt(2^p)) of the nodes within distance t, and at each iteration it is merged
+        # with the counters of its neighbors, streaming over the edges by chunks (see graph_io.iter_edge_chunks).
+        # Memory is 2 n 2^p bytes plus one chunk. The neighbourhood function N(t) is the estimated number of pairs within distance t;
+        # the diameter is the last t at which some counter changes, and the effective diameter is the (interpolated)
+        # t within which 90% of the connected pairs are.
+        # source = where the edges of HyperANF are read from, at each iteration, by chunks: the network (default),
+        # a binary graph file or a text edge list (see graph_io), or an (m, 2) array or memmap; only the counters
+        # are kept in memory, not the graph. For a text file or an array, the nodes are the ones that appear in some
+        # edge (the others have empty counters, that count 0), and they are found by a first pass.
+        if source is not None and exact:
+            raise ValueError("source requires exact=False")
+        if source is not None and hasattr(source, "__next__"):
+            raise ValueError("HyperANF reads the edges once per iteration, hence source cannot be an iterator")
+        seen = None
+        if source is None:
+            C = self.__graph()
+            n = C.number_of_nodes()
+            source = C
+        elif isinstance(source, str) and is_binary_graph(source):
+            n = graph_info(source)[0]
+        elif hasattr(source, "number_of_nodes"):
+            n = source.number_of_nodes()
+        else:
+            seen = np.zeros(0, dtype=bool)
+            for edges in iter_edge_chunks(source, chunk):
+                if len(edges) > 0 and edges.max() >= len(seen):
+                    seen = np.concatenate((seen, np.zeros(int(edges.max()) + 1 - len(seen), dtype=bool)))
+                seen[edges.ravel()] = True
+            n = len(seen)
+        if n == 0:
+            return 0 if exact else (0, 0.0, [])
         
-    f.close()
+        if exact:
+            labels = C.component_labels()
+            sizes = np.bincount(labels)
+            members = np.argsort(labels, kind='stable')
+            offsets = np.concatenate(([0], np.cumsum(sizes)))
+            diameter = 0
+            for label in np.argsort(-sizes, kind='stable'):
+                if sizes[label] - 1 <= diameter:
+                    break
+                diameter = max(diameter, _ifub(C, members[offsets[label]:offsets[label + 1]]))
+            return diameter
+        
+        registers = _hll_init(n, p, seed)
+        if seen is not None:
+            registers[~seen] = 0
+        N = [_hll_count(registers)]
+        t = 0
+        while max_iter is None or t < max_iter:
+            previous = registers.copy()
+            for edges in iter_edge_chunks(source, chunk):
+                src = np.concatenate((edges[:, 0], edges[:, 1]))
+                dst = np.concatenate((edges[:, 1], edges[:, 0]))
+                order = np.argsort(src, kind='stable')
+                src, dst = src[order], dst[order]
+                starts = np.flatnonzero(np.concatenate(([True], src[1:] != src[:-1])))
+                merged = np.maximum.reduceat(previous[dst], starts, axis=0)
+                registers[src[starts]] = np.maximum(registers[src[starts]], merged)
+            if np.array_equal(registers, previous):
+                break
+            t += 1
+            N.append(_hll_count(registers))
+        
+        target = 0.9 * N[-1]
+        h = next(h for h, value in enumerate(N) if value >= target)
+        effective = float(h) if h == 0 or N[h] == N[h - 1] else h - 1 + (target - N[h - 1]) / (N[h] - N[h - 1])
+        return t, float(effective), [float(value) for value in N]
+        
+def stream_diam(G, **kwargs):
+    "Returns the approximate diameter of G computed by HyperANF (see Analyzer.get_diameter)"
+    return Analyzer(G).get_diameter(exact=False, **kwargs)[0]
+        
+if __name__ == '__main__':
+
+    # The text edge list is converted once to the binary file net_2.bin, that is then memory-mapped
+    G = open_graph('net_2')
             
     print(G.number_of_nodes())
     print(G.number_of_edges())
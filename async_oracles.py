@@ -0,0 +1,271 @@
+import json
+import socket
+import asyncio
+import threading
+from diffusion import query_prob, query_val
+
+# Oracles backed by a remote lookup service, for SocNetMec.run_async.
+#
+# A query is the tuple of the arguments of the oracle: (u, v, t) for prob and (t, v) for val.
+# CoalescingOracle sends the queries of a wave to the service with few requests, and:
+#   - at most concurrency requests are in flight at the same time (the others wait on a semaphore);
+#   - a request contains at most batch_size queries;
+#   - a query already sent and not answered yet is not sent again, but waits for the answer of the first one
+#     (e.g., two sellers inviting the same node, or a node invited by several neighbors);
+#   - answers are kept until the step changes, so a query is sent at most once per step.
+# AsyncProb and AsyncVal expose it with the interface of the oracles (a method batch, here a coroutine).
+#
+# StandInServer is a local stand-in of the service, answering with in-process oracles (e.g., the ones of oracles.py)
+# after an injected latency; Client talks to it with line-delimited JSON over a pool of TCP connections,
+# and BlockingOracle asks one query per call and waits for its answer, as the synchronous path of run does.
+
+class CoalescingOracle:
+    "Batched access to a remote oracle, with bounded concurrency, coalescing of pending queries and memoization per step"
+
+    # fetch = coroutine function: fetch(queries) returns the list of the answers to the list of queries, with one request
+    def __init__(self, fetch, concurrency=8, batch_size=1024):
+        self.fetch = fetch
+        self.batch_size = batch_size
+        self.__semaphore = asyncio.Semaphore(concurrency)
+        self.__t = None
+        self.__memo = dict() # {query: answer, ...} for the current step
+        self.__pending = dict() # {query: future of its answer, ...}
+        self.requests = 0
+        self.queries = 0
+        self.memo_hits = 0
+        self.coalesced = 0
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "memo_hits": self.memo_hits,
+            "coalesced": self.coalesced,
+        }
+
+    async def get(self, t, queries):
+        "Returns the answers to the queries of step t"
+
+        if t != self.__t:
+            self.__t = t
+            self.__memo = dict()
+        loop = asyncio.get_running_loop()
+        answers = [None] * len(queries)
+        waiting = []
+        missing = []
+        for i, query in enumerate(queries):
+            if query in self.__memo:
+                answers[i] = self.__memo[query]
+                self.memo_hits += 1
+            elif query in self.__pending:
+                waiting.append((i, self.__pending[query]))
+                self.coalesced += 1
+            else:
+                future = loop.create_future()
+                self.__pending[query] = future
+                waiting.append((i, future))
+                missing.append(query)
+
+        await asyncio.gather(*(self.__request(missing[i:i + self.batch_size], self.__memo)
+                               for i in range(0, len(missing), self.batch_size)))
+        for i, future in waiting:
+            answers[i] = await future
+        return answers
+
+    async def __request(self, queries, memo):
+        try:
+            async with self.__semaphore:
+                self.requests += 1
+                self.queries += len(queries)
+                answers = await self.fetch(queries)
+        except BaseException as error:
+            for query in queries:
+                future = self.__pending.pop(query)
+                if not future.done():
+                    future.set_exception(error)
+            raise
+        for query, answer in zip(queries, answers):
+            memo[query] = answer
+            self.__pending.pop(query).set_result(answer)
+
+class AsyncProb:
+    "prob oracle whose queries are sent by a CoalescingOracle"
+
+    def __init__(self, fetch, **kwargs):
+        self.oracle = CoalescingOracle(fetch, **kwargs)
+
+    async def batch(self, us, vs, t):
+        return await self.oracle.get(t, [(u, v, t) for u, v in zip(us, vs)])
+
+class AsyncVal:
+    "val oracle whose queries are sent by a CoalescingOracle"
+
+    def __init__(self, fetch, **kwargs):
+        self.oracle = CoalescingOracle(fetch, **kwargs)
+
+    async def batch(self, t, vs):
+        return await self.oracle.get(t, [(t, v) for v in vs])
+
+def _plain(x):
+    # JSON does not know numpy integers and booleans
+    return x.item() if hasattr(x, "item") else x
+
+def _encode(kind, queries):
+    return (json.dumps({"kind": kind, "queries": [[_plain(x) for x in query] for query in queries]}) + "\n").encode()
+
+class StandInServer:
+    "Local lookup service answering the queries of prob and val after an injected latency"
+
+    # latency = seconds waited before answering each request (independently of its number of queries)
+    def __init__(self, prob, val, latency=0.002, host="127.0.0.1", port=0):
+        self.prob = prob
+        self.val = val
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.__server = None
+
+    def __answer(self, kind, queries):
+        # Queries are grouped by step, so that oracles with a method batch receive them at once
+        steps = dict()
+        for i, query in enumerate(queries):
+            steps.setdefault(query[2] if kind == "prob" else query[0], []).append(i)
+        answers = [None] * len(queries)
+        for t, indices in steps.items():
+            if kind == "prob":
+                found = query_prob(self.prob, [queries[i][0] for i in indices], [queries[i][1] for i in indices], t)
+            else:
+                found = query_val(self.val, t, [queries[i][1] for i in indices])
+            for i, answer in zip(indices, found):
+                answers[i] = _plain(answer)
+        return answers
+
+    async def __handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                self.requests += 1
+                await asyncio.sleep(self.latency)
+                writer.write((json.dumps(self.__answer(request["kind"], request["queries"])) + "\n").encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self):
+        "Starts serving; returns the address (host, port)"
+        self.__server = await asyncio.start_server(self.__handle, self.host, self.port)
+        self.host, self.port = self.__server.sockets[0].getsockname()[:2]
+        return self.host, self.port
+
+    async def close(self):
+        self.__server.close()
+        await self.__server.wait_closed()
+
+    def start_in_thread(self):
+        "Starts serving in a new daemon thread, with its own event loop; returns the address (host, port)"
+        ready = threading.Event()
+        def serve():
+            async def main():
+                await self.start()
+                ready.set()
+                await self.__server.serve_forever()
+            asyncio.run(main())
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        return self.host, self.port
+
+class Client:
+    "Client of a StandInServer, with at most connections requests in flight (one per TCP connection)"
+
+    def __init__(self, host, port, connections=8):
+        self.host = host
+        self.port = port
+        self.connections = connections
+        self.__opened = 0
+        self.__idle = None
+
+    async def request(self, kind, queries):
+        "Returns the answers of the service to the queries of kind (prob or val)"
+        if self.__idle is None:
+            self.__idle = asyncio.Queue()
+        if self.__idle.empty() and self.__opened < self.connections:
+            self.__opened += 1
+            connection = await asyncio.open_connection(self.host, self.port)
+        else:
+            connection = await self.__idle.get()
+        reader, writer = connection
+        writer.write(_encode(kind, queries))
+        await writer.drain()
+        answers = json.loads(await reader.readline())
+        self.__idle.put_nowait(connection)
+        return answers
+
+    async def prob(self, queries):
+        return await self.request("prob", queries)
+
+    async def val(self, queries):
+        return await self.request("val", queries)
+
+    async def close(self):
+        while self.__idle is not None and not self.__idle.empty():
+            _, writer = self.__idle.get_nowait()
+            writer.close()
+            await writer.wait_closed()
+        self.__opened = 0
+
+class BlockingOracle:
+    "Oracle of kind prob or val that asks the service one query per call and waits for its answer"
+
+    def __init__(self, host, port, kind):
+        self.kind = kind
+        self.__socket = socket.create_connection((host, port))
+        self.__file = self.__socket.makefile("rb")
+
+    def __call__(self, *query):
+        self.__socket.sendall(_encode(self.kind, [query]))
+        return json.loads(self.__file.readline())[0]
+
+    def close(self):
+        self.__file.close()
+        self.__socket.close()
+
+if __name__ == '__main__':
+    import time
+    from csr_graph import CSRGraph
+    from networks_gen import randomG
+    from oracles import ValOracle, ProbOracle
+    from final_mockup import SocNetMec
+    from simulation import step_rng
+
+    # Throughput of the synchronous path (one blocking call per query) and of run_async, with 1 ms of latency;
+    # the average degree is below 1, so that sellers are rarely in the same component and their invitations spread
+    n, T, seed = 20000, 20, 0
+    G = CSRGraph.from_edges(randomG(n, 0.9 / n, seed, as_edges=True), n)
+    server = StandInServer(ProbOracle(G, seed), ValOracle(seed), latency=0.001)
+    host, port = server.start_in_thread()
+
+    prob, val = BlockingOracle(host, port, "prob"), BlockingOracle(host, port, "val")
+    snm = SocNetMec(G, T, 5)
+    start = time.perf_counter()
+    sync = [snm.run(t, prob, val, step_rng(seed, t)) for t in range(T)]
+    elapsed = time.perf_counter() - start
+    print("blocking: %.2f steps/sec, %d requests" % (T / elapsed, server.requests))
+
+    async def main():
+        client = Client(host, port)
+        prob, val = AsyncProb(client.prob), AsyncVal(client.val)
+        snm = SocNetMec(G, T, 5)
+        revenues = [await snm.run_async(t, prob, val, step_rng(seed, t)) for t in range(T)]
+        await client.close()
+        return revenues, prob.oracle.stats()
+
+    requests = server.requests
+    start = time.perf_counter()
+    revenues, stats = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    print("async:    %.2f steps/sec, %d requests, %s" % (T / elapsed, server.requests - requests, stats))
+    print("same revenues:", revenues == sync)
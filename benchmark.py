@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import time
+import fnmatch
+import argparse
+import platform
+import resource
+import subprocess
+
+# Benchmarks of the generators in networks_gen.py, of SocNetMec.run and of the metrics of Analyzer.
+#
+# A benchmark case is a function case(n, seed) registered with @bench(name): it prepares its input
+# (not timed) and returns a function work() that does the measured work and returns the dict of what it processed,
+# e.g., {"edges": m} or {"steps": s}. The harness reports, for each of them, the throughput (edges/sec, steps/sec, ...).
+# New cases (e.g., for a new metric of Analyzer) only need to be registered here.
+#
+# Each case is run, for each size, in a new process, so that its peak RSS (ru_maxrss) is measured in isolation
+# and a case that fails or runs out of time does not stop the others. Results are appended to a JSON history file,
+# and compared with a baseline file: a case is flagged as a regression if its wall time or its peak RSS
+# exceed the ones of the baseline by more than the tolerance.
+#
+# Usage: python benchmark.py [--sizes 1000 10000 ...] [--cases "gen.*" ...] [--save-baseline]
+
+SIZES = [10**3, 10**4, 10**5, 10**6]
+STEPS = 20 # steps of SocNetMec.run per case
+
+CASES = dict()
+
+def bench(name):
+    "Registers the decorated function as the benchmark case name"
+    def register(case):
+        CASES[name] = case
+        return case
+    return register
+
+def _edges(result):
+    if hasattr(result, "number_of_edges"):
+        return {"edges": result.number_of_edges()}
+    return {"edges": len(result)}
+
+def _affiliation_edges(n, seed, affiliationG):
+    # The number of communities grows with n, so that the average degree does not grow with n
+    return affiliationG(n, max(5, n // 100), 0.5, 1, 0.1, 3, seed=seed, as_edges=True)
+
+def _csr(n, seed):
+    from csr_graph import CSRGraph
+    from networks_gen import affiliationG
+    return CSRGraph.from_edges(_affiliation_edges(n, seed, affiliationG), n)
+
+# Generators: average degree about 10 for every size
+
+@bench("gen.randomG")
+def _(n, seed):
+    from networks_gen import randomG
+    return lambda: _edges(randomG(n, 10 / n, seed, as_edges=True))
+
+@bench("gen.configurationG")
+def _(n, seed):
+    from networks_gen import configurationG, power_law_degree
+    deg = power_law_degree(n, 2.5)
+    return lambda: _edges(configurationG(deg, seed, as_edges=True))
+
+@bench("gen.preferentialG")
+def _(n, seed):
+    from networks_gen import preferentialG
+    return lambda: _edges(preferentialG(n, 0.5, seed, as_edges=True))
+
+@bench("gen.multiPreferentialG")
+def _(n, seed):
+    from networks_gen import multiPreferentialG
+    return lambda: _edges(multiPreferentialG(n, 0.5, 5, seed, as_edges=True))
+
+@bench("gen.degreePreferentialG")
+def _(n, seed):
+    from networks_gen import degreePreferentialG
+    return lambda: _edges(degreePreferentialG(n, 0.5, seed, as_edges=True))
+
+@bench("gen.GenWS2DG")
+def _(n, seed):
+    from networks_gen import GenWS2DG
+    r = (8 / (3.1416 * n)) ** 0.5 # about 8 strong ties per node
+    return lambda: _edges(GenWS2DG(n, r, 2, 2, seed, as_edges=True))
+
+@bench("gen.affiliationG")
+def _(n, seed):
+    from networks_gen import affiliationG
+    return lambda: _edges(_affiliation_edges(n, seed, affiliationG))
+
+# SocNetMec
+
+@bench("socnetmec.run")
+def _(n, seed):
+    from final_mockup import SocNetMec
+    from oracles import ValOracle, ProbOracle
+    from simulation import step_rng
+    G = _csr(n, seed)
+    prob, val = ProbOracle(G, seed), ValOracle(seed)
+    snm = SocNetMec(G, STEPS, 5)
+    def work():
+        for t in range(STEPS):
+            snm.run(t, prob, val, step_rng(seed, t))
+        return {"steps": STEPS}
+    return work
+
+@bench("socnetmec.run_profiled")
+def _(n, seed):
+    from final_mockup import SocNetMec
+    from oracles import ValOracle, ProbOracle
+    from profiler import Profiler
+    from simulation import step_rng
+    G = _csr(n, seed)
+    prob, val = ProbOracle(G, seed), ValOracle(seed)
+    snm = SocNetMec(G, STEPS, 5, profiler=Profiler())
+    def work():
+        for t in range(STEPS):
+            snm.run(t, prob, val, step_rng(seed, t))
+        return {"steps": STEPS}
+    return work
+
+# Analyzer
+
+@bench("analyzer.degree_distribution")
+def _(n, seed):
+    from analyze import Analyzer
+    G = _csr(n, seed)
+    def work():
+        Analyzer(G).get_degree_distribution(log_bins=20, fit=True, plot=False)
+        return {"edges": G.number_of_edges()}
+    return work
+
+@bench("analyzer.clustering")
+def _(n, seed):
+    from analyze import Analyzer
+    G = _csr(n, seed)
+    def work():
+        Analyzer(G).get_clustering_coefficient()
+        return {"edges": G.number_of_edges()}
+    return work
+
+@bench("analyzer.clustering_approx")
+def _(n, seed):
+    from analyze import Analyzer
+    G = _csr(n, seed)
+    def work():
+        Analyzer(G).get_clustering_coefficient(exact=False, epsilon=0.005, seed=seed)
+        return {"edges": G.number_of_edges()}
+    return work
+
+@bench("analyzer.diameter")
+def _(n, seed):
+    from analyze import Analyzer
+    G = _csr(n, seed)
+    def work():
+        Analyzer(G).get_diameter()
+        return {"edges": G.number_of_edges()}
+    return work
+
+@bench("analyzer.diameter_anf")
+def _(n, seed):
+    from analyze import Analyzer
+    G = _csr(n, seed)
+    def work():
+        Analyzer(G).get_diameter(exact=False, seed=seed)
+        return {"edges": G.number_of_edges()}
+    return work
+
+@bench("analyzer.giant_component")
+def _(n, seed):
+    from analyze import Analyzer
+    G = _csr(n, seed)
+    def work():
+        Analyzer(G).get_giant_component(distribution=True)
+        return {"edges": G.number_of_edges()}
+    return work
+
+@bench("analyzer.communities")
+def _(n, seed):
+    from analyze import Analyzer
+    G = _csr(n, seed)
+    def work():
+        Analyzer(G).get_communities(20, max_iter=20, seed=seed)
+        return {"edges": G.number_of_edges()}
+    return work
+
+@bench("analyzer.number_of_communities")
+def _(n, seed):
+    from analyze import Analyzer
+    G = _csr(n, seed)
+    m = max(5, n // 100)
+    def work():
+        Analyzer(G).get_number_of_communities([m // 2, m, 2 * m], max_iter=20, seed=seed)
+        return {"edges": G.number_of_edges()}
+    return work
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+def run_case(name, n, seed=0):
+    "Runs the case name with size n in this process; returns its measures"
+
+    work = CASES[name](n, seed)
+    setup_rss = _peak_rss_mb()
+    start = time.perf_counter()
+    counts = work()
+    wall = time.perf_counter() - start
+    result = {"case": name, "n": n, "status": "ok", "wall_s": wall, "setup_rss_mb": setup_rss, "peak_rss_mb": _peak_rss_mb()}
+    for key, count in counts.items():
+        result[key] = count
+        result[key + "_per_s"] = count / wall if wall > 0 else None
+    return result
+
+def run_isolated(name, n, seed=0, timeout=None):
+    "Runs the case name with size n in a new process; returns its measures"
+
+    env = dict(os.environ, MPLBACKEND="Agg")
+    command = [sys.executable, os.path.abspath(__file__), "--child", name, str(n), str(seed)]
+    try:
+        done = subprocess.run(command, capture_output=True, text=True, timeout=timeout, env=env,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    except subprocess.TimeoutExpired:
+        return {"case": name, "n": n, "status": "timeout", "wall_s": None, "peak_rss_mb": None}
+    if done.returncode != 0:
+        error = done.stderr.strip().splitlines()
+        return {"case": name, "n": n, "status": "error", "error": error[-1] if error else "", "wall_s": None, "peak_rss_mb": None}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+def _key(result):
+    return "%s@%d" % (result["case"], result["n"])
+
+def regressions(results, baseline, tolerance):
+    "Returns the list of (case@n, measure, baseline value, new value) that are worse than the baseline by more than tolerance"
+
+    flagged = []
+    for result in results:
+        old = baseline.get(_key(result))
+        if old is None or result["status"] != "ok":
+            continue
+        for measure in ("wall_s", "peak_rss_mb"):
+            if old.get(measure) and result[measure] > old[measure] * (1 + tolerance):
+                flagged.append((_key(result), measure, old[measure], result[measure]))
+    return flagged
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def _load(path, default):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return default
+
+def _save(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of generators, SocNetMec and Analyzer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--cases", nargs="+", default=["*"], help="patterns of the names of the cases to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds allowed to each case")
+    parser.add_argument("--history", default="bench_history.json")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown before flagging")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        name, n, seed = args.child
+        print(json.dumps(run_case(name, int(n), int(seed))))
+        return 0
+
+    names = [name for name in CASES if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    results = []
+    for name in names:
+        for n in args.sizes:
+            result = run_isolated(name, n, args.seed, args.timeout)
+            results.append(result)
+            if result["status"] == "ok":
+                rates = ", ".join("%s %.3g" % (key, value) for key, value in result.items() if key.endswith("_per_s") and value)
+                print("%-32s n=%-8d %9.3f s %9.1f MB  %s" % (name, n, result["wall_s"], result["peak_rss_mb"], rates))
+            else:
+                print("%-32s n=%-8d %s %s" % (name, n, result["status"], result.get("error", "")))
+
+    history = _load(args.history, [])
+    history.append({
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    })
+    _save(args.history, history)
+
+    flagged = regressions(results, _load(args.baseline, dict()), args.tolerance)
+    for key, measure, old, new in flagged:
+        print("REGRESSION %s %s: %.3f -> %.3f" % (key, measure, old, new))
+
+    if args.save_baseline:
+        baseline = _load(args.baseline, dict())
+        baseline.update({_key(result): result for result in results if result["status"] == "ok"})
+        _save(args.baseline, baseline)
+
+    return 1 if flagged else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
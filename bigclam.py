@@ -0,0 +1,317 @@
+import os
+import numpy as np
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from scipy.sparse import csr_matrix
+from csr_graph import CSRGraph
+
+# BigCLAM community detection (Yang & Leskovec, 2013), on a CSRGraph.
+#
+# Each node u has a nonnegative vector F[u] with its affiliation to each of the m communities, and the probability
+# of the edge (u, v) is 1 - exp(-F[u].F[v]). The log-likelihood of F is
+#   l(F) = sum_u l_u(F),   l_u(F) = sum_{v in N(u)} log(1 - exp(-F[u].F[v])) - F[u].(S - F[u] - sum_{v in N(u)} F[v]),
+# where S is the sum of all the rows of F, hence the term of the non-edges costs O(m) per node instead of O(nm).
+# The gradient of l_u with respect to F[u] is
+#   g_u = sum_{v in N(u)} F[v] / (exp(F[u].F[v]) - 1) - (S - F[u] - sum_{v in N(u)} F[v]).
+#
+# At each iteration, the gradients of all nodes are computed at once with sparse products over the adjacency matrix,
+# and every node moves along its own gradient with a backtracking (Armijo) line search on l_u, projected on [0, MAX];
+# since the line searches assume the other nodes fixed, the moves are then shortened if l(F) does not improve.
+# Nodes are processed in blocks of rows with about block edges each, on a pool of threads (numpy releases the GIL),
+# so that the memory used is O(nm) for F, its neighbor sums and the new F, plus O(block m) per thread.
+
+MIN_P = 1e-4 # the probability of an edge is at least MIN_P, i.e., F[u].F[v] >= -log(1 - MIN_P)
+MAX = 1000.0 # largest value of an entry of F
+MIN_DOT = -np.log1p(-MIN_P)
+
+def _edges(C, rows):
+    # Returns, for the edges (u, v) with u in the range of rows, the index of u within rows and v
+    first, last = int(C.indptr[rows[0]]), int(C.indptr[rows[-1] + 1])
+    return np.repeat(np.arange(len(rows)), C.degrees[rows[0]:rows[-1] + 1]), C.indices[first:last]
+
+def _local_likelihood(Fb, Fv, local, out):
+    # Returns l_u for the nodes u of a block, given their rows Fb of F, the rows Fv of F of the other endpoints
+    # of their edges, and out = S - F[u] - sum of F on N(u)
+    dots = np.maximum(np.einsum('ij,ij->i', Fb[local], Fv), MIN_DOT)
+    return np.bincount(local, weights=np.log(-np.expm1(-dots)), minlength=len(Fb)) - np.einsum('ij,ij->i', Fb, out)
+
+def _update_block(C, rows, F, AF, S, alpha, beta, tries):
+    # Returns the rows of F proposed for the nodes in rows, each one found by a backtracking line search on l_u
+    local, dst = _edges(C, rows)
+    Fb, Fv = F[rows], F[dst]
+    out = S - Fb - AF[rows]
+    dots = np.einsum('ij,ij->i', Fb[local], Fv)
+    # The gradient is the one of the likelihood with clamped probabilities, hence 0 on the clamped edges
+    with np.errstate(over='ignore', divide='ignore'):
+        weights = np.where(dots > MIN_DOT, 1 / np.expm1(dots), 0.0)
+    dots = np.maximum(dots, MIN_DOT)
+    grad = csr_matrix((weights, (local, np.arange(len(local)))), shape=(len(rows), len(local))) @ Fv - out
+    current = np.bincount(local, weights=np.log(-np.expm1(-dots)), minlength=len(rows)) - np.einsum('ij,ij->i', Fb, out)
+
+    # Each trial step is only evaluated on the nodes that have not accepted a larger one, and on their edges
+    new = Fb.copy()
+    pending = np.arange(len(rows))
+    edges = np.arange(len(local))
+    step = 1.0
+    for _ in range(tries):
+        candidate = np.clip(Fb[pending] + step * grad[pending], 0, MAX)
+        index = np.searchsorted(pending, local[edges])
+        trial = _local_likelihood(candidate, Fv[edges], index, out[pending])
+        accept = trial >= current[pending] + alpha * np.einsum('ij,ij->i', grad[pending], candidate - Fb[pending])
+        new[pending[accept]] = candidate[accept]
+        pending = pending[~accept]
+        if len(pending) == 0:
+            break
+        still = np.zeros(len(rows), dtype=bool)
+        still[pending] = True
+        edges = edges[still[local[edges]]]
+        step *= beta
+    return new
+
+def _blocks(C, block):
+    # Ranges of rows with about block edges each
+    n = C.number_of_nodes()
+    cuts = np.searchsorted(np.asarray(C.indptr[1:], dtype=np.int64), np.arange(block, len(C.indices) + block, block), side='left')
+    cuts = np.unique(np.concatenate(([0], np.minimum(cuts + 1, n), [n])))
+    return [np.arange(lo, hi) for lo, hi in zip(cuts[:-1], cuts[1:]) if hi > lo]
+
+def _likelihood(C, F, A, blocks, pool):
+    AF = A @ F
+    S = F.sum(axis=0)
+    def part(rows):
+        local, dst = _edges(C, rows)
+        return _local_likelihood(F[rows], F[dst], local, S - F[rows] - AF[rows]).sum()
+    return float(sum(pool.map(part, blocks)))
+
+def log_likelihood(C, F, block=1 << 16, workers=None):
+    "Returns the log-likelihood of F for the graph C"
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        return _likelihood(C, np.asarray(F, dtype=np.float64), C.to_scipy().astype(np.float64), _blocks(C, block), pool)
+
+def seed_factors(C, m, seed=None):
+    "Returns the initial F: one community for each of the m nodes with the locally minimal conductance of their neighborhood"
+
+    # The neighborhood of u (u and its neighbors) has volume deg(u) + sum of the degrees of the neighbors
+    # and deg(u) + triangles(u) internal edges; u is locally minimal if no neighbor has a smaller conductance.
+    # Seeds are taken by increasing conductance, skipping the nodes in the neighborhood of a previous seed.
+    # If there are less than m such nodes, the remaining communities start from random nodes.
+    from analyze import _triangles
+    rng = np.random.default_rng(seed)
+    n = C.number_of_nodes()
+    A = C.to_scipy().astype(np.float64)
+    degrees = C.degrees.astype(np.float64)
+    volume = degrees + A @ degrees
+    cut = volume - 2 * (degrees + _triangles(C, 1 << 22))
+    total = degrees.sum()
+    conductance = np.where(volume > 0, cut / np.maximum(np.minimum(volume, total - volume), 1), np.inf)
+
+    # Only the rows with edges are reduced: the offsets of isolated nodes may be len(C.indices)
+    smallest = np.full(n, np.inf)
+    if len(C.indices) > 0:
+        smallest[C.degrees > 0] = np.minimum.reduceat(conductance[C.indices], C.indptr[:-1][C.degrees > 0])
+    minimal = np.flatnonzero((C.degrees > 0) & (conductance <= smallest))
+    covered = np.zeros(n, dtype=bool)
+    seeds = []
+    for u in minimal[np.argsort(conductance[minimal], kind='stable')].tolist():
+        if len(seeds) == m:
+            break
+        if covered[u]:
+            continue
+        seeds.append(u)
+        covered[u] = True
+        covered[C.indices[C.indptr[u]:C.indptr[u + 1]]] = True
+    seeds = np.array(seeds, dtype=np.int64)
+    if len(seeds) < m:
+        others = np.setdiff1d(np.arange(n), seeds)
+        seeds = np.concatenate((seeds, rng.choice(others, size=min(m - len(seeds), len(others)), replace=False)))
+
+    F = rng.random((n, m)) * 0.01
+    for c, u in enumerate(seeds):
+        F[u, c] = 1.0
+        F[C.indices[C.indptr[u]:C.indptr[u + 1]], c] = 1.0
+    return F
+
+def fit(C, m, F=None, max_iter=100, tol=1e-4, alpha=0.05, beta=0.3, tries=10, block=1 << 16, workers=None, seed=None, callback=None):
+    "Returns the affiliation matrix F fitted to the graph C and the log-likelihood after each iteration"
+
+    # F = initial affiliations (e.g., of a previous fit, to warm start it); seed_factors(C, m, seed) if None.
+    # The fit stops after max_iter iterations, or when the log-likelihood improves by less than tol (relative),
+    # or when callback(F, history), called after each iteration, returns True; history[0] is the log-likelihood of the initial F.
+    if F is None:
+        F = seed_factors(C, m, seed)
+    F = np.array(F, dtype=np.float64)
+    A = C.to_scipy().astype(np.float64)
+    blocks = _blocks(C, block)
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        history = [_likelihood(C, F, A, blocks, pool)]
+        for _ in range(max_iter):
+            AF = A @ F
+            S = F.sum(axis=0)
+            proposal = np.empty_like(F)
+            for rows, rows_F in zip(blocks, pool.map(lambda rows: _update_block(C, rows, F, AF, S, alpha, beta, tries), blocks)):
+                proposal[rows] = rows_F
+
+            # All nodes move at once, while each line search assumed the others fixed: if the likelihood
+            # does not improve, the moves are shortened until it does
+            gamma = 1.0
+            while gamma >= 1e-9:
+                candidate = F + gamma * (proposal - F)
+                value = _likelihood(C, candidate, A, blocks, pool)
+                if value >= history[-1]:
+                    break
+                gamma *= 0.5
+            if value < history[-1]:
+                break
+            F = candidate
+            history.append(value)
+            if abs(history[-1] - history[-2]) <= tol * abs(history[-2]):
+                break
+            if callback is not None and callback(F, history):
+                break
+    return F, history
+
+def threshold(C):
+    "Returns the affiliation above which a node belongs to a community: the one giving the edge density of C to two nodes sharing it"
+    n = C.number_of_nodes()
+    density = 2 * C.number_of_edges() / max(n * (n - 1), 1)
+    return float(np.sqrt(-np.log1p(-min(density, 1 - MIN_P))))
+
+def communities(F, delta):
+    "Returns the list of the communities, as arrays of nodes u with F[u, c] >= delta (empty communities are dropped)"
+    members = [np.flatnonzero(F[:, c] >= delta) for c in range(F.shape[1])]
+    return [nodes for nodes in members if len(nodes) > 0]
+
+# Choice of the number of communities m by holdout validation.
+#
+# A fraction of the edges is held out, together with as many random pairs of nodes that are not edges, and the
+# model is fitted on the remaining graph for each candidate m; the score of m is the log-likelihood of the held out
+# pairs (log(1 - exp(-F[u].F[v])) for the edges, -F[u].F[v] for the non-edges), that does not grow with m as the
+# training likelihood does. The sorted candidates are split into chains of consecutive values, run on a pool of
+# processes: the fit of each m is warm started from the F of the previous m of its chain, adding the next seeded
+# communities (see seed_factors) or dropping the weakest ones, so it usually converges in a few iterations.
+# Every check iterations the score is evaluated; since it is noisy, a fit stops only when its best score has not
+# improved for patience evaluations (it starts overfitting), or when, by extrapolating its last improvement to the
+# remaining iterations, it cannot reach the best score found so far by any process.
+
+_worker = dict()
+
+def _holdout(C, fraction, rng):
+    # Returns the training graph (C without the held out edges), the held out pairs, and which of them are edges
+    n = C.number_of_nodes()
+    src = np.repeat(np.arange(n, dtype=np.int64), C.degrees)
+    dst = C.indices.astype(np.int64)
+    forward = src < dst
+    src, dst = src[forward], dst[forward]
+    held = rng.random(len(src)) < fraction
+    train = CSRGraph.from_edges(np.column_stack((src[~held], dst[~held])), n, C.labels)
+
+    # Random pairs are drawn until there are as many non-edges as held out edges
+    from analyze import _has_edges
+    a, b = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    while len(a) < held.sum() and n > 1:
+        u, v = rng.integers(0, n, size=(2, 2 * int(held.sum()) + 16))
+        keep = (u != v) & ~_has_edges(C, u, v)
+        a, b = np.concatenate((a, u[keep])), np.concatenate((b, v[keep]))
+    k = int(held.sum())
+    pairs = np.column_stack((np.concatenate((src[held], a[:k])), np.concatenate((dst[held], b[:k]))))
+    return train, pairs, np.arange(len(pairs)) < k
+
+def _holdout_likelihood(F, pairs, edge):
+    dots = np.einsum('ij,ij->i', F[pairs[:, 0]], F[pairs[:, 1]])
+    return float(np.where(edge, np.log(-np.expm1(-np.maximum(dots, MIN_DOT))), -dots).sum())
+
+def _warm_start(F, start, m):
+    # Returns the initial F with m communities, from the F fitted with another number of communities
+    if F is None:
+        return start[:, :m].copy()
+    if F.shape[1] >= m:
+        return F[:, np.sort(np.argsort(-F.sum(axis=0), kind='stable')[:m])]
+    return np.hstack((F, start[:, F.shape[1]:m]))
+
+def _init_worker(C, start, pairs, edge, best, options):
+    _worker.update(C=C, start=start, pairs=pairs, edge=edge, best=best, options=options)
+
+def _run_chain(chain):
+    # Returns the score, iterations and whether it was stopped early for each m of the chain, and the best F of the chain
+    C, start, pairs, edge, best = (_worker[key] for key in ("C", "start", "pairs", "edge", "best"))
+    max_iter, check, patience, options = _worker["options"]
+    results, F, chosen, chosen_score = [], None, None, -np.inf
+    for m in chain:
+        trace = {"scores": [], "F": None, "stopped": False}
+        def callback(F, history):
+            if (len(history) - 1) % check != 0:
+                return False
+            score = _holdout_likelihood(F, pairs, edge)
+            scores = trace["scores"]
+            if not scores or score > max(scores):
+                trace["F"] = F
+            scores.append(score)
+            if len(scores) > patience and max(scores[-patience:]) <= max(scores[:-patience]):
+                trace["stopped"] = True
+                return True
+            if len(scores) >= 2 and score < best.value:
+                remaining = (max_iter - (len(history) - 1)) / check
+                if score + (score - scores[-2]) * remaining < best.value:
+                    trace["stopped"] = True
+                    return True
+            return False
+        F, history = fit(C, m, F=_warm_start(F, start, m), max_iter=max_iter, callback=callback, **options)
+        final = _holdout_likelihood(F, pairs, edge)
+        if not trace["scores"] or final > max(trace["scores"]):
+            trace["scores"].append(final)
+            trace["F"] = F
+        score = max(trace["scores"])
+        with best.get_lock():
+            best.value = max(best.value, score)
+        results.append((m, score, len(history) - 1, trace["stopped"]))
+        if score > chosen_score:
+            chosen, chosen_score = trace["F"], score
+    return results, chosen
+
+def select_number_of_communities(C, candidates, holdout=0.1, max_iter=100, check=5, patience=3, processes=None, seed=None, refit=False, **kwargs):
+    "Returns the number of communities among candidates with the best holdout likelihood, its matrix F, and the scores of all candidates"
+
+    # holdout = fraction of the edges held out; check, patience = the score is evaluated every check iterations,
+    # and a fit stops after patience evaluations without improvement; processes = size of the pool (one process per chain);
+    # the other arguments are passed to fit (e.g., tol, block, workers = threads of each process).
+    # scores[m] = (holdout log-likelihood, iterations, stopped early). F is fitted on the training graph,
+    # or, if refit, fitted again on the whole C starting from it.
+    rng = np.random.default_rng(seed)
+    candidates = sorted(set(int(m) for m in candidates))
+    if processes is None:
+        processes = os.cpu_count()
+    processes = max(1, min(processes, len(candidates)))
+    kwargs.setdefault("workers", max(1, os.cpu_count() // processes))
+
+    train, pairs, edge = _holdout(C, holdout, rng)
+    start = seed_factors(train, candidates[-1], rng)
+    chains = [chain.tolist() for chain in np.array_split(candidates, processes) if len(chain) > 0]
+    options = (max_iter, check, patience, kwargs)
+
+    if processes <= 1:
+        best = mp.Value('d', -np.inf)
+        _init_worker(train, start, pairs, edge, best, options)
+        outcomes = [_run_chain(chain) for chain in chains]
+    else:
+        context = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else None)
+        best = context.Value('d', -np.inf)
+        with context.Pool(processes, _init_worker, (train, start, pairs, edge, best, options)) as pool:
+            outcomes = pool.map(_run_chain, chains)
+
+    scores = {m: (score, iterations, stopped) for results, _ in outcomes for m, score, iterations, stopped in results}
+    m = max(scores, key=lambda m: scores[m][0])
+    F = next(F for results, F in outcomes if any(r[0] == m for r in results))
+    if refit:
+        F, _ = fit(C, m, F=F, max_iter=max_iter, **kwargs)
+    return m, F, scores
+
+if __name__ == '__main__':
+    import time
+    from networks_gen import affiliationG
+
+    n = 10000
+    C = CSRGraph.from_edges(affiliationG(n, 20, 0.5, 2, 0.1, 3, seed=0, as_edges=True), n)
+    start = time.perf_counter()
+    F, history = fit(C, 20, seed=0)
+    print("iterations %d, log-likelihood %.1f, %.1f sec" % (len(history), history[-1], time.perf_counter() - start))
+    print("community sizes", sorted(len(c) for c in communities(F, threshold(C))))
@@ -0,0 +1,169 @@
+import numpy as np
+
+class CSRGraph:
+    "Read-only undirected graph stored in compressed sparse row format"
+
+    # Nodes are the integers 0, ..., n-1. The neighbors of node u are indices[indptr[u]:indptr[u+1]], sorted.
+    # Each edge is stored twice (once for each endpoint), hence len(indices) = 2m.
+    # Offsets and neighbors are int32 (offsets become int64 only if 2m does not fit in an int32),
+    # so a graph takes about 8m + 4n bytes, instead of the hundreds of bytes per edge of networkx's dict-of-dicts.
+    # If the graph is built from a networkx graph whose nodes are not 0, ..., n-1, labels[u] is the original name of node u.
+
+    def __init__(self, indptr, indices, labels=None):
+        self.indptr = indptr
+        self.indices = indices
+        self.labels = labels
+        self.degrees = np.diff(indptr)
+        self.__rows = None # [neighbors of u as a list, or None if not asked yet, ...], see __getitem__
+
+    @classmethod
+    def from_edges(cls, edges, n=None, labels=None):
+        "Returns the graph with the given (m, 2) array of edges on nodes 0, ..., n-1 (self-loops and repeated edges are dropped)"
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if n is None:
+            n = int(edges.max()) + 1 if len(edges) > 0 else 0
+        edges = edges[edges[:, 0] != edges[:, 1]]
+
+        # Each edge is stored in both directions, sorted by source and then by destination
+        keys = np.concatenate((edges[:, 0] * n + edges[:, 1], edges[:, 1] * n + edges[:, 0]))
+        keys.sort()
+        if len(keys) > 0:
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+
+        offset_type = np.int32 if len(keys) < 2**31 else np.int64
+        indptr = np.zeros(n + 1, dtype=offset_type)
+        np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+        indices = (keys % n).astype(np.int32)
+
+        return cls(indptr, indices, labels)
+
+    @classmethod
+    def from_networkx(cls, G):
+        "Returns the CSR copy of the networkx graph G"
+
+        nodes = list(G.nodes())
+        n = len(nodes)
+        if nodes == list(range(n)):
+            labels = None
+            edges = np.array(list(G.edges()), dtype=np.int64)
+        else:
+            labels = np.array(nodes)
+            ids = {node: i for i, node in enumerate(nodes)}
+            edges = np.array([(ids[u], ids[v]) for u, v in G.edges()], dtype=np.int64)
+
+        return cls.from_edges(edges, n, labels)
+
+    # The following methods mimic the part of the networkx API used by SocNetMec and Analyzer
+
+    def __getitem__(self, u):
+        # As a list of Python ints, so that callers can build sets and dicts keyed by node as with networkx.
+        # The list of each node is built the first time it is asked and then kept (it must not be modified):
+        # SocNetMec asks the same nodes many times, and only the nodes reached by some diffusion take memory.
+        if self.__rows is None:
+            self.__rows = [None] * len(self.degrees)
+        row = self.__rows[u]
+        if row is None:
+            row = self.__rows[u] = self.indices[self.indptr[u]:self.indptr[u + 1]].tolist()
+        return row
+
+    def __iter__(self):
+        return iter(range(len(self.degrees)))
+
+    def __len__(self):
+        return len(self.degrees)
+
+    def __contains__(self, u):
+        return isinstance(u, (int, np.integer)) and 0 <= u < len(self.degrees)
+
+    def neighbors(self, u):
+        "Returns the neighbors of u as a (read-only) view of the neighbors array"
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def nodes(self):
+        return range(len(self.degrees))
+
+    def degree(self, u=None):
+        if u is None:
+            return zip(range(len(self.degrees)), self.degrees.tolist())
+        return int(self.degrees[u])
+
+    def has_edge(self, u, v):
+        row = self.neighbors(u)
+        i = np.searchsorted(row, v)
+        return bool(i < len(row) and row[i] == v)
+
+    def edges(self):
+        "Returns the (m, 2) array of edges (u, v) with u < v"
+        src = np.repeat(np.arange(len(self.degrees), dtype=np.int32), self.degrees)
+        mask = src < self.indices
+        return np.stack((src[mask], self.indices[mask]), axis=1)
+
+    def number_of_nodes(self):
+        return len(self.degrees)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def is_directed(self):
+        return False
+
+    def to_scipy(self):
+        "Returns the adjacency matrix as a scipy.sparse CSR matrix sharing the arrays of the graph"
+        from scipy.sparse import csr_matrix
+        n = len(self.degrees)
+        return csr_matrix((np.ones(len(self.indices), dtype=np.int8), self.indices, self.indptr), shape=(n, n))
+
+    def component_labels(self):
+        "Returns the array with the label of the connected component of each node"
+        from scipy.sparse.csgraph import connected_components
+        return connected_components(self.to_scipy(), directed=False)[1]
+
+    def nbytes(self):
+        "Returns the memory used by the arrays of the graph"
+        return self.indptr.nbytes + self.indices.nbytes + self.degrees.nbytes
+
+if __name__ == '__main__':
+    # Memory and speed comparison between networkx and CSRGraph on a sparse affiliation network (average degree
+    # about 17, as in benchmark.py): on graphs of this size SocNetMec.run is several times faster on CSRGraph,
+    # while on small graphs (e.g., 1000 nodes) the two are close
+    import time
+    import random
+    import tracemalloc
+    from networks_gen import affiliationG
+    from final_mockup import SocNetMec
+    from analyze import Analyzer
+
+    n = 200000
+    edges = affiliationG(n, n // 100, 0.5, 1, 0.1, 3, seed=0, as_edges=True)
+
+    tracemalloc.start()
+    import networkx as nx
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(edges.tolist())
+    nx_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    C = CSRGraph.from_edges(edges, n)
+
+    print("nodes", n, "edges", C.number_of_edges())
+    print("memory networkx: %.1f MB, CSR: %.1f MB" % (nx_bytes / 2**20, C.nbytes() / 2**20))
+
+    steps = 200
+    for name, graph in (("networkx", G), ("CSR", C)):
+        snm = SocNetMec(graph, steps, 5)
+        # The outcome of an invitation must be the same if it is asked twice in the same step
+        prob = lambda u, v, t: random.Random("%d %d %d" % (u, v, t)).random() <= 0.1
+        val = lambda t, u: random.Random("%d %d" % (t, u)).randint(1, 50)
+        random.seed(0)
+        # The first step builds the component index (with scipy, for a CSRGraph), once per graph: it is not timed
+        snm.run(0, prob, val)
+        start = time.perf_counter()
+        for t in range(1, steps + 1):
+            snm.run(t, prob, val)
+        elapsed = time.perf_counter() - start
+        print("SocNetMec.run on %s: %.1f steps/sec" % (name, steps / elapsed))
+
+        start = time.perf_counter()
+        Analyzer(graph).get_degree_distribution()
+        print("Analyzer.get_degree_distribution on %s: %.3f sec" % (name, time.perf_counter() - start))
@@ -0,0 +1,183 @@
+import random
+import inspect
+
+# Diffusion of the invitations of a seller s, as done by SocNetMec.
+#
+# Seller s invites its neighbors; every node v that accepts an invitation bids val(t, v) and reports
+# S_v, i.e., its neighbors that are neither spam nor sellers, and then it invites them in turn.
+# The outcome of an invitation from u to v is prob(u, v, t).
+#
+# The engine works in two phases.
+# (i) Exploration: invitations are sent in waves, as in a BFS. The first wave contains the invitations from s,
+#     the next one the invitations from the nodes that accepted for the first time in the previous wave, and so on.
+#     All the invitations of a wave are sent at once: if prob (resp. val) has a method batch(us, vs, t)
+#     (resp. batch(t, vs)), it receives the whole wave as lists and returns the list of outcomes;
+#     otherwise it is called once per invitation.
+# (ii) Replay: the outcomes are used to build bids and reports exactly as the original recursive procedure does,
+#     i.e., by visiting nodes in depth-first order (with an explicit stack, so that long invitation chains
+#     do not hit the recursion limit), without any call to the oracles.
+# If the oracles are deterministic, the auction receives the same bids and reports as with the recursive procedure.
+# The exploration may ask a few more invitations than the recursive procedure (e.g., to nodes that have already
+# accepted an invitation from someone else), but the outcome of each invitation is still asked only once per step.
+
+def query_prob(prob, us, vs, t):
+    "Returns the outcomes of the invitations from us[i] to vs[i] at time t"
+    if hasattr(prob, "batch"):
+        return list(prob.batch(us, vs, t))
+    return [prob(u, v, t) for u, v in zip(us, vs)]
+
+def query_val(val, t, vs):
+    "Returns the valuations of the nodes vs at time t"
+    if hasattr(val, "batch"):
+        return list(val.batch(t, vs))
+    return [val(t, v) for v in vs]
+
+def candidates(G, u, sellers, spam):
+    "Returns the neighbors of u that can be invited, i.e., that are neither spam nor sellers"
+    return [w for w in G[u] if w not in spam and w not in sellers]
+
+def reported(G, v, sellers, spam):
+    "Returns S_v, as a set built as by the original procedure, since its iteration order decides the order of the visit"
+    # The original procedure computes set(G[v]).difference(spam).difference(sellers). CPython's set.difference copies
+    # the set and removes the common nodes if len(set) >> 2 > len(spam), and otherwise builds a new set with the other
+    # nodes: the two ways give different iteration orders. The same choice is made here for the spam objects of the
+    # cache that are not sets (they support "in" and len), so the order does not depend on the storage of the cache.
+    S_v = set(G[v])
+    if isinstance(spam, (set, frozenset)):
+        return S_v.difference(spam).difference(sellers)
+    if (len(S_v) >> 2) > len(spam):
+        kept = set(S_v)
+        kept.difference_update([w for w in S_v if w in spam])
+    else:
+        kept = {w for w in S_v if w not in spam}
+    return kept.difference(sellers)
+
+def waves(G, s, sellers, spam):
+    # Generator of the waves of the exploration: it yields the lists (us, vs) of the invitations of a wave
+    # and it must be sent back the list of their outcomes. At the end, it returns the candidates of each
+    # node reached, the outcome of each invitation, the nodes that accepted an invitation and the number of waves.
+    cand = dict()
+    live = dict()
+    reached = []
+    seen = {s}
+    frontier = [s]
+    depth = 0
+    while frontier:
+        us, vs = [], []
+        for u in frontier:
+            cand[u] = candidates(G, u, sellers, spam)
+            us.extend([u] * len(cand[u]))
+            vs.extend(cand[u])
+        if not us:
+            break
+        outcomes = yield us, vs
+        depth += 1
+        frontier = []
+        for u, v, accepted in zip(us, vs, outcomes):
+            live[(u, v)] = bool(accepted)
+            if accepted and v not in seen:
+                seen.add(v)
+                reached.append(v)
+                frontier.append(v)
+    return cand, live, reached, depth
+
+def explore(G, s, sellers, spam, t, prob, val):
+    "Sends all the invitations of the diffusion from s; returns candidates, outcomes, valuations of the nodes reached and number of waves"
+
+    engine = waves(G, s, sellers, spam)
+    try:
+        us, vs = next(engine)
+        while True:
+            us, vs = engine.send(query_prob(prob, us, vs, t))
+    except StopIteration as stop:
+        cand, live, reached, depth = stop.value
+    values = dict(zip(reached, query_val(val, t, reached)))
+    return cand, live, values, depth
+
+async def _answers(result):
+    # The method batch of an async oracle returns an awaitable
+    if inspect.isawaitable(result):
+        result = await result
+    return list(result)
+
+async def query_prob_async(prob, us, vs, t):
+    "Same as query_prob, also for oracles whose method batch is a coroutine"
+    if hasattr(prob, "batch"):
+        return await _answers(prob.batch(us, vs, t))
+    return query_prob(prob, us, vs, t)
+
+async def query_val_async(val, t, vs):
+    "Same as query_val, also for oracles whose method batch is a coroutine"
+    if hasattr(val, "batch"):
+        return await _answers(val.batch(t, vs))
+    return query_val(val, t, vs)
+
+async def explore_async(G, s, sellers, spam, t, prob, val):
+    "Same as explore, awaiting the outcomes of each wave (see async_oracles.py), so that other explorations can run meanwhile"
+
+    engine = waves(G, s, sellers, spam)
+    try:
+        us, vs = next(engine)
+        while True:
+            us, vs = engine.send(await query_prob_async(prob, us, vs, t))
+    except StopIteration as stop:
+        cand, live, reached, depth = stop.value
+    values = dict(zip(reached, await query_val_async(val, t, reached)))
+    return cand, live, values, depth
+
+def replay(G, s, sellers, spam, cand, live, values, auction, rng=random):
+    "Returns the seller's net, the reports and the bids for the auction, given the outcomes of the invitations"
+
+    def accept(v):
+        bid_v = values[v]
+        S_v = reported(G, v, sellers, spam)
+        if not auction["truthful_bidding"]:
+            bid_v = rng.randint(int(0.5*bid_v), bid_v)
+        if not auction["truthful_reporting"]:
+            S_v = {w for w in S_v if rng.random() <= 0.2}
+        return bid_v, S_v
+
+    bids = dict()
+    reports = dict()
+
+    # The seller's net contains the neighbors of s that accepted its invitation
+    seller_net = set(G[s])
+    for neighbor in G[s]:
+        if neighbor in spam or neighbor in sellers or not live[(s, neighbor)]:
+            seller_net.remove(neighbor)
+        else:
+            bids[neighbor], reports[neighbor] = accept(neighbor)
+
+    # Depth-first visit: a node is visited when it accepts an invitation and it has someone to invite
+    visited = set()
+    stack = []
+
+    def enter(S, u):
+        if len(S) == 0 or u in visited:
+            return False
+        visited.add(u)
+        stack.append((u, iter(S.copy())))
+        return True
+
+    enter(seller_net, s)
+    while stack:
+        u, invited = stack[-1]
+        for v in invited:
+            if v in visited or v in sellers:
+                continue
+            if not live[(u, v)]:
+                reports[u].remove(v)
+                continue
+            bids[v], reports[v] = accept(v)
+            if enter(reports[v], v):
+                break
+        else:
+            stack.pop()
+
+    return seller_net, reports, bids
+
+def diffuse(G, s, sellers, spam, t, prob, val, auction, rng=random):
+    "Returns the seller's net, the reports and the bids of the diffusion of the invitations of s at time t"
+
+    cand, live, values, depth = explore(G, s, sellers, spam, t, prob, val)
+    return replay(G, s, sellers, spam, cand, live, values, auction, rng)
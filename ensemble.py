@@ -0,0 +1,118 @@
+import os
+import sys
+import ast
+import json
+import time
+import argparse
+import itertools
+import multiprocessing as mp
+import numpy as np
+import networks_gen
+from graph_io import write_graph, load_graph
+
+# Ensembles of random graphs: a generator of networks_gen.py, a grid of values of its parameters and a number
+# of replicates for each point of the grid.
+#
+# Every graph is generated by a process of a pool and written straight to a binary file (see graph_io.py),
+# so the parent never holds more than the summaries, and each worker holds one graph at a time.
+# The graph of job i (in the order of the grid, replicates last) is generated with the i-th child of
+# np.random.SeedSequence(seed): streams are independent, and the ensemble does not depend on the number of workers
+# or on the order in which jobs finish. The summary of each graph (nodes, edges, degree histogram) is computed
+# by the worker from the file it has written, and the summaries are saved to the manifest ensemble.json.
+#
+# Usage: python ensemble.py randomG --param n=25000 --param p=0.01,0.1,0.5 --replicates 3 --out ensemble
+
+# Generators of networks_gen.py that accept seed and as_edges
+GENERATORS = ("randomG", "configurationG", "preferentialG", "multiPreferentialG", "degreePreferentialG",
+              "GenWS2DG", "affiliationG")
+
+def parameter_grid(grid):
+    "Returns the list of the dicts of parameters of the grid {name: list of values, or a single value}"
+    names = list(grid)
+    values = [grid[name] if isinstance(grid[name], (list, tuple, range)) else [grid[name]] for name in names]
+    return [dict(zip(names, point)) for point in itertools.product(*values)]
+
+def _plain(value):
+    return value.tolist() if hasattr(value, "tolist") else value
+
+def _generate(job):
+    # Generates the graph of a job, writes it and returns its summary
+    generator, params, replicate, seed, path = job
+    start = time.perf_counter()
+    edges = getattr(networks_gen, generator)(seed=seed, as_edges=True, **params)
+    n = params["n"] if "n" in params else len(params["deg"]) if "deg" in params else None
+    write_graph(path, edges, n)
+    del edges
+
+    graph = load_graph(path)
+    degrees = graph.degrees
+    return {
+        "generator": generator,
+        "params": {name: _plain(value) for name, value in params.items()},
+        "replicate": replicate,
+        "spawn_key": list(seed.spawn_key),
+        "path": path,
+        "nodes": graph.number_of_nodes(),
+        "edges": graph.number_of_edges(),
+        "mean_degree": float(degrees.mean()) if len(degrees) > 0 else 0.0,
+        "max_degree": int(degrees.max(initial=0)),
+        "degree_histogram": np.bincount(degrees).tolist(),
+        "seconds": time.perf_counter() - start,
+    }
+
+def run_ensemble(generator, grid, replicates=1, out="ensemble", seed=0, workers=None):
+    "Generates the ensemble of generator on the grid of parameters; returns the list of the summaries of the graphs"
+
+    # generator = name of a generator of networks_gen.py among GENERATORS;
+    # grid = {name: list of values, or a single value}, e.g., {"n": 25000, "p": [0.01, 0.1, 0.5]}.
+    # Graph i is written to out/<generator>-<i>.bin; summaries are in the order of the jobs.
+    if generator not in GENERATORS:
+        raise ValueError("unknown generator %s" % generator)
+    os.makedirs(out, exist_ok=True)
+    points = parameter_grid(grid)
+    seeds = np.random.SeedSequence(seed).spawn(len(points) * replicates)
+    jobs = [(generator, params, r, seeds[i * replicates + r], os.path.join(out, "%s-%04d.bin" % (generator, i * replicates + r)))
+            for i, params in enumerate(points) for r in range(replicates)]
+
+    if workers is None:
+        workers = os.cpu_count()
+    workers = max(1, min(workers, len(jobs)))
+    if workers <= 1:
+        summaries = [_generate(job) for job in jobs]
+    else:
+        context = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else None)
+        with context.Pool(workers, maxtasksperchild=1) as pool:
+            summaries = pool.map(_generate, jobs, chunksize=1)
+
+    with open(os.path.join(out, "ensemble.json"), "w") as f:
+        json.dump({"generator": generator, "grid": {name: _plain(value) for name, value in grid.items()},
+                   "replicates": replicates, "seed": seed, "graphs": summaries}, f, indent=1)
+    return summaries
+
+def _parse_param(text):
+    # "name=v1,v2,..." -> (name, [v1, v2, ...]): the right hand side is parsed as a Python literal, and a tuple
+    # is the list of the values of the grid, while any other literal is a single value (e.g., "deg=[3,3,2,2]";
+    # a single tuple is written as "name=((1,2),)")
+    name, _, values = text.partition("=")
+    values = ast.literal_eval(values)
+    return name, list(values) if isinstance(values, tuple) else [values]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel generation of ensembles of random graphs")
+    parser.add_argument("generator", help="name of a generator of networks_gen.py, e.g., randomG")
+    parser.add_argument("--param", action="append", default=[], help="name=v1,v2,... or name=value, e.g., deg=[3,3,2,2] (repeat for each parameter)")
+    parser.add_argument("--replicates", type=int, default=1)
+    parser.add_argument("--out", default="ensemble", help="directory of the binary files and of the manifest")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    grid = dict(_parse_param(text) for text in args.param)
+    for summary in run_ensemble(args.generator, grid, args.replicates, args.out, args.seed, args.workers):
+        print("%-40s %s edges %10d  mean degree %7.2f  max degree %6d  %6.2f s" % (
+            os.path.basename(summary["path"]), summary["params"], summary["edges"],
+            summary["mean_degree"], summary["max_degree"], summary["seconds"]))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,40 +7,79 @@ from social_network_algorithms.mechanisms.SNCA import snca
 from social_network_algorithms.mechanisms.VCG import vcg
 
 import random
+import time
+import pickle
+import hashlib
+import numpy as np
+import asyncio
+from collections import deque
+from reachable_cache import ReachableCache
+from diffusion import explore, explore_async, replay
 
 class SocNetMec:
     
-    def __init__(self, G, T, k):
+    # Registry of the auctions: each one is a dict with its name, the function computing allocation and payments,
+    # and whether bidders are truthful when bidding and reporting. New auctions are added with register.
+    __registry = [
+        
+        {
+            "name": "MUDAN",
+            "auction": mudan,
+            "truthful_bidding": True,
+            "truthful_reporting": True,
+        },
+        {
+            "name": "SNCA",
+            "auction": snca,
+            "truthful_bidding": True,
+            "truthful_reporting": True,
+        },
+        {
+            "name": "VCG",
+            "auction": vcg,
+            "truthful_bidding": True,
+            "truthful_reporting": True,
+        }
+        
+    ]
+    
+    @classmethod
+    def register(cls, name, auction, truthful_bidding=True, truthful_reporting=True):
+        # Adds an auction to the registry (or replaces the one with the same name), for the instances created afterwards.
+        # auction(k, seller_net, reports, bids) must return the dicts allocation and payment.
+        entry = {
+            "name": name,
+            "auction": auction,
+            "truthful_bidding": truthful_bidding,
+            "truthful_reporting": truthful_reporting,
+        }
+        names = [a["name"] for a in cls.__registry]
+        if name in names:
+            cls.__registry = [entry if a["name"] == name else a for a in cls.__registry]
+        else:
+            cls.__registry = cls.__registry + [entry]
+
+    @classmethod
+    def auctions(cls):
+        return [a["name"] for a in cls.__registry]
+    
+    # cache = object storing the spam sets of the sets of sellers already seen (a bounded ReachableCache by default)
+    # profiler = Profiler recording the time of the phases of run and its counters (see profiler.py), None to disable it
+    def __init__(self, G, T, k, cache=None, profiler=None):
         
         self.G = G
         self.T = T
         self.k = k
         
-        self.__auctions = [
-            
-            {
-                "name": "MUDAN",
-                "auction": mudan,
-                "truthful_bidding": True,
-                "truthful_reporting": True,
-            },
-            {
-                "name": "SNCA",
-                "auction": snca,
-                "truthful_bidding": True,
-                "truthful_reporting": True,
-            },
-            {
-                "name": "VCG",
-                "auction": vcg,
-                "truthful_bidding": True,
-                "truthful_reporting": True,
-            }
-            
-        ]
+        # auctions used by this instance: the ones registered when it is created (see register)
+        self.__auctions = list(self.__registry)
         
-        self.__cache = dict() # {S1: {spam}, ...}
-        self.__spam = set() # {node, ...}
+        self.__cache = cache if cache is not None else ReachableCache() # {S1: {spam}, ...}
+        self.__spam = set() # supports "node in self.__spam"
+        self.__component = None # {node: label of its connected component, ...}
+        self.__members = None # {label: [node, ...], ...}
+        self.__nodes = None # [node, ...], the nodes of G drawn by __choose_S
+        self.__profiler = profiler
 
     #MOCK-UP IMPLEMENTATION: It assigns the item to the first k bidders and assigns payment 0 to every node
     def __mock_auction(k, seller_net, reports, bids):
@@ -54,39 +93,123 @@ class SocNetMec:
                 allocation[i] = False
             payment[i] = 0
             
+    def __build_component_index(self):
+        # G is undirected, hence a node is reachable from a seller if and only if it is in the same connected component.
+        # Components are computed once with a BFS (or with scipy, if G is a CSRGraph),
+        # and they are kept up to date by add_edge.
+        if hasattr(self.G, "component_labels"):
+            self.__component = self.G.component_labels().tolist()
+            self.__members = dict()
+            for node, label in enumerate(self.__component):
+                self.__members.setdefault(label, []).append(node)
+            return
+
+        self.__component = dict()
+        self.__members = dict()
+        for s in self.G.nodes():
+            if s in self.__component:
+                continue
+            self.__component[s] = s
+            members = [s]
+            queue = deque([s])
+            while queue:
+                node = queue.popleft()
+                for w in self.G[node]:
+                    if w not in self.__component:
+                        self.__component[w] = s
+                        members.append(w)
+                        queue.append(w)
+            self.__members[s] = members
+
+    def add_edge(self, u, v):
+        # Adds the edge (u, v) to G and merges the components of u and v (the smaller one is relabeled)
+        self.G.add_edge(u, v)
+        self.__nodes = None
+        if self.__component is None:
+            return
+        for w in (u, v):
+            if w not in self.__component:
+                self.__component[w] = w
+                self.__members[w] = [w]
+        cu, cv = self.__component[u], self.__component[v]
+        if cu == cv:
+            return
+        if len(self.__members[cu]) < len(self.__members[cv]):
+            cu, cv = cv, cu
+        for w in self.__members[cv]:
+            self.__component[w] = cu
+        self.__members[cu].extend(self.__members.pop(cv))
+        self.__cache.clear()
+
+    def graph_changed(self):
+        # To be called when G is modified without add_edge: the component index is rebuilt at the next step
+        self.__component = None
+        self.__members = None
+        self.__nodes = None
+        self.__cache.clear()
+
     def __find_reachable_nodes(self, S):
-        
-        if frozenset(S) in self.__cache:
-            self.__spam = self.__cache[frozenset(S)]
+
+        if self.__component is None:
+            self.__build_component_index()
+
+        spam = self.__cache.get(S, self.__component)
+        if spam is not None:
+            self.__spam = spam
             return
-        
-        self.__spam = set()
-        visited = dict()
+
+        # A node is reachable from two sellers if and only if its component contains at least two sellers
+        sellers = dict()
         for s in S:
-            visited[s] = set()
-            # make a bfs from s
-            queue = [s]
-            while queue:
-                node = queue.pop(0)
-                if node not in visited[s]:
-                    visited[s].add(node)
-                    queue.extend(self.G[node])
-                other = [i for i in S if i != s]
-                for o in other:
-                    if o in visited.keys() and node in visited[o]:
-                        self.__spam.add(node)
-                        break
-                    
-        if frozenset(S) not in self.__cache:
-            self.__cache[frozenset(S)] = self.__spam
+            label = self.__component[s]
+            sellers[label] = sellers.get(label, 0) + 1
+        labels = [label for label, count in sellers.items() if count > 1]
+
+        self.__spam = self.__cache.put(S, labels, self.__component, self.__members, self.G.number_of_nodes())
+
+    def set_profiler(self, profiler):
+        self.__profiler = profiler
+
+    def cache_stats(self):
+        return self.__cache.stats()
+
+    def __fingerprint(self):
+        # Entries refer to the component labels, that depend on the graph and on how the index was built
+        # (scipy for a CSRGraph, a BFS otherwise): the fingerprint is a hash of the labels, with the storage and the backend
+        if self.__component is None:
+            self.__build_component_index()
+        if isinstance(self.__component, dict):
+            labels = pickle.dumps(list(self.__component.items()))
+        else:
+            labels = np.asarray(self.__component, dtype=np.int64).tobytes()
+        return (hashlib.sha256(labels).hexdigest(), getattr(self.__cache, "storage", None), type(self.G).__name__)
+
+    def save_cache(self, path):
+        # The cache is saved together with the fingerprint of the component index, so that it is not loaded for another one
+        self.__cache.save(path, self.__fingerprint())
+
+    def load_cache(self, path):
+        return self.__cache.load(path, self.__fingerprint())
 
     def __choose_S(self):
         # returns a subsets S of G's nodes according to some criteria
+        # The list of the nodes is built once (and again only when G changes), not at each draw
+        if self.__nodes is None:
+            self.__nodes = list(self.G.nodes())
         S = set()
         while len(S) < 5:
-            S.add(random.choice(list(self.G.nodes())))
+            S.add(self.__rng.choice(self.__nodes))
         
-        self.__find_reachable_nodes(S)
+        profiler = self.__profiler
+        if profiler is None:
+            self.__find_reachable_nodes(S)
+        else:
+            hits, misses = getattr(self.__cache, "hits", 0), getattr(self.__cache, "misses", 0)
+            start = time.perf_counter()
+            self.__find_reachable_nodes(S)
+            profiler.add("reachable", time.perf_counter() - start)
+            profiler.count("cache_hits", getattr(self.__cache, "hits", 0) - hits)
+            profiler.count("cache_misses", getattr(self.__cache, "misses", 0) - misses)
         
         return S
     
@@ -96,91 +219,109 @@ class SocNetMec:
     def __init(self, t):
         return self.__choose_S(), self.__choose_auction()
 
-    def __invite(self, t, u, v, auction, prob, val):
-        if prob(u, v, t):
-            bid_v = val(t, v)
-            S_v = set(self.G[v]).difference(self.__spam).difference(self.__S)
-            if not auction["truthful_bidding"]:
-                bid_v = random.randint(0.5*bid_v, bid_v)
-            if not auction["truthful_reporting"]:
-                S_v = {w for w in S_v if random.random() <= 0.2}
-            return bid_v, S_v
-        else:
-            return False
+    # rng = random generator used in step t (the module random if None); simulation.py gives each step its own generator
+    # compare = if True, every auction of this instance is run on the same diffusion, and run returns {name: revenue, ...}
+    def run(self, t, prob, val, rng=None, compare=False):
         
-    def __build_reports_and_bids(self, bids, reports, S, t, u, auction, prob, val, visited=None):
+        profiler = self.__profiler
+        prob, val, auction, auctions, begin = self.__begin(t, prob, val, rng, compare)
+
+        revenue = {a["name"]: 0 for a in auctions}
         
-        if visited is None:
-            visited = set()
+        for s in self.__S:
 
-        if len(S) == 0 or u in visited:
-            return reports, bids
+            # Invitations are sent wave by wave and then bids and reports are built as by a depth-first visit (see diffusion.py).
+            # The oracles are asked once per seller.
+            start = time.perf_counter() if profiler is not None else None
+            cand, live, values, depth = explore(self.G, s, self.__S, self.__spam, t, prob, val)
+            if profiler is not None:
+                self.__explored(profiler, time.perf_counter() - start, live, depth)
+            self.__sell(s, cand, live, values, auctions, compare, revenue)
+            
+        if profiler is not None:
+            profiler.add("step", time.perf_counter() - begin)
+        return revenue if compare else revenue[auction["name"]]
+
+    # Same as run, for oracles whose method batch is a coroutine (e.g., the clients of a remote service, see async_oracles.py).
+    # The explorations of all the sellers run concurrently, each one asking the invitations of a wave at once;
+    # bids, reports and auctions then follow in the same order as in run, hence deterministic oracles give the same revenue.
+    async def run_async(self, t, prob, val, rng=None, compare=False):
         
-        visited.add(u)
+        profiler = self.__profiler
+        prob, val, auction, auctions, begin = self.__begin(t, prob, val, rng, compare)
+
+        revenue = {a["name"]: 0 for a in auctions}
         
-        for v in S.copy():
-            
-            if v in visited or v in self.__S:
-                continue
-            
-            res = self.__invite(t, u, v, auction, prob, val)
-            
-            if type(res) == bool:
-                reports[u].remove(v)
-                continue
-            
-            bid_v, S_v = res
-            
-            bids[v] = bid_v
-            reports[v] = S_v
-            
-            reports, bids = self.__build_reports_and_bids(bids, reports, S_v, t, v, auction, prob, val, visited)
+        sellers = list(self.__S)
+        start = time.perf_counter() if profiler is not None else None
+        explored = await asyncio.gather(*(explore_async(self.G, s, self.__S, self.__spam, t, prob, val) for s in sellers))
+        if profiler is not None:
+            # The explorations overlap, hence their time is recorded once, for all of them
+            profiler.add("explore", time.perf_counter() - start)
+            for cand, live, values, depth in explored:
+                self.__explored(profiler, None, live, depth)
+        for s, (cand, live, values, depth) in zip(sellers, explored):
+            self.__sell(s, cand, live, values, auctions, compare, revenue)
             
-        return reports, bids
-        
-    def run(self, t, prob, val):
+        if profiler is not None:
+            profiler.add("step", time.perf_counter() - begin)
+        return revenue if compare else revenue[auction["name"]]
+
+    def __begin(self, t, prob, val, rng, compare):
+        # Start of run and run_async: returns the oracles, the auction of the step, the auctions to run and the start time.
+        # With a profiler, the record of step t is started and the oracles are wrapped so that their calls are timed.
+        profiler = self.__profiler
+        begin = None
+        if profiler is not None:
+            begin = time.perf_counter()
+            profiler.begin(t)
+            prob, val = profiler.wrap(prob, "prob"), profiler.wrap(val, "val")
         
+        self.__rng = rng if rng is not None else random
         self.__S, auction = self.__init(t)
+        auctions = self.__auctions if compare else [auction]
+        
+        if profiler is not None:
+            profiler.add("choose_S", time.perf_counter() - begin)
+        return prob, val, auction, auctions, begin
+
+    def __explored(self, profiler, seconds, live, depth):
+        # Records the exploration of a seller (its time, unless None, and the counters of its invitations)
+        if seconds is not None:
+            profiler.add("explore", seconds)
+        profiler.count("invitations_sent", len(live))
+        profiler.count("invitations_accepted", sum(live.values()))
+        profiler.count("waves", depth)
+        profiler.maximum("max_depth", depth)
 
-        bids = dict()
-        reports = dict()
+    def __sell(self, s, cand, live, values, auctions, compare, revenue):
+        # Runs the auctions of seller s on the outcomes of its diffusion, adding their revenue to revenue.
+        # Bids and reports are built once for each kind of bidders (truthful or not)
+        # and every auction receives its own copy, since auctions may modify them.
+        profiler = self.__profiler
+        built = dict()
+        for a in auctions:
+            kind = (a["truthful_bidding"], a["truthful_reporting"])
+            if kind not in built:
+                start = time.perf_counter() if profiler is not None else None
+                built[kind] = replay(self.G, s, self.__S, self.__spam, cand, live, values, a, self.__rng)
+                if profiler is not None:
+                    profiler.add("replay", time.perf_counter() - start)
+            new_seller_net, reports, bids = built[kind]
+            if compare:
+                new_seller_net, reports, bids = set(new_seller_net), {u: set(S_u) for u, S_u in reports.items()}, dict(bids)
         
-        revenue = 0
+            if profiler is None:
+                allocation, payment = a["auction"](self.k, new_seller_net, reports, bids)
+            else:
+                profiler.count("auctions")
+                profiler.count("bidders", len(bids))
+                profiler.count("reported_edges", sum(len(S_u) for S_u in reports.values()))
+                profiler.count("seller_net", len(new_seller_net))
+                start = time.perf_counter()
+                allocation, payment = a["auction"](self.k, new_seller_net, reports, bids)
+                profiler.add("auction", time.perf_counter() - start)
         
-        for s in self.__S:
-
-            seller_net = self.G[s]
-            new_seller_net = set(seller_net)
-            
-            for neighbor in seller_net:
-                
-                if neighbor in self.__spam or neighbor in self.__S:
-                    new_seller_net.remove(neighbor)
-                    continue
-                
-                res = self.__invite(t, s, neighbor, auction, prob, val)
-                
-                if type(res) == bool:
-                    new_seller_net.remove(neighbor)
-                else:
-                    bid_v, S_v = res
-                    bids[neighbor] = bid_v
-                    reports[neighbor] = S_v
-            
-            report, bid = self.__build_reports_and_bids(bids, reports, new_seller_net, t, s, auction, prob, val)
-            
-            bids.update(bid)
-            reports.update(report)
-            
-            allocation, payment = auction["auction"](self.k, new_seller_net, reports, bids)
-            
             for all, pay in zip(allocation.values(), payment.values()):
                 if all:
-                    revenue += pay
-                    
-            bids.clear()
-            reports.clear()
-            
-        return revenue
-        
-        
+                    revenue[a["name"]] += pay
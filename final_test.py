@@ -1,54 +1,27 @@
 import networkx as nx
-import random
 from networks_gen import affiliationG 
 from final_mockup import SocNetMec
+from oracles import ValOracle, ProbOracle
 from tqdm import tqdm
 
-prob = dict()
-
-def input_data():
+def input_data(seed=0):
     n = 1000
     G = affiliationG(n, 5, 0.5, 1, 0.1, 3)
     print("Graph generated")
     k = 5 #To be updated
     T = 5000 #To be updated
 
-    #for the oracle val
-    val = dict()
-    for t in range(T):
-        val[t] = dict()
-        for u in G.nodes():
-            val[t][u] = random.randint(1, 50)
-    
-    #for the oracle prob
-    p = dict()
-    for u in G.nodes():
-        p[u] = dict()
-    for u in G.nodes():
-        for v in G[u]:
-            if v not in p[u]:
-                t=min(0.25, 10/max(G.degree(u), G.degree(v)))
-                p[u][v] = p[v][u] = random.uniform(0, t)
+    #the oracles compute val[t][u] and the outcome of each invitation on demand (see oracles.py),
+    #hence they take no memory and the same query always gets the same answer
+    val = ValOracle(seed, 1, 50)
+    prob = ProbOracle(G, seed)
             
-    return G, k, T, val, p
-
-def probf(u, v, t):
-    if (u, v, t) in prob.keys():
-        return prob[(u, v, t)]
-    r = random.random()
-    if r <= p[u][v]:
-        prob[(u, v, t)] = True
-        return True
-    prob[(u, v, t)] = False
-    return False
-
-def valf(t, u):
-    return val[t][u]
+    return G, k, T, val, prob
 
-G, k, T, val, p = input_data()
+G, k, T, val, prob = input_data()
 snm=SocNetMec(G, T, k)
 revenue = 0
 for step in tqdm(range(T)):
-    revenue += snm.run(step, probf, valf)
+    revenue += snm.run(step, prob, val)
 
-print(revenue)
\ No newline at end of file
+print(revenue)
@@ -0,0 +1,208 @@
+import os
+import numpy as np
+from csr_graph import CSRGraph
+
+# Binary graph format.
+# A file starts with a 64-byte header, followed by the arrays of the graph, stored one after the other:
+#   labels  int64[n]      original name of each node (only if the FLAG_LABELS bit is set, otherwise node u is named u)
+#   edges   int32[m, 2]   the edges (u, v) with u < v
+#   indptr  int32[n + 1]  CSR offsets (only if the FLAG_CSR bit is set; int64 if offset_bytes is 8)
+#   indices int32[2m]     CSR neighbors (only if the FLAG_CSR bit is set)
+# Arrays are read with np.memmap, so opening a graph costs nothing but the header,
+# pages are loaded lazily by the OS, and processes that open the same file share the same physical memory.
+
+MAGIC = b'SNAGRAPH'
+VERSION = 1
+FLAG_CSR = 1
+FLAG_LABELS = 2
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('flags', '<u4'),
+    ('n', '<u8'),
+    ('m', '<u8'),
+    ('offset_bytes', '<u4'),
+    ('reserved', 'S28'),
+])
+
+def _parse(text):
+    # Lines starting with '#' or '%' are comments; only the first two columns of each line are used
+    if b'#' in text or b'%' in text:
+        text = b'\n'.join(line for line in text.split(b'\n') if not line.lstrip().startswith((b'#', b'%')))
+    # The number of columns is the one of the first line that is not blank
+    first = text.lstrip().split(b'\n', 1)[0]
+    if not first:
+        return np.empty((0, 2), dtype=np.int64)
+    columns = len(first.split())
+    if columns > 2:
+        # The other columns (e.g., float weights or timestamps) are dropped before converting, whatever their type
+        text = b'\n'.join(b' '.join(line.split()[:2]) for line in text.split(b'\n') if line.strip())
+        columns = 2
+    values = np.fromstring(text, dtype=np.int64, sep=' ')
+    if len(values) % columns != 0:
+        raise ValueError("the edge list must have the same number of columns on each line")
+    return values.reshape(-1, columns)
+
+def read_edgelist(path, block=1 << 24):
+    "Returns the (m, 2) array of the edges in the text file path (one edge per line, nodes separated by whitespace)"
+
+    parts = [np.empty((0, 2), dtype=np.int64)]
+    rest = b''
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(block)
+            if not data:
+                break
+            data = rest + data
+            cut = data.rfind(b'\n') + 1
+            rest = data[cut:]
+            if cut > 0:
+                parts.append(_parse(data[:cut]))
+    if rest.strip():
+        parts.append(_parse(rest))
+    return np.concatenate(parts)
+
+def write_graph(path, edges, n=None, labels=None, csr=True):
+    "Writes the graph with the given (m, 2) array of edges in the binary format; returns the number of edges written"
+
+    graph = CSRGraph.from_edges(edges, n)
+    edges = graph.edges()
+    flags = (FLAG_CSR if csr else 0) | (FLAG_LABELS if labels is not None else 0)
+
+    header = np.zeros(1, dtype=HEADER)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['flags'] = flags
+    header['n'] = graph.number_of_nodes()
+    header['m'] = len(edges)
+    header['offset_bytes'] = graph.indptr.itemsize
+
+    with open(path, 'wb') as f:
+        f.write(header.tobytes())
+        if labels is not None:
+            f.write(np.asarray(labels, dtype=np.int64).tobytes())
+        f.write(edges.astype(np.int32).tobytes())
+        if csr:
+            f.write(graph.indptr.tobytes())
+            f.write(graph.indices.tobytes())
+
+    return len(edges)
+
+def convert_edgelist(src, dst, csr=True):
+    "Converts the text edge list src into the binary file dst; node names are relabeled as 0, ..., n-1 if needed"
+
+    edges = read_edgelist(src)
+    labels, edges = np.unique(edges, return_inverse=True)
+    edges = edges.reshape(-1, 2)
+    n = len(labels)
+    if n > 0 and labels[0] == 0 and labels[-1] == n - 1:
+        labels = None
+    return write_graph(dst, edges, n, labels, csr)
+
+def _sections(path):
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC:
+        raise ValueError("%s is not a binary graph file" % path)
+    if header['version'][0] != VERSION:
+        raise ValueError("unsupported version %d of the binary graph format" % header['version'][0])
+    flags, n, m = int(header['flags'][0]), int(header['n'][0]), int(header['m'][0])
+    offset_type = np.int64 if header['offset_bytes'][0] == 8 else np.int32
+
+    layout = []
+    if flags & FLAG_LABELS:
+        layout.append(('labels', np.int64, (n,)))
+    layout.append(('edges', np.int32, (m, 2)))
+    if flags & FLAG_CSR:
+        layout.append(('indptr', offset_type, (n + 1,)))
+        layout.append(('indices', np.int32, (2 * m,)))
+
+    sections = dict()
+    offset = HEADER.itemsize
+    for name, dtype, shape in layout:
+        size = int(np.prod(shape))
+        # np.memmap cannot map an empty array
+        sections[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape) if size > 0 else np.empty(shape, dtype=dtype)
+        offset += size * np.dtype(dtype).itemsize
+    return n, m, sections
+
+def is_binary_graph(path):
+    "Returns True if path is a file in the binary graph format"
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def graph_info(path):
+    "Returns the number of nodes, the number of edges and the (memory-mapped) labels, or None, of the graph in the binary file path"
+    n, m, sections = _sections(path)
+    return n, m, sections.get('labels')
+
+def load_edges(path):
+    "Returns the memory-mapped (m, 2) array of the edges stored in the binary file path"
+    return _sections(path)[2]['edges']
+
+def load_graph(path):
+    "Returns the CSRGraph stored in the binary file path; its arrays are memory-mapped, not copied"
+
+    n, m, sections = _sections(path)
+    labels = sections.get('labels')
+    if 'indptr' in sections:
+        return CSRGraph(sections['indptr'], sections['indices'], labels)
+    return CSRGraph.from_edges(sections['edges'], n, labels)
+
+def iter_edge_chunks(source, chunk=1 << 20):
+    "Yields the edges of source as (k, 2) arrays with at most chunk rows each"
+
+    # source = CSRGraph (each edge once, as u < v), binary graph file, text edge list, (m, 2) array or networkx graph.
+    # Files are read piece by piece and CSRGraphs are scanned by blocks of rows, so that the whole
+    # edge list is never in memory: this is what streaming algorithms (e.g., HyperANF in analyze.py) rely on.
+    if isinstance(source, CSRGraph):
+        n = source.number_of_nodes()
+        ends = np.asarray(source.indptr[1:], dtype=np.int64)
+        start = 0
+        while start < n:
+            stop = max(start + 1, int(np.searchsorted(ends, int(source.indptr[start]) + 2 * chunk, side='right')))
+            stop = min(stop, n)
+            src = np.repeat(np.arange(start, stop, dtype=np.int64), source.degrees[start:stop])
+            dst = np.asarray(source.indices[source.indptr[start]:source.indptr[stop]], dtype=np.int64)
+            mask = src < dst
+            if mask.any():
+                yield np.stack((src[mask], dst[mask]), axis=1)
+            start = stop
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        if is_binary_graph(source):
+            edges = load_edges(source)
+            for start in range(0, len(edges), chunk):
+                yield np.asarray(edges[start:start + chunk], dtype=np.int64)
+        else:
+            # Lines have at least 4 bytes, hence a block of 4 * chunk bytes has at most chunk edges
+            rest = b''
+            with open(source, 'rb') as f:
+                while True:
+                    data = f.read(4 * chunk)
+                    if not data:
+                        break
+                    data = rest + data
+                    cut = data.rfind(b'\n') + 1
+                    rest = data[cut:]
+                    if cut > 0:
+                        yield _parse(data[:cut])
+            if rest.strip():
+                yield _parse(rest)
+        return
+
+    if hasattr(source, "edges") and not isinstance(source, np.ndarray):
+        edges = np.array(list(source.edges()), dtype=np.int64).reshape(-1, 2)
+    else:
+        edges = np.asarray(source, dtype=np.int64).reshape(-1, 2)
+    for start in range(0, len(edges), chunk):
+        yield edges[start:start + chunk]
+
+def open_graph(path, binary=None):
+    "Returns the graph in the text edge list path, converting it to the binary file binary (path + '.bin' by default) the first time"
+
+    if binary is None:
+        binary = path + '.bin'
+    if not os.path.exists(binary) or os.path.getmtime(binary) < os.path.getmtime(path):
+        convert_edgelist(path, binary)
+    return load_graph(binary)
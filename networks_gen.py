@@ -1,68 +1,164 @@
 #!/usr/bin/python
 
 import networkx as nx
-import random
 from scipy.special import zeta
+from scipy.spatial import cKDTree
 import math
 import numpy
 
-#Random Graph (Newman, chap. 12)
-#n = number of nodes
-#p = probability of inserting an edge
-def randomG(n, p):
+# Helpers shared by the generators below.
+# Every generator builds its edges as an (m, 2) numpy array and only at the end, if requested,
+# turns them into a networkx graph: this keeps the generation itself O(n + m) in time and memory.
+def _rng(seed):
+    return numpy.random.default_rng(seed)
+
+def _to_graph(n, edges):
     G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(edges.tolist())
+    return G
 
-    for i in range(n):
-        G.add_node(i)
-        for j in range (i+1,n):
-            r=random.random()
-            if r <= p:
-                G.add_edge(i,j)
+# It maps the indices k of the pairs (i, j), with j < i, enumerated as
+# (1,0), (2,0), (2,1), (3,0), ... to the pairs themselves.
+# The pair (i, j) has index k = i*(i-1)/2 + j, hence i is the largest integer such that i*(i-1)/2 <= k.
+# The square root is computed in floating point, so the result is fixed by (at most) one step in each direction.
+def _pair_from_index(k):
+    i = ((1 + numpy.sqrt(1 + 8 * k.astype(numpy.float64))) / 2).astype(numpy.int64)
+    i -= (i * (i - 1) // 2 > k)
+    i += ((i + 1) * i // 2 <= k)
+    j = k - i * (i - 1) // 2
+    return i, j
 
-    return G
+# It returns the pairs (i, j) with 0 <= j < i < n that are selected, each independently with probability p.
+# Instead of flipping a coin for each of the n(n-1)/2 pairs, we jump directly from a selected pair to the next one:
+# the number of pairs to skip is a geometric random variable of parameter p (Batagelj & Brandes, 2005).
+# Skips are drawn in batches of numpy arrays and accumulated with cumsum, so the cost is O(n + m).
+def _gnp_pairs(n, p, rng):
+    total = n * (n - 1) // 2
+    if p <= 0 or total == 0:
+        return numpy.empty((0, 2), dtype=numpy.int64)
+    if p >= 1:
+        return numpy.stack(_pair_from_index(numpy.arange(total, dtype=numpy.int64)), axis=1)
+
+    batch = int(min(max(1.1 * p * total + 1024, 1024), 1 << 22))
+    chunks = []
+    last = -1 #Index of the last selected pair
+    while True:
+        positions = last + numpy.cumsum(rng.geometric(p, size=batch))
+        positions = positions[positions < total]
+        chunks.append(positions)
+        if len(positions) < batch:
+            break
+        last = positions[-1]
+    k = numpy.concatenate(chunks)
+
+    return numpy.stack(_pair_from_index(k), axis=1)
+
+#Random Graph (Newman, chap. 12)
+#n = number of nodes
+#p = probability of inserting an edge
+#seed = seed of the random generator (runs with the same seed return the same graph)
+#as_edges = if True, the (m, 2) array of edges is returned instead of a networkx graph
+def randomG(n, p, seed=None, as_edges=False):
+    edges = _gnp_pairs(n, p, _rng(seed))
+    if as_edges:
+        return edges
+    return _to_graph(n, edges)
 #Low clustering coefficient
 #If p > 1/n-1, there is high probability that there will be a giant component
 #The expected diameter is ln n
 
+# It returns the edges without self-loops and without repeated edges (in either orientation).
+# Edges are returned as pairs (i, j) with j < i, as in randomG.
+def _simple_edges(edges, n):
+    u = numpy.maximum(edges[:, 0], edges[:, 1]).astype(numpy.int64)
+    v = numpy.minimum(edges[:, 0], edges[:, 1]).astype(numpy.int64)
+    keep = u != v
+    keys = numpy.sort(u[keep] * n + v[keep])
+    keys = keys[numpy.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) > 0 else keys
+    return numpy.stack((keys // n, keys % n), axis=1)
+
+# It returns the indices of the edges that are self-loops or copies of an edge appearing before them.
+def _bad_edges(edges, n):
+    u = numpy.maximum(edges[:, 0], edges[:, 1]).astype(numpy.int64)
+    v = numpy.minimum(edges[:, 0], edges[:, 1]).astype(numpy.int64)
+    keys = u * n + v
+    order = numpy.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    bad = u == v
+    bad[order[1:]] |= sorted_keys[1:] == sorted_keys[:-1]
+    return numpy.flatnonzero(bad)
+
 #Configuration Model (Newman, chap. 13)
 #Random Graph with a given degree sequence deg.
 #We assume that deg is a valid degree sequence (i.e., the sum of degrees is even) and that no node has degree 0.
-def configurationG(deg):
-    G = nx.Graph()
+#If the sum is odd, the last stub is dropped.
+#seed = seed of the random generator
+#mode = how self-loops and multi-edges are handled: "erase" removes them, "rewire" first tries to remove them with degree-preserving swaps
+#max_swaps = maximum number of swaps tried in "rewire" mode (by default, ten times the number of bad edges)
+#as_edges = if True, the (m, 2) array of edges is returned instead of a networkx graph
+#report = if True, it also returns a dict measuring how far the degrees of the result are from deg
+def configurationG(deg, seed=None, mode="erase", max_swaps=None, as_edges=False, report=False):
+    if mode not in ("erase", "rewire"):
+        raise ValueError("mode must be 'erase' or 'rewire'")
+    rng = _rng(seed)
+    deg = numpy.asarray(deg, dtype=numpy.int64)
+    n = len(deg)
+
+    # Each node u has deg[u] stubs (half-edges). A random perfect matching of the stubs is obtained
+    # by shuffling the array of stubs and pairing consecutive positions: this costs O(m).
+    stubs = numpy.repeat(numpy.arange(n, dtype=numpy.int64), deg)
+    rng.shuffle(stubs)
+    stubs = stubs[:len(stubs) - len(stubs) % 2]
+    edges = stubs.reshape(-1, 2)
+
+    # The matching may contain self-loops and multi-edges, that are not allowed in a simple graph.
+    # In "rewire" mode, each bad edge (a, b) is swapped with a random good edge (c, d),
+    # i.e., they are replaced by (a, c), (b, d) or by (a, d), (b, c): this does not change the degree of any node.
+    # Swaps are done in rounds, all bad edges of a round being swapped at the same time with distinct partners.
+    # Swaps can create new bad edges, hence the process is repeated until no bad edge remains
+    # or the number of swaps tried is above max_swaps.
+    swaps = 0
+    if mode == "rewire" and len(edges) > 1:
+        bad = _bad_edges(edges, n)
+        if max_swaps is None:
+            max_swaps = 10 * len(bad)
+        while len(bad) > 0 and swaps < max_swaps:
+            bad = bad[:max_swaps - swaps]
+            swaps += len(bad)
+            partner = rng.integers(0, len(edges), size=len(bad))
+            # A partner must not be a bad edge, and must not be chosen by two bad edges
+            used = numpy.zeros(len(edges), dtype=bool)
+            used[bad] = True
+            _, first = numpy.unique(partner, return_index=True)
+            first = first[~used[partner[first]]]
+            bad, partner = bad[first], partner[first]
 
-    nodes=list(range(len(deg))) # It contains all nodes for which there is at least another neighbor to add
-
-    # There may be some cases in which the procedure is unable to emulate the degree sequence in input:
-    # (i) when the procedure leaves only one node whose degree does not match the required degree
-    # (e.g., consider an input degree sequence deg=[3,1,1,1] and the procedure added edges (0,1) and (2,3));
-    # (ii) when there is an edge between each pairs of nodes whose degree does not match the required degree
-    # (e.g., consider an input degree sequence deg=[2,2,1,1] and the procedure added edges (0,1) and (2,3)).
-    # In order to avoid the first case we stop to insert edges when there is a single node with a non-matching degree.
-    # In order to avoid the second case, we stop to insert edges when the number of probes for a new edge to add
-    # is above a given threshold (we below assume a threshold of n^2, but lower threshold can be set).
-    # Note that, in both cases, the degree sequence of the resulting graph may not be exactly the same
+            a, b = edges[bad, 0].copy(), edges[bad, 1].copy()
+            c, d = edges[partner, 0].copy(), edges[partner, 1].copy()
+            flip = rng.random(len(bad)) < 0.5
+            c, d = numpy.where(flip, d, c), numpy.where(flip, c, d)
+            edges[bad, 0], edges[bad, 1] = a, c
+            edges[partner, 0], edges[partner, 1] = b, d
+            bad = _bad_edges(edges, n)
+
+    # Remaining self-loops and multi-edges are erased.
+    # Note that, in this case, the degree sequence of the resulting graph may not be exactly the same
     # as the one in input. However, few "outliers" do not alter the degree sequence distribution.
-    threshold = len(nodes)**2
-    while len(nodes) > 1:
-        done = False
-        tries = 1
-        while not done:
-            edge=random.sample(nodes, 2)
-            if not G.has_edge(edge[0], edge[1]):
-                done = True
-                G.add_edge(edge[0], edge[1])
-                deg[edge[0]] -=1
-                if deg[edge[0]] == 0:
-                    nodes.remove(edge[0])
-                deg[edge[1]] -=1
-                if deg[edge[1]] == 0:
-                    nodes.remove(edge[1])
-            else:
-                tries +=1
-                if tries > threshold:
-                    done = True
+    edges = _simple_edges(edges, n)
 
-    return G
+    result = edges if as_edges else _to_graph(n, edges)
+    if not report:
+        return result
+    diff = numpy.abs(deg - numpy.bincount(edges.ravel(), minlength=n))
+    stats = {
+        "missing_edges": int(deg.sum() // 2 - len(edges)), #Number of edges lost w.r.t. the input sequence
+        "l1": int(diff.sum()), #Sum over all nodes of |deg[u] - degree of u in the result|
+        "max": int(diff.max()) if n > 0 else 0, #Largest deviation of a single node
+        "nodes": int(numpy.count_nonzero(diff)), #Number of nodes whose degree is not the required one
+        "swaps": swaps, #Number of swaps tried in "rewire" mode
+    }
+    return result, stats
 #Most of the properties depends on the degree distribution: fraction p_k of vertices with degree k
 #Usually, clustering coefficient is low. However, it becomes larger when the degree distribution is a power law
 #Usually, configuration graph have a giant component.
@@ -105,6 +201,68 @@ def power_law_degree(n,power):
 
     return deg_list
 
+# Engine shared by the preferential attachment generators below.
+# Nodes come one at the time and each node u creates k edges.
+# Each edge goes, with probability p, to a node chosen with a probability proportional to its degree,
+# with the remaining probability, to a node chosen uniformly at random among the nodes different from u.
+# Moreover, after each preferential edge (u, v), with probability triad u also links to a random neighbor of v.
+#
+# Endpoints are kept in a preallocated array buf: the i-th edge is (buf[2i], buf[2i+1]),
+# hence each node appears in buf as many times as its degree and a uniformly random position of buf
+# gives a node chosen proportionally to its degree. Moreover, if the position is j,
+# then buf[j ^ 1] is the other endpoint of the same edge, i.e., a random neighbor of that node.
+# Random numbers are drawn in batches of numpy arrays, and nodes chosen uniformly at random are sampled
+# by rejection (a new draw is made if the node is u or it has been already chosen by u) instead of building lists.
+def _preferential_edges(n, p, k, triad, rng, batch=1 << 16):
+    k = min(k, n - 1)
+    if k <= 0:
+        return numpy.empty((0, 2), dtype=numpy.int64)
+    buf = numpy.empty(2 * n * k * (2 if triad > 0 else 1), dtype=numpy.int64)
+    fill = 0 #Number of positions of buf already used
+
+    for start in range(0, n, batch):
+        stop = min(start + batch, n)
+        size = (stop - start) * k
+        coins = rng.random(size).tolist()
+        slots = rng.random(size).tolist()
+        uniform = rng.integers(0, n, size=size).tolist()
+        triads = rng.random(size).tolist() if triad > 0 else None
+        i = 0
+        for u in range(start, stop):
+            chosen = []
+            for _ in range(k):
+                v = -1
+                if coins[i] <= p and fill > 0: #For the first node preferential attachment cannot be executed
+                    j = int(slots[i] * fill)
+                    v = int(buf[j])
+                    tries = 0
+                    while (v == u or v in chosen) and tries < 32:
+                        j = int(rng.random() * fill)
+                        v = int(buf[j])
+                        tries += 1
+                    if v == u or v in chosen: #u is (almost) the only node with positive degree: fall back to a uniform choice
+                        v = -1
+                if v < 0:
+                    v = uniform[i]
+                    while v == u or v in chosen:
+                        v = int(rng.integers(0, n))
+                    j = -1
+                chosen.append(v)
+                buf[fill] = u
+                buf[fill + 1] = v
+                fill += 2
+                if triad > 0 and j >= 0 and triads[i] <= triad:
+                    w = int(buf[j ^ 1])
+                    if w != u and w not in chosen:
+                        chosen.append(w)
+                        buf[fill] = u
+                        buf[fill + 1] = w
+                        fill += 2
+                i += 1
+
+    # Two nodes can choose each other, hence repeated edges are removed
+    return _simple_edges(buf[:fill].reshape(-1, 2), n)
+
 #Preferential Attachment (EK 18)
 #n=nodes
 #p=probability
@@ -112,33 +270,170 @@ def power_law_degree(n,power):
 #With probability p, they will choose their neighbor with a probability proportional to their degree
 #(nodes with higher degree are chosen with larger probability),
 #with the remaining probability, a neighbor is chosen uniformly at random.
-def preferentialG(n,p):
-    G = nx.Graph()
-    nodes = [] #Keep as many copies of a node as the degree of that node
-
-    for u in range(n):
-        r = random.random()
-        if r <= p and len(nodes) > 0: #For the first node preferential attachment cannot be executed
-            v = random.choice(nodes) #v is chosen with a probability proportional to its degree
-            G.add_edge(u, v)
-            nodes.append(u)
-            nodes.append(v)
+#seed = seed of the random generator
+#as_edges = if True, the (m, 2) array of edges is returned instead of a networkx graph
+def preferentialG(n, p, seed=None, as_edges=False):
+    edges = _preferential_edges(n, p, 1, 0, _rng(seed))
+    if as_edges:
+        return edges
+    return _to_graph(n, edges)
+
+#Preferential Attachment with multiple edges
+#As preferentialG, but each node that comes chooses k distinct neighbors,
+#each of them with probability p proportionally to the degree and with the remaining probability uniformly at random.
+def multiPreferentialG(n, p, k, seed=None, as_edges=False):
+    edges = _preferential_edges(n, p, k, 0, _rng(seed))
+    if as_edges:
+        return edges
+    return _to_graph(n, edges)
+
+#Preferential Attachment with triad formation (Holme & Kim, 2002)
+#Each node that comes chooses a neighbor v with a probability proportional to its degree,
+#and with probability p it also links to a random neighbor of v, closing a triangle.
+#Since the neighbor of v is reached through a random edge, it is itself chosen proportionally to its degree:
+#the degree distribution is still a power law, but the clustering coefficient is much larger than in preferentialG.
+def degreePreferentialG(n, p, seed=None, as_edges=False):
+    edges = _preferential_edges(n, 1, 1, p, _rng(seed))
+    if as_edges:
+        return edges
+    return _to_graph(n, edges)
+
+# It returns the Morton (Z-order) code of the cells (a, b) of a 2^bits x 2^bits grid, i.e., the bits of a and b interleaved.
+# In Z-order, the cells of the grid at level l contained in a cell of the grid at level l-1 are contiguous:
+# hence, once nodes are sorted by the code of their cell at the finest level,
+# the nodes in any cell at any level are a contiguous range of the sorted array.
+# spread[x] is x with a zero bit inserted between any two consecutive bits.
+def _spread_table(bits):
+    x = numpy.arange(1 << bits, dtype=numpy.int64)
+    spread = numpy.zeros_like(x)
+    for s in range(bits):
+        spread |= ((x >> s) & 1) << (2 * s)
+    return spread
+
+# It returns 1/dist**q given the squared distances d2
+def _kernel(d2, q):
+    if q == 0:
+        return numpy.ones_like(d2)
+    return numpy.power(numpy.maximum(d2, 1e-24), -q / 2)
+
+# It returns k weak ties for each node, i.e., for each node i, k nodes j != i chosen (with repetitions)
+# with probability proportional to 1/dist(i,j)**q.
+#
+# The unit square is recursively divided in cells as a quadtree with L levels. For each node i,
+# the other nodes are partitioned in (a) the nodes in the 3x3 cells around the cell of i at the finest level,
+# and (b) for each level l, the nodes in the (at most 27) cells of level l that are not adjacent to the cell of i,
+# but whose parent is adjacent to the parent of the cell of i (the "interaction list" of fast multipole methods).
+# The nodes in (a) are few, and their probability is computed exactly.
+# For each cell in (b), we use as weight the number of nodes in it times 1/dmin**q,
+# where dmin is the minimum distance between i and the cell: this is an upper bound on the real weight of the cell.
+# A sample is then drawn according to these weights: if it is a cell in (b), a node j in the cell is chosen
+# uniformly at random and it is accepted with probability (dmin/dist(i,j))**q, otherwise the sample is drawn again.
+# The result follows exactly the distribution 1/dist(i,j)**q, and each node only looks at O(log n) cells.
+# All nodes of a block are processed at the same time with numpy arrays, hence memory stays O(n + m).
+def _kernel_ties(pts, k, q, rng, block=2048):
+    n = len(pts)
+    if n < 2 or k <= 0:
+        return numpy.empty((0, 2), dtype=numpy.int64)
+
+    L = max(0, min(20, int(math.log(n / 2, 4)))) if n > 2 else 0
+    g = 1 << L
+    spread = _spread_table(L)
+    cells = numpy.minimum((pts * g).astype(numpy.int64), g - 1)
+    codes = (spread[cells[:, 0]] << 1) | spread[cells[:, 1]]
+    order = numpy.argsort(codes, kind='stable')
+    codes, pts, cells = codes[order], pts[order], cells[order]
+    # starts[l][c] is the first sorted position of a node in the cell with code c at level l
+    starts = [numpy.searchsorted(codes, numpy.arange((1 << (2 * l)) + 1, dtype=numpy.int64) << (2 * (L - l))) for l in range(L + 1)]
+    occ = int(numpy.diff(starts[L]).max()) #Maximum number of nodes in a cell at the finest level
+
+    near_off = numpy.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+    far_off = numpy.array([(dx, dy) for dx in range(6) for dy in range(6)])
+
+    sources = []
+    targets = []
+    for s in range(0, n, block):
+        e = min(s + block, n)
+        B = e - s
+        P = pts[s:e]
+        cx, cy = cells[s:e, 0], cells[s:e, 1]
+
+        # (a) nodes in the 3x3 cells around the cell of each node: their sorted positions, or -1 for padding
+        a = cx[:, None] + near_off[:, 0]
+        b = cy[:, None] + near_off[:, 1]
+        inside = (a >= 0) & (a < g) & (b >= 0) & (b < g)
+        code = (spread[numpy.clip(a, 0, g - 1)] << 1) | spread[numpy.clip(b, 0, g - 1)]
+        st = starts[L][code]
+        en = numpy.where(inside, starts[L][code + 1], st)
+        near = st[:, :, None] + numpy.arange(occ)
+        near = numpy.where(near < en[:, :, None], near, -1).reshape(B, -1)
+        j = numpy.maximum(near, 0)
+        d = (P[:, 0, None] - pts[j, 0]) ** 2 + (P[:, 1, None] - pts[j, 1]) ** 2
+        valid = (near >= 0) & (near != numpy.arange(s, e)[:, None])
+        w_near = numpy.where(valid, _kernel(d, q), 0)
+
+        # (b) the interaction lists at each level: range of sorted positions of each cell and distance bound
+        f_start, f_count, f_dmin = [], [], []
+        for level in range(1, L + 1):
+            shift = L - level
+            size = 1.0 / (1 << level)
+            ca, cb = cx >> shift, cy >> shift
+            a = ((ca >> 1) * 2 - 2)[:, None] + far_off[:, 0]
+            b = ((cb >> 1) * 2 - 2)[:, None] + far_off[:, 1]
+            valid = (a >= 0) & (a < (1 << level)) & (b >= 0) & (b < (1 << level))
+            valid &= (numpy.abs(a - ca[:, None]) > 1) | (numpy.abs(b - cb[:, None]) > 1)
+            code = (spread[numpy.where(valid, a, 0)] << 1) | spread[numpy.where(valid, b, 0)]
+            st = starts[level][code]
+            en = starts[level][code + 1]
+            dx = a * size - P[:, 0, None]
+            dx = numpy.maximum(numpy.maximum(dx, -dx - size), 0)
+            dy = b * size - P[:, 1, None]
+            dy = numpy.maximum(numpy.maximum(dy, -dy - size), 0)
+            f_start.append(st)
+            f_count.append(numpy.where(valid, en - st, 0))
+            f_dmin.append(dx * dx + dy * dy) #Squared distance, powers are taken on q/2
+        if L > 0:
+            f_start, f_count, f_dmin = numpy.hstack(f_start), numpy.hstack(f_count), numpy.hstack(f_dmin)
+            w_far = f_count * _kernel(f_dmin, q)
+            W = numpy.hstack((w_near, w_far))
         else:
-            v = random.choice([x for x in range(n) if x != u]) #any node different from u with the same probability
-            G.add_edge(u, v)
-            nodes.append(u)
-            nodes.append(v)
+            # A single cell: every node is near, the interaction lists are empty
+            f_start = f_count = numpy.zeros((B, 0), dtype=numpy.int64)
+            f_dmin = numpy.zeros((B, 0))
+            W = w_near
 
-    return G
+        # Samples are drawn for all the rows at once: cumulative weights of each row are normalized in [0, 1]
+        # and shifted by the index of the row, so that a single searchsorted over the flattened array is enough
+        nnear = w_near.shape[1]
+        ncol = W.shape[1]
+        cum = numpy.cumsum(W, axis=1)
+        tot = cum[:, -1]
+        cum = cum / numpy.where(tot > 0, tot, 1)[:, None] + numpy.arange(B)[:, None]
+        flat = cum.ravel()
+
+        rows = numpy.repeat(numpy.arange(B)[tot > 0], k)
+        out = numpy.empty(len(rows), dtype=numpy.int64)
+        pending = numpy.arange(len(rows))
+        while len(pending) > 0:
+            r = rows[pending]
+            col = numpy.searchsorted(flat, rng.random(len(r)) + r, side='right') - r * ncol
+            col = numpy.minimum(col, ncol - 1)
+            is_near = col < nnear
+            out[pending[is_near]] = near[r[is_near], col[is_near]]
+
+            r, col, pending = r[~is_near], col[~is_near] - nnear, pending[~is_near]
+            j = f_start[r, col] + (rng.random(len(r)) * f_count[r, col]).astype(numpy.int64)
+            d = (P[r, 0] - pts[j, 0]) ** 2 + (P[r, 1] - pts[j, 1]) ** 2
+            accept = rng.random(len(r)) * _kernel(f_dmin[r, col], q) <= _kernel(d, q)
+            out[pending[accept]] = j[accept]
+            pending = pending[~accept]
 
-def multiPreferentialG(n,p,k):
-    pass
+        sources.append(order[s + rows])
+        targets.append(order[out])
 
-def degreePreferentialG(n,p):
-    pass
+    return numpy.stack((numpy.concatenate(sources), numpy.concatenate(targets)), axis=1)
 
 # Generalized Watts-Strogatz (EK 20)
-# n is the number of nodes (we assume n is a perfect square or it will be rounded to the closest perfect square)
+# n is the number of nodes
 # r is the radius of each node (a node u is connected with each other node at distance at most r) - strong ties
 # k is the number of random edges for each node u - weak ties
 #
@@ -150,47 +445,29 @@ def degreePreferentialG(n,p):
 # Next implementation of Watts-Strogatz graphs assumes that nodes are on a two-dimensional space (similar implementation can be given on larger dimensions).
 # Here, distance between nodes will be set to be the Euclidean distance.
 # This approach allows us a more fine-grained and realistic placing of nodes (i.e., they not need to be all at same distance as in the grid)
-def GenWS2DG(n, r, k, q):
-    G = nx.Graph()
-    nodes=dict() #This will be used to associate to each node its coordinates
-    prob=dict()  #Keeps for each pair of nodes (u,v) the term 1/dist(u,v)**q
+#
+# seed = seed of the random generator
+# as_edges = if True, the (m, 2) array of edges is returned instead of a networkx graph
+def GenWS2DG(n, r, k, q, seed=None, as_edges=False):
+    rng = _rng(seed)
 
-    # The following for loop creates n nodes and place them randomly in the 2D area.
+    # Nodes are placed uniformly at random in the unit square.
     # If one want to consider a different placement, e.g., for modeling communities, one only need to change this part.
-    for i in range(n):
-        x = random.random()
-        y = random.random()
-        # We here assume that points are in the unit square
-        # If you want to consider a different size of the area,
-        # we can define a variable dim as the dimension of the area
-        # and to multiply x and y for this variable.
-        # However, recall that the radius r given in input must be in the same order of magnitude as the size of the area
-        # (e.g., you cannot consider the area as being a unit square, and consider a radius 2, otherwise there will be an edge between each pair of nodes)
-        # Hence, the choice of larger values for dim can be preferred if one want to represent r as an integer and not a floating point number
-        nodes[i]=(x,y)
-        prob[i]=dict()
-
-    for i in range(n):
-        # Strong-ties
-        for j in range(i+1, n):
-            # we add edge only towards next nodes,
-            # since edge to previous nodes have been added when these nodes have been processed
-            dist = math.sqrt((nodes[i][0]-nodes[j][0])**2 + (nodes[i][1]-nodes[j][1])**2) #Euclidean Distance
-            prob[i][j] = prob[j][i] = 1/dist**q
-            if dist <= r:
-                G.add_edge(i, j)
-
-        # Terms 1/dist(u,v)**q are not probabilities since their sum can be different from 1.
-        # To translate them in probabilities we normalize them, i.e, we divide each of them for their sum
-        norm=sum(prob[i].values())
-        # Weak ties
-        for h in range(k):
-            # They are not exactly h, since the random choice can return a node s such that edge (i, s) already exists
-            # Next instruction allows to choice from the list given as first argument according to the probability distribution given as second argument
-            s = numpy.random.choice([x for x in range(n) if x != i], p=[prob[i][x]/norm for x in range(n) if x != i])
-            G.add_edge(i,s)
+    # Recall that the radius r given in input must be in the same order of magnitude as the size of the area
+    # (e.g., you cannot consider the area as being a unit square, and consider a radius 2, otherwise there will be an edge between each pair of nodes)
+    pts = rng.random((n, 2))
 
-    return G
+    # Strong-ties: all pairs at distance at most r are found with a radius query on a KD-tree
+    strong = cKDTree(pts).query_pairs(r, output_type='ndarray').astype(numpy.int64)
+
+    # Weak ties: for each node, k nodes chosen with probability proportional to 1/dist**q
+    # They are not exactly k, since the random choice can return a node s such that edge (i, s) already exists
+    weak = _kernel_ties(pts, k, q, rng)
+
+    edges = _simple_edges(numpy.concatenate((strong.reshape(-1, 2), weak)), n)
+    if as_edges:
+        return edges
+    return _to_graph(n, edges)
 
 # ALTERNATIVE1: Hyperbolic Random Graphs
 # ALTERNATIVE2: Affiliation Networks (Lattanzi & Sivakumar, STOC 2009)
@@ -209,72 +486,106 @@ def GenWS2DG(n, r, k, q):
 # c = maximum number of communities to which one node may be affiliated
 # p = probability of an inter-community edge (strong ties)
 # s = number of out-community edges (weak ties)
-def affiliationG(n, m, q, c, p, s):
-    G = nx.Graph()
-    community=dict() #It keeps for each community the nodes that it contains
-    for i in range(m):
-        community[i]=set()
-    comm_inv = dict() #It keeps for each node the communities to which is affiliated
-    for i in range(n):
-        comm_inv[i] = set()
+# seed = seed of the random generator
+# as_edges = if True, the (m, 2) array of edges is returned instead of a networkx graph
+#
+# The generation is done in three phases:
+# (i) nodes are affiliated to communities one at a time, as described above;
+# (ii) strong ties are created community by community: since each node, when it arrives, is linked with probability p
+#      to each node already in the community, the strong ties of a community are a random graph on its members,
+#      and they are generated with the geometric skips of randomG;
+# (iii) weak ties are created one node at a time, following the order of arrival: when node i arrives, the
+#      endpoints of its strong ties are added to a preallocated buffer that keeps each node as many times as its degree,
+#      and the s weak ties of i are drawn from this buffer.
+def affiliationG(n, m, q, c, p, s, seed=None, as_edges=False, batch=1 << 16):
+    rng = _rng(seed)
+
+    # (i) Affiliation to communities
+    comm_inv = [None] * n #It keeps for each node the communities to which is affiliated
     # Keeps each node as many times as the number of communities in which is contained
-    # It serves for the preferential affiliation to communities (view below)
-    communities = []
-    # Keeps each node as many times as its degree
-    # It serves for the preferential attachment of weak ties (view below)
-    nodes = []
-
-    for i in range(n):
-        # Preferential Affiliation to communities
-        r=random.random()
-        # Preferential Affiliation is done only with probability q.
-        # Preferential affiliation works as follows:
-        # a node is chosen proportionally to the number of communities in which it is contained
-        # and is copied (i.e., i is affiliated to the same communities containing the chosen node).
-        # Observe that the probability that i is affiliated to a given community increases when the number of nodes in that community is large,
-        # since the probability of selecting a node from a large community is larger than from a small community
-        if r <= q and len(communities) > 0:
-            prot=random.choice(communities) #Choose a prototype to copy
-            for comm in comm_inv[prot]:
-                community[comm].add(i)
-                if comm not in comm_inv[i]:
-                    comm_inv[i].add(comm)
-                    communities.append(i)
-        # With remaining probability (or if i is the first node to be processed and thus preferential attachment is not possible),
-        # i is affiliated to at most c randomly chosen communities
-        else:
-            num_com=random.randint(1, c) #number of communities is chosen at random among 1 and c
-            for k in range(num_com):
-                comm = random.choice([x for x in range(m)])
-                community[comm].add(i)
-                if comm not in comm_inv[i]:
-                    comm_inv[i].add(comm)
-                    communities.append(i)
-
-        # Strong ties (edge within communities)
-        # For each community and each node within that community we add an edge with probability p
-        for comm in comm_inv[i]:
-            for j in community[comm]:
-                if j != i and not G.has_edge(i, j):
-                    r2=random.random()
-                    if r2 <= p:
-                        G.add_edge(i,j)
-                        nodes.append(i)
-                        nodes.append(j)
-
-        # Preferential Attachment of weak ties
-        # We choose s nodes with a probability that is proportional to their degree and we add an edge to these nodes
-        for k in range(s):
-            if len(nodes) == 0: #if i is the first node to be processed (and thus preferential attachment is impossible), then the s neighbors are selected at random
-                v = random.choice([x for x in range(n) if x != i])
+    # It serves for the preferential affiliation to communities
+    communities = numpy.empty(n * c, dtype=numpy.int64)
+    member_comm = [] #member_comm[x] is the community of the x-th affiliation, whose node is communities[x]
+    filled = 0
+    for start in range(0, n, batch):
+        stop = min(start + batch, n)
+        coins = rng.random(stop - start).tolist()
+        slots = rng.random(stop - start).tolist()
+        num_com = rng.integers(1, c + 1, size=stop - start).tolist() #number of communities is chosen at random among 1 and c
+        picks = rng.integers(0, m, size=(stop - start, c)).tolist()
+        for i in range(start, stop):
+            x = i - start
+            # Preferential Affiliation is done only with probability q:
+            # a node is chosen proportionally to the number of communities in which it is contained
+            # and is copied (i.e., i is affiliated to the same communities containing the chosen node).
+            if coins[x] <= q and filled > 0:
+                comms = comm_inv[int(communities[int(slots[x] * filled)])]
+            # With remaining probability, i is affiliated to at most c randomly chosen communities
             else:
-                v = random.choice(nodes)
-            if v != i and not G.has_edge(i, v):
-                G.add_edge(i, j)
-                nodes.append(i)
-                nodes.append(j)
+                comms = list(dict.fromkeys(picks[x][:num_com[x]]))
+            comm_inv[i] = comms
+            communities[filled:filled + len(comms)] = i
+            member_comm.extend(comms)
+            filled += len(comms)
 
-    return G
+    # (ii) Strong ties (edge within communities)
+    # Members of each community are sorted by arrival, hence in each pair (members[a], members[b]) with b < a
+    # the first node is the one that created the edge
+    member_comm = numpy.array(member_comm, dtype=numpy.int64)
+    order = numpy.argsort(member_comm, kind='stable')
+    members = communities[:filled][order]
+    bounds = numpy.searchsorted(member_comm[order], numpy.arange(m + 1))
+    strong = [numpy.empty((0, 2), dtype=numpy.int64)]
+    for comm in range(m):
+        comm_members = members[bounds[comm]:bounds[comm + 1]]
+        strong.append(comm_members[_gnp_pairs(len(comm_members), p, rng)].reshape(-1, 2))
+    strong = numpy.concatenate(strong)
+    # A pair of nodes sharing more communities has a chance in each of them, but the edge is created only once
+    strong = _simple_edges(strong, n)
+    strong = strong[numpy.argsort(strong[:, 0], kind='stable')]
+    created = numpy.searchsorted(strong[:, 0], numpy.arange(n + 1)) #strong ties created by i are strong[created[i]:created[i+1]]
+
+    # (iii) Preferential Attachment of weak ties
+    # We choose s nodes with a probability that is proportional to their degree and we add an edge to these nodes
+    nodes = numpy.empty(2 * (len(strong) + n * s), dtype=numpy.int64) #Keeps each node as many times as its degree
+    filled = 0
+    weak = []
+    later = dict() #For a node v, the nodes arrived before v that chose v as a weak tie
+    for start in range(0, n, batch):
+        stop = min(start + batch, n)
+        draws = rng.random((stop - start) * s).tolist()
+        uniform = rng.integers(0, max(n - 1, 1), size=(stop - start) * s).tolist()
+        x = 0
+        for i in range(start, stop):
+            a, b = created[i], created[i + 1]
+            if b > a:
+                nodes[filled:filled + 2 * (b - a)] = strong[a:b].ravel()
+                filled += 2 * (b - a)
+            if s == 0 or n < 2:
+                continue
+            neighbors = set(strong[a:b, 1].tolist())
+            neighbors.update(later.pop(i, ()))
+            for k in range(s):
+                if filled == 0: #if no edge exists yet (and thus preferential attachment is impossible), then the neighbor is selected at random
+                    v = uniform[x]
+                    if v >= i:
+                        v += 1
+                else:
+                    v = int(nodes[int(draws[x] * filled)])
+                x += 1
+                if v != i and v not in neighbors:
+                    neighbors.add(v)
+                    weak.append((i, v))
+                    nodes[filled] = i
+                    nodes[filled + 1] = v
+                    filled += 2
+                    if v > i:
+                        later.setdefault(v, []).append(i)
+
+    edges = _simple_edges(numpy.concatenate((strong, numpy.array(weak, dtype=numpy.int64).reshape(-1, 2))), n)
+    if as_edges:
+        return edges
+    return _to_graph(n, edges)
 
 if __name__ == '__main__':
     print(randomG(9,0.5).edges())
@@ -283,6 +594,8 @@ if __name__ == '__main__':
     print(deg_list)
     print(configurationG(deg_list).edges())
     print(preferentialG(9,0.75).edges())
+    print(multiPreferentialG(9,0.75,2).edges())
+    print(degreePreferentialG(9,0.5).edges())
     print(GenWS2DG(9, 1, 1, 2).edges())
     print(affiliationG(9, 4, 0.5, 3, 0.8, 2).edges())
 
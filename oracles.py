@@ -0,0 +1,100 @@
+import numpy as np
+
+# Oracles val and prob computed on demand from a counter-based random generator:
+# the random number used for a query is a hash of (seed, query), hence it is the same every time
+# the query is asked, without storing anything. Memory is O(n) for prob (the degrees) and O(1) for val,
+# for any number of steps T. Each oracle can be called on a single query or on arrays of queries (batch),
+# with the same results.
+#
+# The hash is the finalizer of splitmix64, applied to the seed and then to each part of the query in turn.
+
+MASK = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+M1 = 0xBF58476D1CE4E5B9
+M2 = 0x94D049BB133111EB
+
+def splitmix64(x):
+    "Returns the splitmix64 hash of the integer x"
+    x = (x + GOLDEN) & MASK
+    x = ((x ^ (x >> 30)) * M1) & MASK
+    x = ((x ^ (x >> 27)) * M2) & MASK
+    return x ^ (x >> 31)
+
+def splitmix64_array(x):
+    "Returns the splitmix64 hash of each element of the uint64 array x"
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(GOLDEN)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(M1)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(M2)
+        return x ^ (x >> np.uint64(31))
+
+def uniform(seed, *parts):
+    "Returns the uniform number in [0, 1) associated to the integers (seed, *parts)"
+    h = splitmix64(seed & MASK)
+    for part in parts:
+        h = splitmix64(h ^ (int(part) & MASK))
+    return (h >> 11) * 2.0**-53
+
+def uniform_array(seed, *parts):
+    "As uniform, but each part can be an array: it returns the array of the numbers associated to each query"
+    h = np.full(np.broadcast(*[np.asarray(part) for part in parts]).shape, splitmix64(seed & MASK), dtype=np.uint64)
+    for part in parts:
+        h = splitmix64_array(h ^ np.asarray(part, dtype=np.int64).astype(np.uint64))
+    return (h >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+# Tags make the random numbers of different kinds of queries independent
+VAL = 1
+EDGE = 2
+INVITE = 3
+
+class ValOracle:
+    "val(t, u): valuation of node u at time t, uniform integer in [low, high]"
+
+    def __init__(self, seed=0, low=1, high=50):
+        self.seed = seed
+        self.low = low
+        self.high = high
+
+    def __call__(self, t, u):
+        return self.low + int(uniform(self.seed, VAL, t, u) * (self.high - self.low + 1))
+
+    def batch(self, t, us):
+        r = uniform_array(self.seed, VAL, t, np.asarray(us))
+        return (self.low + (r * (self.high - self.low + 1)).astype(np.int64)).tolist()
+
+class ProbOracle:
+    "prob(u, v, t): True if u's invitation to v at time t is accepted"
+
+    # Each edge (u, v) has a probability p[u][v] = p[v][u], uniform in [0, min(cap, scale/max(deg(u), deg(v)))],
+    # as in final_test.py, and the invitation at time t is accepted with probability p[u][v].
+    # Only the degrees of G are stored; p[u][v] and each outcome are recomputed from the hash when needed.
+    def __init__(self, G, seed=0, cap=0.25, scale=10):
+        self.seed = seed
+        self.cap = cap
+        self.scale = scale
+        degrees = getattr(G, "degrees", None)
+        if degrees is not None:
+            self.__degree = np.asarray(degrees)
+        else:
+            self.__degree = dict(G.degree())
+
+    def __degrees(self, us):
+        if isinstance(self.__degree, dict):
+            return np.array([self.__degree[u] for u in us], dtype=np.float64)
+        return self.__degree[us].astype(np.float64)
+
+    def p(self, u, v):
+        "Returns the probability of the edge (u, v)"
+        top = min(self.cap, self.scale / max(self.__degree[u], self.__degree[v], 1))
+        return uniform(self.seed, EDGE, min(u, v), max(u, v)) * top
+
+    def __call__(self, u, v, t):
+        return uniform(self.seed, INVITE, t, u, v) <= self.p(u, v)
+
+    def batch(self, us, vs, t):
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        top = np.minimum(self.cap, self.scale / np.maximum(np.maximum(self.__degrees(us), self.__degrees(vs)), 1))
+        p = uniform_array(self.seed, EDGE, np.minimum(us, vs), np.maximum(us, vs)) * top
+        r = uniform_array(self.seed, INVITE, t, us, vs)
+        return (r <= p).tolist()
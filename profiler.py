@@ -0,0 +1,124 @@
+import csv
+import json
+import math
+import time
+import inspect
+
+# Profiling of SocNetMec.run and SocNetMec.run_async: wall time of each phase and counters of what each step processed.
+#
+# A Profiler is given to SocNetMec (SocNetMec(G, T, k, profiler=Profiler()) or set_profiler); without one, run only
+# pays a test "is None" per phase. Phases:
+#   "choose_S"  choice of the sellers and of the auction ("reachable" included)
+#   "reachable" computation (or cache lookup) of the spam set
+#   "explore"   invitation diffusion of a seller, oracle calls included (in run_async, of all the sellers at once)
+#   "prob", "val" calls to the oracles (a part of "explore")
+#   "replay"    construction of bids and reports for each kind of bidders
+#   "auction"   the auction itself
+#   "step"      the whole step
+# Each duration goes to the histogram of its phase, whose bucket b contains the durations in [2^(b-1), 2^b)
+# microseconds (bucket 0 the ones below 1 microsecond), and to the totals of the current step.
+# Counters: invitations_sent, invitations_accepted, waves, max_depth, prob_queries, val_queries,
+# cache_hits, cache_misses, auctions, bidders, reported_edges, seller_net.
+
+class _TimedOracle:
+    # Wraps an oracle, adding the time of its calls to the phase name and counting the queries;
+    # it has the method batch only if the oracle has it, so that diffusion.py uses the same path
+    __slots__ = ("oracle", "profiler", "name", "batch")
+
+    def __init__(self, oracle, profiler, name):
+        self.oracle = oracle
+        self.profiler = profiler
+        self.name = name
+        if hasattr(oracle, "batch"):
+            self.batch = self.__batch
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        result = self.oracle(*args)
+        self.profiler.add(self.name, time.perf_counter() - start)
+        self.profiler.count(self.name + "_queries")
+        return result
+
+    def __batch(self, *args):
+        start = time.perf_counter()
+        result = self.oracle.batch(*args)
+        if inspect.isawaitable(result):
+            return self.__finish(start, result)
+        self.profiler.add(self.name, time.perf_counter() - start)
+        self.profiler.count(self.name + "_queries", len(result))
+        return result
+
+    async def __finish(self, start, result):
+        # The batch of an async oracle is timed until its answers arrive
+        result = await result
+        self.profiler.add(self.name, time.perf_counter() - start)
+        self.profiler.count(self.name + "_queries", len(result))
+        return result
+
+class Profiler:
+    "Per-phase wall time histograms and per-step counters of SocNetMec.run"
+
+    def __init__(self):
+        self.histograms = dict() # {phase: [count of bucket 0, count of bucket 1, ...], ...}
+        self.steps = [] # [{"step": t, "time": {phase: seconds, ...}, "counters": {name: value, ...}}, ...]
+        self.__current = None
+
+    def begin(self, t):
+        self.__current = {"step": t, "time": dict(), "counters": dict()}
+        self.steps.append(self.__current)
+
+    def add(self, phase, seconds):
+        "Records a duration of phase"
+        bucket = 0 if seconds < 1e-6 else int(math.log2(seconds * 1e6)) + 1
+        histogram = self.histograms.setdefault(phase, [])
+        if len(histogram) <= bucket:
+            histogram.extend([0] * (bucket + 1 - len(histogram)))
+        histogram[bucket] += 1
+        if self.__current is not None:
+            times = self.__current["time"]
+            times[phase] = times.get(phase, 0.0) + seconds
+
+    def count(self, name, value=1):
+        if self.__current is not None:
+            counters = self.__current["counters"]
+            counters[name] = counters.get(name, 0) + value
+
+    def maximum(self, name, value):
+        if self.__current is not None:
+            counters = self.__current["counters"]
+            counters[name] = max(counters.get(name, value), value)
+
+    def wrap(self, oracle, name):
+        "Returns the oracle whose calls are timed in the phase name"
+        return _TimedOracle(oracle, self, name)
+
+    def summary(self):
+        "Returns, for each phase, the number of durations, their total and the histogram {upper bound in seconds: count}"
+        totals = dict()
+        for step in self.steps:
+            for phase, seconds in step["time"].items():
+                totals[phase] = totals.get(phase, 0.0) + seconds
+        return {
+            phase: {
+                "count": sum(histogram),
+                "total_s": totals.get(phase, 0.0),
+                "histogram": {2**b * 1e-6: c for b, c in enumerate(histogram) if c > 0},
+            }
+            for phase, histogram in self.histograms.items()
+        }
+
+    def to_json(self, path):
+        "Saves the records of the steps and the summary to path"
+        with open(path, "w") as f:
+            json.dump({"steps": self.steps, "summary": self.summary()}, f, indent=1)
+
+    def to_csv(self, path):
+        "Saves one row per step, with the time of each phase (time_<phase>) and the counters"
+        phases = sorted({phase for step in self.steps for phase in step["time"]})
+        counters = sorted({name for step in self.steps for name in step["counters"]})
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["step"] + ["time_" + phase for phase in phases] + counters)
+            for step in self.steps:
+                writer.writerow([step["step"]] + [step["time"].get(phase, 0.0) for phase in phases] +
+                                [step["counters"].get(name, 0) for name in counters])
@@ -0,0 +1,149 @@
+import pickle
+from collections import OrderedDict
+
+# Cache of the spam sets computed by SocNetMec, i.e., for a set S of sellers, the nodes reachable from at least two sellers.
+# Such a set is the union of some connected components of G, hence SocNetMec gives to the cache the labels of these
+# components, and the cache stores them in one of the following ways:
+#   "nodes":      a frozenset with all the nodes (fastest membership test, largest memory)
+#   "components": a frozenset with the labels of the components (a few integers per entry)
+#   "bitset":     a bytes object with one bit per node (n/8 bytes per entry, nodes must be integers 0, ..., n-1)
+# In any case, get and put return an object that supports the test "node in spam" and len(spam), the number of nodes
+# (diffusion.reported needs it to visit the nodes in the same order whatever the storage).
+
+FORMAT = 2 # version of the files written by save
+
+class _ComponentSpam:
+    __slots__ = ("component", "labels", "size")
+
+    def __init__(self, component, labels, size):
+        self.component = component
+        self.labels = labels
+        self.size = size
+
+    def __contains__(self, node):
+        return self.component[node] in self.labels
+
+    def __len__(self):
+        return self.size
+
+class _BitsetSpam:
+    __slots__ = ("bits", "size")
+
+    def __init__(self, bits, size):
+        self.bits = bits
+        self.size = size
+
+    def __contains__(self, node):
+        return 0 <= node < 8 * len(self.bits) and (self.bits[node >> 3] >> (node & 7)) & 1 == 1
+
+    def __len__(self):
+        return self.size
+
+class ReachableCache:
+    "Bounded LRU cache, with counters, of the spam sets of SocNetMec"
+
+    STORAGES = ("nodes", "components", "bitset")
+
+    # max_entries = maximum number of sets of sellers kept in the cache (None for no limit)
+    # max_nodes = maximum total size of the entries, measured in stored nodes (stored labels for "components"; None for no limit)
+    # When a limit is exceeded, the least recently used entries are evicted.
+    def __init__(self, max_entries=1024, max_nodes=None, storage="nodes"):
+        if storage not in self.STORAGES:
+            raise ValueError("storage must be one of %s" % ", ".join(self.STORAGES))
+        self.max_entries = max_entries
+        self.max_nodes = max_nodes
+        self.storage = storage
+
+        self.__entries = OrderedDict() # {frozenset(S): (stored value, size), ...}
+        self.__size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __decode(self, value, component):
+        if self.storage == "components":
+            return _ComponentSpam(component, *value)
+        if self.storage == "bitset":
+            return _BitsetSpam(*value)
+        return value
+
+    def __encode(self, labels, members, n):
+        # "components" and "bitset" also store the number of nodes of the spam set
+        if self.storage == "components":
+            value = frozenset(labels)
+            return (value, sum(len(members[label]) for label in value)), len(value)
+        nodes = [node for label in labels for node in members[label]]
+        if self.storage == "bitset":
+            bits = bytearray((n + 7) // 8)
+            for node in nodes:
+                bits[node >> 3] |= 1 << (node & 7)
+            return (bytes(bits), len(nodes)), len(nodes)
+        return frozenset(nodes), len(nodes)
+
+    def __evict(self):
+        while (self.max_entries is not None and len(self.__entries) > self.max_entries) or \
+              (self.max_nodes is not None and self.__size > self.max_nodes):
+            self.__size -= self.__entries.popitem(last=False)[1][1]
+            self.evictions += 1
+
+    def get(self, S, component):
+        "Returns the spam set of S if it is in the cache, None otherwise"
+
+        key = frozenset(S)
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return self.__decode(entry[0], component)
+
+    def put(self, S, labels, component, members, n):
+        "Stores the spam set of S, given as the labels of its components, and returns it"
+
+        value, size = self.__encode(labels, members, n)
+        key = frozenset(S)
+        if key in self.__entries:
+            self.__size -= self.__entries.pop(key)[1]
+        if self.max_entries != 0 and (self.max_nodes is None or size <= self.max_nodes):
+            self.__entries[key] = (value, size)
+            self.__size += size
+            self.__evict()
+        return self.__decode(value, component)
+
+    def clear(self):
+        self.__entries.clear()
+        self.__size = 0
+
+    def stats(self):
+        return {
+            "entries": len(self.__entries),
+            "stored_nodes": self.__size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def save(self, path, fingerprint=None):
+        "Saves the entries to path; fingerprint identifies the graph (and its component labels) they refer to"
+
+        with open(path, "wb") as f:
+            pickle.dump({"format": FORMAT, "fingerprint": fingerprint, "storage": self.storage,
+                         "entries": list(self.__entries.items())}, f)
+
+    def load(self, path, fingerprint=None):
+        "Warms the cache with the entries saved in path; returns False if they refer to another graph or storage, or another format"
+
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("format") != FORMAT or data["fingerprint"] != fingerprint or data["storage"] != self.storage:
+            return False
+        for key, (value, size) in data["entries"]:
+            if key not in self.__entries:
+                self.__entries[key] = (value, size)
+                self.__size += size
+        self.__evict()
+        return True
@@ -0,0 +1,87 @@
+import os
+import random
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from csr_graph import CSRGraph
+from final_mockup import SocNetMec
+
+# Driver running the steps of a SocNetMec simulation on a pool of processes.
+#
+# Steps only share the graph and the oracles, hence the range of steps is split in contiguous chunks,
+# and each chunk is run by a worker with its own SocNetMec. Each step t uses a random generator
+# derived only from (seed, t), hence the revenue of a step does not depend on the worker running it,
+# and the result is the same, bit for bit, as the serial run (workers=1) with the same seed.
+# This requires the oracles prob and val to be deterministic functions of their arguments
+# (e.g., the ones in oracles.py), and picklable if the start method of the processes is not fork.
+#
+# If G is a CSRGraph, its arrays are copied once in shared memory and all the workers use them without copies.
+# Any other graph is inherited by the workers when processes are forked, and pickled otherwise.
+
+def step_rng(seed, t):
+    "Returns the random generator of step t"
+    return random.Random("%s:%d" % (seed, t))
+
+def _run_step(snm, t, prob, val, seed):
+    # The module random is also seeded, since auctions may use it
+    random.seed("%s:%d:auction" % (seed, t))
+    return snm.run(t, prob, val, step_rng(seed, t))
+
+_worker = dict()
+
+def _share(G):
+    blocks = []
+    specs = []
+    for array in (G.indptr, G.indices):
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs.append((block.name, array.shape, array.dtype.str))
+    return blocks, (specs, G.labels)
+
+def _attach(shared):
+    specs, labels = shared
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+    arrays = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf) for block, (_, shape, dtype) in zip(blocks, specs)]
+    return blocks, CSRGraph(arrays[0], arrays[1], labels)
+
+def _init_worker(G, shared, T, k, prob, val, seed):
+    if shared is not None:
+        _worker["blocks"], G = _attach(shared)
+    _worker["snm"] = SocNetMec(G, T, k)
+    _worker["args"] = (prob, val, seed)
+
+def _run_chunk(steps):
+    prob, val, seed = _worker["args"]
+    return [_run_step(_worker["snm"], t, prob, val, seed) for t in steps]
+
+def simulate(G, T, k, prob, val, seed=0, workers=None, chunks_per_worker=4):
+    "Runs the steps 0, ..., T-1; returns the list with the revenue of each step and the total revenue"
+
+    if workers is None:
+        workers = os.cpu_count()
+
+    if workers <= 1:
+        snm = SocNetMec(G, T, k)
+        revenues = [_run_step(snm, t, prob, val, seed) for t in range(T)]
+    else:
+        size = max(1, -(-T // (workers * chunks_per_worker)))
+        chunks = [range(start, min(start + size, T)) for start in range(0, T, size)]
+
+        blocks, shared = [], None
+        if isinstance(G, CSRGraph):
+            blocks, shared = _share(G)
+        try:
+            context = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else None)
+            with context.Pool(workers, _init_worker, (None if shared else G, shared, T, k, prob, val, seed)) as pool:
+                revenues = [r for chunk in pool.imap(_run_chunk, chunks) for r in chunk]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    # The total is summed in the order of the steps, as in the serial run
+    total = 0
+    for revenue in revenues:
+        total += revenue
+    return revenues, total
@@ -0,0 +1,193 @@
+import networkx as nx
+import numpy as np
+import pytest
+from csr_graph import CSRGraph
+from graph_io import write_graph, iter_edge_chunks
+from networks_gen import randomG
+from analyze import Analyzer, _eccentricities, _power_law_fit
+
+def _random_csr(seed, isolated=3):
+    # Random multigraph with self-loops, whose last isolated nodes have no edges
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(5, 40))
+    return CSRGraph.from_edges(rng.integers(0, n - isolated, size=(n, 2)), n)
+
+def test_eccentricities_with_isolated_nodes_at_the_end():
+    C = CSRGraph.from_edges([(0, 2), (1, 2)], 4)
+    assert _eccentricities(C, [0, 1, 2]).tolist() == [2, 2, 1]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_eccentricities_match_networkx(seed):
+    C = _random_csr(seed)
+    H = nx.Graph(C.to_scipy())
+    n = C.number_of_nodes()
+    expected = [max(nx.single_source_shortest_path_length(H, u).values()) for u in range(n)]
+    assert _eccentricities(C, np.arange(n)).tolist() == expected
+
+@pytest.mark.parametrize("seed", range(10))
+def test_exact_diameter_matches_networkx(seed):
+    C = _random_csr(seed)
+    H = nx.Graph(C.to_scipy())
+    expected = max(nx.diameter(H.subgraph(nodes)) for nodes in nx.connected_components(H))
+    assert Analyzer(C).get_diameter() == expected
+
+def test_hyperanf_reads_the_same_edges_from_every_source(tmp_path):
+    # Nodes without edges are relabeled away, since text files and arrays do not have them
+    edges = randomG(2000, 3 / 2000, 0, as_edges=True)
+    edges = np.unique(edges, return_inverse=True)[1].reshape(-1, 2)
+    n = int(edges.max()) + 1
+    C = CSRGraph.from_edges(edges, n)
+    expected = Analyzer(C).get_diameter(exact=False, chunk=1000)
+
+    binary = str(tmp_path / "graph.bin")
+    write_graph(binary, edges, n)
+    text = str(tmp_path / "graph.txt")
+    np.savetxt(text, C.edges(), fmt="%d")
+    assert Analyzer(None).get_diameter(exact=False, source=binary, chunk=1000) == expected
+    assert Analyzer(None).get_diameter(exact=False, source=C.edges(), chunk=1000) == expected
+    assert Analyzer(None).get_diameter(exact=False, source=text, chunk=1000) == expected
+
+def test_hyperanf_does_not_count_the_nodes_missing_from_the_edges():
+    # Node 1 does not appear in the array, hence only nodes 0 and 2 count themselves
+    diameter, _, N = Analyzer(None).get_diameter(exact=False, p=8, source=np.array([[0, 2]]))
+    assert diameter == 1
+    assert N == pytest.approx([2, 4], rel=0.05)
+
+def test_hyperanf_is_close_to_the_exact_diameter():
+    n = 3000
+    C = CSRGraph.from_edges(randomG(n, 4 / n, 1, as_edges=True), n)
+    diameter, effective, N = Analyzer(C).get_diameter(exact=False, p=8)
+    assert abs(diameter - Analyzer(C).get_diameter()) <= 2
+    assert 0 < effective <= diameter
+    assert N == sorted(N)
+
+def test_source_requires_hyperanf():
+    with pytest.raises(ValueError):
+        Analyzer(None).get_diameter(source=np.zeros((0, 2), dtype=np.int64))
+    with pytest.raises(ValueError):
+        Analyzer(None).get_diameter(exact=False, source=iter([np.zeros((0, 2), dtype=np.int64)]))
+
+def test_giant_component_and_degrees_match_networkx(tmp_path):
+    n = 1000
+    edges = randomG(n, 1.2 / n, 2, as_edges=True)
+    H = nx.Graph()
+    H.add_nodes_from(range(n))
+    H.add_edges_from(edges.tolist())
+    giant = max(nx.connected_components(H), key=len)
+    binary = str(tmp_path / "graph.bin")
+    write_graph(binary, edges, n)
+    for source in (None, binary):
+        size, fraction, nodes = Analyzer(H).get_giant_component(source=source, chunk=100)
+        assert size == len(giant) and nodes.tolist() == sorted(giant)
+        assert fraction == len(giant) / n
+    expected = np.bincount([d for _, d in H.degree()])
+    histogram = Analyzer(H).get_degree_distribution(plot=False)["histogram"]
+    assert histogram.tolist() == expected.tolist()
+    histogram = Analyzer(H).get_degree_distribution(source=binary, plot=False)["histogram"]
+    assert histogram.tolist() == expected.tolist()
+
+def test_clustering_coefficient_matches_networkx():
+    n = 300
+    H = nx.Graph()
+    H.add_nodes_from(range(n))
+    H.add_edges_from(randomG(n, 0.05, 3, as_edges=True).tolist())
+    coefficient, local = Analyzer(H).get_clustering_coefficient()
+    expected = nx.clustering(H)
+    assert local.tolist() == pytest.approx([expected[u] for u in H.nodes()])
+    assert coefficient == pytest.approx(nx.average_clustering(H))
+    estimate, _ = Analyzer(H).get_clustering_coefficient(exact=False, epsilon=0.02, seed=0)
+    assert abs(estimate - coefficient) <= 0.02
+
+@pytest.mark.parametrize("block", [1, 50, 1 << 22])
+def test_triangles_of_each_node_match_networkx(block):
+    from analyze import _triangles
+    n = 400
+    H = nx.Graph()
+    H.add_nodes_from(range(n))
+    H.add_edges_from(randomG(n, 0.06, 4, as_edges=True).tolist())
+    expected = nx.triangles(H)
+    assert _triangles(CSRGraph.from_networkx(H), block).tolist() == [expected[u] for u in range(n)]
+
+def test_clustering_of_labelled_and_tiny_graphs():
+    H = nx.Graph([("a", "b"), ("b", "c"), ("c", "a"), ("c", "d")])
+    coefficient, local = Analyzer(H).get_clustering_coefficient()
+    expected = nx.clustering(H)
+    assert local.tolist() == pytest.approx([expected[u] for u in H.nodes()])
+    assert coefficient == pytest.approx(nx.average_clustering(H))
+    assert Analyzer(nx.Graph()).get_clustering_coefficient()[0] == 0.0
+
+def test_approximate_clustering_is_seeded():
+    H = nx.Graph()
+    H.add_nodes_from(range(300))
+    H.add_edges_from(randomG(300, 0.05, 5, as_edges=True).tolist())
+    first = Analyzer(H).get_clustering_coefficient(exact=False, seed=1)
+    assert first == Analyzer(H).get_clustering_coefficient(exact=False, seed=1)
+    assert first[1] is None
+
+@pytest.mark.parametrize("chunk", [1, 13, 1 << 20])
+def test_union_find_components_match_networkx(chunk):
+    from analyze import _union_find
+    n = 2000
+    edges = randomG(n, 1 / n, 6, as_edges=True)
+    H = nx.Graph()
+    H.add_nodes_from(range(n))
+    H.add_edges_from(edges.tolist())
+    parent, size, seen = _union_find(iter_edge_chunks(edges, chunk), n)
+    assert seen.sum() == len(np.unique(edges))
+    for nodes in nx.connected_components(H):
+        nodes = list(nodes)
+        assert len(set(parent[nodes].tolist())) == 1 and size[parent[nodes[0]]] == len(nodes)
+
+def test_giant_component_of_iterators_and_text_files(tmp_path):
+    # Without the number of nodes, the nodes are the ones of the edges
+    edges = np.array([[0, 1], [1, 2], [5, 6], [8, 9], [9, 10], [10, 8], [10, 11]])
+    size, fraction, nodes, sizes = Analyzer(None).get_giant_component(source=iter([edges[:3], edges[3:]]), distribution=True)
+    assert (size, fraction, nodes.tolist(), sizes) == (4, 4 / 9, [8, 9, 10, 11], {2: 1, 3: 1, 4: 1})
+    text = str(tmp_path / "graph.txt")
+    np.savetxt(text, edges, fmt="%d")
+    assert Analyzer(None).get_giant_component(source=text, chunk=2)[2].tolist() == [8, 9, 10, 11]
+    assert Analyzer(None).get_giant_component(source=edges)[:2] == (4, 4 / 9)
+    assert Analyzer(None).get_giant_component(source=iter([]))[0] == 0
+
+def test_giant_component_names_the_nodes_with_their_labels():
+    H = nx.Graph([("x", "y"), ("y", "z"), ("u", "v")])
+    size, fraction, nodes = Analyzer(H).get_giant_component()
+    assert (size, fraction, sorted(nodes.tolist())) == (3, 3 / 5, ["x", "y", "z"])
+
+def test_in_and_out_degrees_of_directed_networks(tmp_path):
+    edges = randomG(300, 0.02, 2, as_edges=True)
+    D = nx.DiGraph()
+    D.add_nodes_from(range(300))
+    D.add_edges_from(edges.tolist())
+    text = str(tmp_path / "graph.txt")
+    np.savetxt(text, edges, fmt="%d")
+    for mode, degrees in (("in", D.in_degree()), ("out", D.out_degree()), ("total", D.degree())):
+        expected = np.bincount([d for _, d in degrees]).tolist()
+        assert Analyzer(D).get_degree_distribution(mode, plot=False)["histogram"].tolist() == expected
+        # Edges (u, v) of a source are out-edges of u and in-edges of v; the nodes have edges, hence no isolated ones
+        for source in (edges, text, iter([edges[:7], edges[7:]])):
+            histogram = Analyzer(None).get_degree_distribution(mode, source=source, plot=False)["histogram"]
+            assert histogram.sum() == len(np.unique(edges))
+            assert histogram[1:].tolist() == expected[1:len(histogram)] and sum(expected[len(histogram):]) == 0
+    assert Analyzer(D).get_degree_distribution(plot=False)["histogram"].tolist() == np.bincount([d for _, d in D.in_degree()]).tolist()
+    with pytest.raises(ValueError):
+        Analyzer(D).get_degree_distribution("both", plot=False)
+
+def test_log_bins_cover_the_degrees():
+    H = nx.barabasi_albert_graph(3000, 2, seed=0)
+    data = Analyzer(H).get_degree_distribution(log_bins=10, plot=False)
+    bins, density, hist = data["bins"], data["density"], data["histogram"]
+    assert bins[0] == 1 and bins[-1] >= len(hist) and (np.diff(bins) > 0).all()
+    # The densities times the widths of the bins are the fractions of the nodes with degree at least 1
+    assert np.isclose((density * np.diff(bins)).sum(), 1)
+    for a, b, d in zip(bins[:-1], bins[1:], density):
+        assert np.isclose(d, hist[a:b].sum() / hist[1:].sum() / (b - a))
+
+def test_power_law_fit_recovers_the_exponent():
+    rng = np.random.default_rng(0)
+    for alpha in (2.2, 2.5, 3.0):
+        hist = np.bincount(rng.zipf(alpha, 100000))
+        a, dmin, ks = _power_law_fit(hist)
+        assert abs(a - alpha) < 0.1 and ks < 0.02
+        assert _power_law_fit(hist, dmin=dmin) == (a, dmin, ks)
+    assert Analyzer(None).get_degree_distribution(source=iter([]), fit=True, plot=False)["alpha"] is None
@@ -0,0 +1,123 @@
+import asyncio
+import random
+import pytest
+from csr_graph import CSRGraph
+from networks_gen import randomG
+from oracles import ValOracle, ProbOracle
+from profiler import Profiler
+from diffusion import explore, explore_async
+from async_oracles import CoalescingOracle, AsyncProb, AsyncVal, StandInServer, Client, BlockingOracle
+
+class _Service:
+    # fetch of a CoalescingOracle answering sum(query), that records its requests and the ones in flight
+    def __init__(self, latency=0.001, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.requests = []
+        self.flying = 0
+        self.most = 0
+
+    async def fetch(self, queries):
+        self.requests.append(list(queries))
+        self.flying += 1
+        self.most = max(self.most, self.flying)
+        await asyncio.sleep(self.latency)
+        self.flying -= 1
+        if self.fail:
+            raise ConnectionError("service down")
+        return [sum(query) for query in queries]
+
+def test_coalescing_memo_and_batches():
+    service = _Service()
+    oracle = CoalescingOracle(service.fetch, concurrency=2, batch_size=3)
+    async def main():
+        first = [(0, v) for v in range(10)]
+        second = [(0, v) for v in range(5, 15)]
+        answers = await asyncio.gather(oracle.get(0, first), oracle.get(0, second))
+        again = await oracle.get(0, first)
+        other = await oracle.get(1, [(1, 0)])
+        return answers, again, other
+    (a, b), again, other = asyncio.run(main())
+    assert a == list(range(10)) and b == list(range(5, 15)) and again == a and other == [1]
+    # The queries shared by the two waves are sent once, at most 3 per request and 2 requests at a time
+    assert sorted(query for request in service.requests[:-1] for query in request) == [(0, v) for v in range(15)]
+    assert all(len(request) <= 3 for request in service.requests) and service.most == 2
+    assert oracle.stats() == {"requests": len(service.requests), "queries": 16, "memo_hits": 10, "coalesced": 5}
+
+def test_memo_is_kept_for_one_step():
+    service = _Service()
+    oracle = CoalescingOracle(service.fetch)
+    async def main():
+        for t in (0, 0, 1, 0):
+            await oracle.get(t, [(t, 1), (t, 2)])
+    asyncio.run(main())
+    assert len(service.requests) == 3 and oracle.memo_hits == 2
+
+def test_errors_reach_every_waiting_query():
+    service = _Service(fail=True)
+    oracle = CoalescingOracle(service.fetch)
+    async def main():
+        results = await asyncio.gather(oracle.get(0, [(0, 1)]), oracle.get(0, [(0, 1)]), return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        # Failed queries are not pending anymore, hence they are asked again
+        service.fail = False
+        return await oracle.get(0, [(0, 1)])
+    assert asyncio.run(main()) == [1]
+    assert len(service.requests) == 2
+
+def _setup(n=2000, seed=0):
+    G = CSRGraph.from_edges(randomG(n, 1.5 / n, seed, as_edges=True), n)
+    return G, ProbOracle(G, seed), ValOracle(seed)
+
+def _local(oracle, kind):
+    # fetch answering with an in-process oracle
+    async def fetch(queries):
+        await asyncio.sleep(0)
+        return [oracle(*query) for query in queries]
+    return AsyncProb(fetch) if kind == "prob" else AsyncVal(fetch)
+
+def test_explore_async_matches_explore():
+    G, prob, val = _setup()
+    sellers = set(random.Random(0).sample(range(G.number_of_nodes()), 5))
+    async def main():
+        aprob, aval = _local(prob, "prob"), _local(val, "val")
+        return await asyncio.gather(*(explore_async(G, s, sellers, set(), 3, aprob, aval) for s in sorted(sellers)))
+    assert asyncio.run(main()) == [explore(G, s, sellers, set(), 3, prob, val) for s in sorted(sellers)]
+
+def test_stand_in_server_answers_as_the_oracles():
+    G, prob, val = _setup(300)
+    server = StandInServer(prob, val, latency=0)
+    host, port = server.start_in_thread()
+    edges = G.edges()[:50].tolist()
+    blocking = BlockingOracle(host, port, "prob")
+    assert [blocking(u, v, 2) for u, v in edges] == [prob(u, v, 2) for u, v in edges]
+    blocking.close()
+    async def main():
+        client = Client(host, port, connections=2)
+        answers = await asyncio.gather(client.prob([(u, v, t) for u, v in edges for t in (1, 2)]),
+                                       client.val([(t, v) for v in range(100) for t in (0, 5)]), client.val([]))
+        await client.close()
+        return answers
+    probs, vals, empty = asyncio.run(main())
+    assert probs == [prob(u, v, t) for u, v in edges for t in (1, 2)]
+    assert vals == [val(t, v) for v in range(100) for t in (0, 5)] and empty == []
+
+def test_run_async_gives_the_revenues_of_run():
+    # SocNetMec needs the auctions of social_network_algorithms, next to the repository
+    SocNetMec = pytest.importorskip("final_mockup").SocNetMec
+    G, prob, val = _setup()
+    server = StandInServer(prob, val, latency=0)
+    host, port = server.start_in_thread()
+    T = 10
+    profiler = Profiler()
+    expected = SocNetMec(G, T, 5, profiler=profiler)
+    sync = [expected.run(t, prob, val, random.Random(t), compare=True) for t in range(T)]
+    async def main():
+        client = Client(host, port)
+        snm = SocNetMec(G, T, 5)
+        revenues = [await snm.run_async(t, AsyncProb(client.prob), AsyncVal(client.val), random.Random(t), compare=True)
+                    for t in range(T)]
+        await client.close()
+        return revenues
+    assert asyncio.run(main()) == sync
+    assert sum(step["counters"]["bidders"] for step in profiler.steps) > 0
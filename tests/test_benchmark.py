@@ -0,0 +1,32 @@
+import json
+import pytest
+import benchmark
+
+def _result(case, n, wall, rss, status="ok"):
+    return {"case": case, "n": n, "status": status, "wall_s": wall, "peak_rss_mb": rss}
+
+def test_regressions():
+    baseline = {"a@10": _result("a", 10, 1.0, 100.0), "b@10": _result("b", 10, 1.0, 100.0)}
+    results = [
+        _result("a", 10, 1.2, 130.0), # only the memory is beyond the tolerance
+        _result("b", 10, None, None, status="timeout"),
+        _result("c", 10, 5.0, 500.0), # not in the baseline
+    ]
+    assert benchmark.regressions(results, baseline, 0.25) == [("a@10", "peak_rss_mb", 100.0, 130.0)]
+    assert benchmark.regressions(results, baseline, 0.5) == []
+
+@pytest.mark.parametrize("name", [name for name in benchmark.CASES if name.startswith("gen.")])
+def test_generator_cases(name):
+    result = benchmark.run_case(name, 300)
+    assert result["status"] == "ok" and result["edges"] > 0
+
+def test_run_isolated_and_baseline(tmp_path):
+    history, baseline = str(tmp_path / "history.json"), str(tmp_path / "baseline.json")
+    arguments = ["--sizes", "200", "--cases", "gen.randomG", "--history", history, "--baseline", baseline]
+    assert benchmark.main(arguments + ["--save-baseline"]) == 0
+    with open(baseline) as f:
+        assert list(json.load(f)) == ["gen.randomG@200"]
+    with open(history) as f:
+        assert [result["status"] for result in json.load(f)[0]["results"]] == ["ok"]
+    assert benchmark.run_isolated("gen.randomG", 200)["status"] == "ok"
+    assert benchmark.run_isolated("no.such.case", 200)["status"] == "error"
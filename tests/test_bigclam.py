@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from csr_graph import CSRGraph
+from networks_gen import affiliationG
+import bigclam
+
+def _planted(seed, n=600, m=5):
+    # Communities without preferential affiliation and weak ties: nodes belong to one or two of the m communities
+    return CSRGraph.from_edges(affiliationG(n, m, 0, 2, 0.15, 0, seed=seed, as_edges=True), n)
+
+def _dense_likelihood(C, F):
+    # The log-likelihood summed over all the ordered pairs of distinct nodes, with the clamped probabilities of the edges
+    A = C.to_scipy().toarray() > 0
+    dots = F @ F.T
+    np.fill_diagonal(dots, 0)
+    return np.where(A, np.log(-np.expm1(-np.maximum(dots, bigclam.MIN_DOT))), -dots).sum()
+
+def test_log_likelihood_matches_the_sum_over_all_pairs():
+    C = _planted(0, n=200)
+    rng = np.random.default_rng(0)
+    for F in (rng.random((200, 5)), bigclam.seed_factors(C, 5, seed=0), np.zeros((200, 5))):
+        for block in (1, 50, 1 << 16):
+            assert bigclam.log_likelihood(C, F, block=block, workers=2) == pytest.approx(_dense_likelihood(C, F))
+
+def test_fit_does_not_depend_on_the_blocks():
+    C = _planted(1)
+    F1, history1 = bigclam.fit(C, 5, seed=0, max_iter=10, block=1 << 16)
+    F2, history2 = bigclam.fit(C, 5, seed=0, max_iter=10, block=100)
+    assert np.allclose(F1, F2) and history1 == pytest.approx(history2)
+
+def test_fit_warm_start_and_callback():
+    C = _planted(0)
+    F, history = bigclam.fit(C, 5, seed=0, max_iter=5)
+    calls = []
+    def callback(F, history):
+        calls.append(len(history))
+        return len(history) == 3
+    warm, more = bigclam.fit(C, 5, F=F, max_iter=50, callback=callback)
+    assert more[0] == pytest.approx(history[-1]) and calls == [2, 3] and len(more) == 3
+    assert F.min() >= 0 and warm.min() >= 0 and warm.max() <= bigclam.MAX
+
+def test_disjoint_cliques_are_the_communities():
+    cliques = [range(0, 12), range(12, 20), range(20, 35)]
+    C = CSRGraph.from_edges([(u, v) for nodes in cliques for u in nodes for v in nodes if u < v], 35)
+    F = bigclam.seed_factors(C, 3, seed=0)
+    # The neighborhood of any node of a clique is the clique, with no cut edges: each clique gets a seed
+    assert sorted(tuple(np.flatnonzero(F[:, c] == 1.0)) for c in range(3)) == sorted(tuple(nodes) for nodes in cliques)
+    F, _ = bigclam.fit(C, 3, F=F)
+    found = bigclam.communities(F, bigclam.threshold(C))
+    assert sorted(map(tuple, found)) == sorted(tuple(nodes) for nodes in cliques)
+
+def test_fit_does_not_decrease_the_likelihood():
+    C = _planted(0)
+    F, history = bigclam.fit(C, 5, seed=0, max_iter=30)
+    assert all(b >= a for a, b in zip(history, history[1:]))
+    assert history[-1] == pytest.approx(bigclam.log_likelihood(C, F))
+
+def test_fit_does_not_depend_on_the_workers():
+    C = _planted(0)
+    F1, history1 = bigclam.fit(C, 5, seed=0, max_iter=10, block=64, workers=1)
+    F4, history4 = bigclam.fit(C, 5, seed=0, max_iter=10, block=64, workers=4)
+    assert np.array_equal(F1, F4) and history1 == history4
+
+def test_seed_factors_with_isolated_nodes():
+    C = CSRGraph.from_edges([(0, 1), (1, 2), (0, 2)], 5)
+    F = bigclam.seed_factors(C, 3, seed=0)
+    assert F.shape == (5, 3)
+    assert (F[[0, 1, 2], 0] == 1.0).all()
+
+@pytest.mark.parametrize("seed", range(3))
+def test_select_number_of_communities_recovers_the_planted_m(seed):
+    m, F, scores = bigclam.select_number_of_communities(_planted(seed), [2, 5, 10, 20], seed=seed, processes=1)
+    assert m == 5 and F.shape == (600, 5)
+    assert sorted(scores) == [2, 5, 10, 20]
+    assert all(type(candidate) is int for candidate in scores)
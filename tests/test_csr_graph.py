@@ -0,0 +1,68 @@
+import random
+import networkx as nx
+import numpy as np
+import pytest
+from csr_graph import CSRGraph
+from networks_gen import randomG
+
+def _graphs(seed, n=200):
+    # CSRGraph and networkx graph of the same random multigraph with self-loops
+    rng = np.random.default_rng(seed)
+    edges = rng.integers(0, n - 5, size=(3 * n, 2))
+    H = nx.Graph()
+    H.add_nodes_from(range(n))
+    H.add_edges_from((u, v) for u, v in edges.tolist() if u != v)
+    return CSRGraph.from_edges(edges, n), H
+
+@pytest.mark.parametrize("seed", range(5))
+def test_same_graph_as_networkx(seed):
+    C, H = _graphs(seed)
+    assert C.number_of_nodes() == H.number_of_nodes() and len(C) == len(H)
+    assert C.number_of_edges() == H.number_of_edges()
+    assert sorted(map(tuple, C.edges().tolist())) == sorted(tuple(sorted(edge)) for edge in H.edges())
+    for u in H.nodes():
+        assert C[u] == sorted(H[u]) and C[u] is C[u]
+        assert C.neighbors(u).tolist() == sorted(H[u])
+        assert C.degree(u) == H.degree(u)
+    assert dict(C.degree()) == dict(H.degree())
+    for u, v in np.random.default_rng(seed).integers(0, len(H), size=(200, 2)).tolist():
+        assert C.has_edge(u, v) == H.has_edge(u, v)
+    labels = C.component_labels()
+    components = {frozenset(np.flatnonzero(labels == label).tolist()) for label in np.unique(labels)}
+    assert components == {frozenset(nodes) for nodes in nx.connected_components(H)}
+    assert (C.to_scipy() != nx.to_scipy_sparse_array(H, nodelist=range(len(H)), format="csr")).nnz == 0
+
+def test_from_networkx_keeps_the_labels():
+    H = nx.Graph([("a", "b"), ("b", "c")])
+    H.add_node("d")
+    C = CSRGraph.from_networkx(H)
+    assert C.labels.tolist() == ["a", "b", "c", "d"]
+    assert C.edges().tolist() == [[0, 1], [1, 2]]
+    assert C.degree(3) == 0 and C[3] == []
+
+def test_from_networkx_of_integer_nodes():
+    n = 100
+    H = nx.Graph()
+    H.add_nodes_from(range(n))
+    H.add_edges_from(randomG(n, 0.1, 0, as_edges=True).tolist())
+    C = CSRGraph.from_networkx(H)
+    assert C.labels is None
+    assert np.array_equal(C.edges(), CSRGraph.from_edges(np.array(list(H.edges())), n).edges())
+
+def test_empty_graph():
+    C = CSRGraph.from_edges(np.zeros((0, 2), dtype=np.int64), 3)
+    assert C.number_of_nodes() == 3 and C.number_of_edges() == 0
+    assert C[2] == [] and list(C.nodes()) == [0, 1, 2]
+    assert 2 in C and 3 not in C
+
+def test_socnetmec_gives_the_same_revenue_on_both_graphs():
+    final_mockup = pytest.importorskip("final_mockup")
+    C, H = _graphs(0, n=2000)
+    prob = lambda u, v, t: random.Random("%d %d %d" % (u, v, t)).random() <= 0.3
+    val = lambda t, u: random.Random("%d %d" % (t, u)).randint(1, 50)
+    revenues = []
+    for graph in (H, C):
+        snm = final_mockup.SocNetMec(graph, 20, 5)
+        rng = random.Random(0)
+        revenues.append([snm.run(t, prob, val, rng) for t in range(20)])
+    assert revenues[0] == revenues[1]
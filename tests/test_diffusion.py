@@ -0,0 +1,129 @@
+import random
+import networkx as nx
+import pytest
+from csr_graph import CSRGraph
+from networks_gen import randomG
+from diffusion import explore, diffuse, reported, query_prob, query_val
+
+TRUTHFUL = {"truthful_bidding": True, "truthful_reporting": True}
+LYING = {"truthful_bidding": False, "truthful_reporting": False}
+
+def _recursive(G, sellers, spam, s, t, auction, prob, val, rng):
+    # The original recursive procedure of SocNetMec.run, for the seller s
+    def invite(u, v):
+        if prob(u, v, t):
+            bid_v = val(t, v)
+            S_v = set(G[v]).difference(spam).difference(sellers)
+            if not auction["truthful_bidding"]:
+                bid_v = rng.randint(int(0.5 * bid_v), bid_v)
+            if not auction["truthful_reporting"]:
+                S_v = {w for w in S_v if rng.random() <= 0.2}
+            return bid_v, S_v
+        return False
+
+    def build(S, u, visited):
+        if len(S) == 0 or u in visited:
+            return
+        visited.add(u)
+        for v in S.copy():
+            if v in visited or v in sellers:
+                continue
+            res = invite(u, v)
+            if type(res) == bool:
+                reports[u].remove(v)
+                continue
+            bids[v], reports[v] = res
+            build(reports[v], v, visited)
+
+    bids, reports = dict(), dict()
+    seller_net = set(G[s])
+    for neighbor in G[s]:
+        if neighbor in spam or neighbor in sellers:
+            seller_net.remove(neighbor)
+            continue
+        res = invite(s, neighbor)
+        if type(res) == bool:
+            seller_net.remove(neighbor)
+        else:
+            bids[neighbor], reports[neighbor] = res
+    build(seller_net, s, set())
+    return seller_net, reports, bids
+
+def _oracles(p):
+    prob = lambda u, v, t: random.Random("%d %d %d" % (u, v, t)).random() <= p
+    val = lambda t, u: random.Random("%d %d" % (t, u)).randint(1, 50)
+    return prob, val
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("auction", [TRUTHFUL, LYING])
+def test_replay_matches_the_recursive_procedure(seed, auction):
+    n = 400
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(randomG(n, 6 / n, seed, as_edges=True).tolist())
+    rng = random.Random(seed)
+    sellers = set(rng.sample(range(n), 5))
+    spam = set(rng.sample(range(n), 40)) - sellers
+    prob, val = _oracles(0.6)
+    for s in sellers:
+        expected = _recursive(G, sellers, spam, s, 0, auction, prob, val, random.Random(s))
+        # repr also compares the iteration order of the sets, that the auctions may depend on
+        assert repr(diffuse(G, s, sellers, spam, 0, prob, val, auction, random.Random(s))) == repr(expected)
+
+def test_long_chains_do_not_hit_the_recursion_limit():
+    n = 5000
+    G = CSRGraph.from_edges([(i, i + 1) for i in range(n - 1)], n)
+    prob, val = _oracles(1.0)
+    seller_net, reports, bids = diffuse(G, 0, {0}, set(), 0, prob, val, TRUTHFUL)
+    assert seller_net == {1} and len(bids) == n - 1
+    # Each node reports its neighbors but the seller, also the one that invited it
+    assert all(reports[v] == {w for w in (v - 1, v + 1) if 0 < w < n} for v in range(1, n))
+
+def test_each_invitation_is_asked_once():
+    n = 300
+    G = CSRGraph.from_edges(randomG(n, 8 / n, 0, as_edges=True), n)
+    asked = []
+    def prob(u, v, t):
+        asked.append((u, v))
+        return (u * 31 + v * 17) % 3 != 0
+    cand, live, values, depth = explore(G, 0, {0}, set(), 0, prob, lambda t, u: 1)
+    assert len(asked) == len(set(asked)) == len(live)
+    assert depth > 1 and set(values) <= set(range(n))
+
+def test_batch_oracles_receive_the_waves():
+    class Batched:
+        def __init__(self):
+            self.calls = []
+        def __call__(self, *args):
+            raise AssertionError("batch must be used")
+        def batch(self, *args):
+            self.calls.append(args)
+            return [True] * len(args[1]) # vs, in batch(us, vs, t) and in batch(t, vs)
+    prob, val = Batched(), Batched()
+    G = nx.path_graph(5)
+    cand, live, values, depth = explore(G, 2, {2}, set(), 7, prob, val)
+    assert depth == 3 and len(prob.calls) == 3 and len(val.calls) == 1
+    assert [call[2] for call in prob.calls] == [7, 7, 7]
+    assert query_prob(lambda u, v, t: u < v, [1, 2], [2, 1], 0) == [True, False]
+    assert query_val(lambda t, u: t + u, 1, [1, 2]) == [2, 3]
+
+def test_reported_does_not_depend_on_the_kind_of_spam():
+    class Spam:
+        def __init__(self, nodes):
+            self.nodes = nodes
+        def __contains__(self, node):
+            return node in self.nodes
+        def __len__(self):
+            return len(self.nodes)
+    n = 3000
+    rng = random.Random(0)
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    for v in range(0, n, 100):
+        G.add_edges_from((v, w) for w in rng.sample(range(n), rng.randint(1, 60)) if w != v)
+    for size in (0, 1, 5, 20, 500):
+        spam = set(rng.sample(range(n), size))
+        for v in range(0, n, 100):
+            expected = set(G[v]).difference(spam).difference({1, 2})
+            got = reported(G, v, {1, 2}, Spam(spam))
+            assert list(got) == list(expected)
@@ -0,0 +1,56 @@
+import json
+import os
+import numpy as np
+import pytest
+import networks_gen
+from csr_graph import CSRGraph
+from graph_io import load_graph
+from ensemble import GENERATORS, run_ensemble, parameter_grid, _parse_param, main
+
+def test_parse_param():
+    assert _parse_param("n=25000") == ("n", [25000])
+    assert _parse_param("p=0.01,0.1,0.5") == ("p", [0.01, 0.1, 0.5])
+    assert _parse_param("deg=[3,3,2,2]") == ("deg", [[3, 3, 2, 2]])
+    assert _parse_param("deg=[2,2],[1,1]") == ("deg", [[2, 2], [1, 1]])
+    assert _parse_param("mode='erase'") == ("mode", ["erase"])
+
+def test_parameter_grid():
+    grid = parameter_grid({"n": 10, "p": [0.1, 0.2], "deg": [[1, 1]]})
+    assert grid == [{"n": 10, "p": 0.1, "deg": [1, 1]}, {"n": 10, "p": 0.2, "deg": [1, 1]}]
+
+def test_generators_are_the_public_ones():
+    for generator in GENERATORS:
+        assert callable(getattr(networks_gen, generator))
+    for name in ("zeta", "cKDTree", "power_law_degree", "_rng", "numpy"):
+        with pytest.raises(ValueError):
+            run_ensemble(name, {"n": 10})
+
+def _without_timing(summaries):
+    return [{key: value for key, value in summary.items() if key not in ("seconds", "path")} for summary in summaries]
+
+def test_ensemble_does_not_depend_on_the_workers(tmp_path):
+    grid = {"n": 300, "p": [0.01, 0.02]}
+    one = run_ensemble("randomG", grid, replicates=2, out=str(tmp_path / "one"), seed=7, workers=1)
+    two = run_ensemble("randomG", grid, replicates=2, out=str(tmp_path / "two"), seed=7, workers=2)
+    assert _without_timing(one) == _without_timing(two)
+    assert len({summary["edges"] for summary in one}) > 1
+    for a, b in zip(one, two):
+        assert np.array_equal(load_graph(a["path"]).edges(), load_graph(b["path"]).edges())
+
+def test_ensemble_writes_the_graphs_of_the_generator(tmp_path):
+    out = str(tmp_path / "ensemble")
+    summaries = run_ensemble("configurationG", {"deg": [[3, 3, 2, 2, 2, 2]]}, replicates=2, out=out, seed=1)
+    with open(os.path.join(out, "ensemble.json")) as f:
+        manifest = json.load(f)
+    assert manifest["graphs"] == summaries
+    seeds = np.random.SeedSequence(1).spawn(2)
+    for summary, seed in zip(summaries, seeds):
+        edges = networks_gen.configurationG([3, 3, 2, 2, 2, 2], seed=seed, as_edges=True)
+        assert np.array_equal(load_graph(summary["path"]).edges(), CSRGraph.from_edges(edges, 6).edges())
+        assert summary["nodes"] == 6
+
+def test_main_parses_list_parameters(tmp_path, capsys):
+    out = str(tmp_path / "ensemble")
+    assert main(["configurationG", "--param", "deg=[1,1,1,1]", "--out", out, "--workers", "1"]) == 0
+    with open(os.path.join(out, "ensemble.json")) as f:
+        assert json.load(f)["grid"] == {"deg": [[1, 1, 1, 1]]}
@@ -0,0 +1,113 @@
+import random
+import networkx as nx
+import pytest
+from csr_graph import CSRGraph
+from networks_gen import randomG
+
+# SocNetMec needs the auctions of social_network_algorithms, next to the repository
+final_mockup = pytest.importorskip("final_mockup")
+SocNetMec = final_mockup.SocNetMec
+
+def _networkx(n, p, seed):
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(randomG(n, p, seed, as_edges=True).tolist())
+    return G
+
+def _prob(u, v, t):
+    return random.Random("%d %d %d" % (u, v, t)).random() <= 0.5
+
+def _val(t, u):
+    return random.Random("%d %d" % (t, u)).randint(1, 50)
+
+def _bfs_spam(G, S):
+    # Nodes reachable from at least two sellers, as computed by the BFS of the original procedure
+    reached = [set(nx.node_connected_component(G, s)) for s in S]
+    return {node for i, nodes in enumerate(reached) for node in nodes if any(node in other for other in reached[:i] + reached[i + 1:])}
+
+def _check_spam(G, snm):
+    # The spam of the last step contains exactly the nodes of G reachable from two of its sellers
+    S, spam = snm._SocNetMec__S, snm._SocNetMec__spam
+    expected = _bfs_spam(G, S)
+    assert len(spam) == len(expected) and {node for node in G if node in spam} == expected
+
+@pytest.mark.parametrize("backend", ["networkx", "csr"])
+def test_spam_is_the_set_of_the_nodes_reachable_from_two_sellers(backend):
+    n = 300
+    G = _networkx(n, 1.5 / n, 0)
+    snm = SocNetMec(G if backend == "networkx" else CSRGraph.from_networkx(G), 50, 5)
+    rng = random.Random(0)
+    for t in range(50):
+        snm.run(t, _prob, _val, rng)
+        _check_spam(G, snm)
+
+def test_add_edge_merges_the_components():
+    n = 200
+    G = _networkx(n, 0.8 / n, 1)
+    snm = SocNetMec(G, 100, 5)
+    rng = random.Random(0)
+    for t in range(100):
+        if t % 10 == 5:
+            u, v = rng.sample(range(n), 2)
+            snm.add_edge(u, v)
+        snm.run(t, _prob, _val, rng)
+        _check_spam(G, snm)
+
+def test_graph_changed_rebuilds_the_index():
+    G = nx.path_graph(10)
+    snm = SocNetMec(G, 10, 5)
+    snm.run(0, _prob, _val, random.Random(0))
+    G.remove_edge(4, 5)
+    snm.graph_changed()
+    rng = random.Random(1)
+    for t in range(1, 10):
+        snm.run(t, _prob, _val, rng)
+        _check_spam(G, snm)
+
+def _recording(name, inputs, price):
+    # Auction that records its inputs and sells to the first k bidders at price
+    def auction(k, seller_net, reports, bids):
+        inputs.append((name, repr((sorted(seller_net), reports, bids))))
+        reports.clear() # auctions may modify their inputs
+        winners = sorted(bids)[:k]
+        return {b: b in winners for b in bids}, {b: price if b in winners else 0 for b in bids}
+    return auction
+
+@pytest.fixture
+def registry(monkeypatch):
+    # Restores the registry of the auctions after the test
+    monkeypatch.setattr(SocNetMec, "_SocNetMec__registry", list(SocNetMec._SocNetMec__registry))
+
+def test_compare_runs_every_auction_on_the_same_diffusion(registry):
+    n = 500
+    G = CSRGraph.from_networkx(_networkx(n, 0.9 / n, 0))
+    inputs = []
+    for name, price in (("MUDAN", 1), ("SNCA", 2), ("VCG", 3)):
+        SocNetMec.register(name, _recording(name, inputs, price))
+    SocNetMec.register("LIAR", _recording("LIAR", inputs, 4), truthful_bidding=False, truthful_reporting=False)
+    assert SocNetMec.auctions() == ["MUDAN", "SNCA", "VCG", "LIAR"]
+
+    snm = SocNetMec(G, 10, 5)
+    single = SocNetMec(G, 10, 5)
+    total = 0
+    for t in range(10):
+        inputs.clear()
+        revenue = snm.run(t, _prob, _val, random.Random(t), compare=True)
+        total += revenue["MUDAN"]
+        by_name = {name: [args for other, args in inputs if other == name] for name in SocNetMec.auctions()}
+        assert by_name["MUDAN"] == by_name["SNCA"] == by_name["VCG"]
+        assert len(by_name["LIAR"]) == len(by_name["SNCA"])
+        assert revenue["VCG"] == 3 * revenue["MUDAN"] and revenue["SNCA"] == 2 * revenue["MUDAN"]
+        # The auction of the step alone gets the same inputs and revenue
+        inputs.clear()
+        assert single.run(t, _prob, _val, random.Random(t)) == revenue["SNCA"]
+        assert [args for _, args in inputs] == by_name["SNCA"]
+    assert total > 0
+
+def test_registered_auctions_are_used_by_new_instances_only(registry):
+    G = _networkx(100, 0.05, 0)
+    before = SocNetMec(G, 1, 5)
+    SocNetMec.register("FREE", lambda k, seller_net, reports, bids: ({b: True for b in bids}, {b: 0 for b in bids}))
+    after = SocNetMec(G, 1, 5)
+    assert set(before.run(0, _prob, _val, random.Random(0), compare=True)) == {"MUDAN", "SNCA", "VCG"}
+    assert after.run(0, _prob, _val, random.Random(0), compare=True)["FREE"] == 0
@@ -0,0 +1,85 @@
+import os
+import numpy as np
+import pytest
+from csr_graph import CSRGraph
+from networks_gen import randomG
+from graph_io import (read_edgelist, write_graph, convert_edgelist, is_binary_graph, graph_info, load_edges,
+                      load_graph, iter_edge_chunks, open_graph)
+
+def _edges(n=500, seed=0):
+    return randomG(n, 5 / n, seed, as_edges=True)
+
+@pytest.mark.parametrize("csr", [True, False])
+def test_write_load_round_trip(tmp_path, csr):
+    n = 500
+    edges = _edges(n)
+    C = CSRGraph.from_edges(edges, n)
+    path = str(tmp_path / "graph.bin")
+    assert write_graph(path, edges, n, csr=csr) == C.number_of_edges()
+    assert is_binary_graph(path)
+    assert graph_info(path)[:2] == (n, C.number_of_edges()) and graph_info(path)[2] is None
+    assert np.array_equal(load_edges(path), C.edges())
+    loaded = load_graph(path)
+    assert np.array_equal(loaded.indptr, C.indptr) and np.array_equal(loaded.indices, C.indices)
+    assert isinstance(loaded.indices, np.memmap) == csr
+
+def test_labels_and_isolated_nodes(tmp_path):
+    path = str(tmp_path / "graph.bin")
+    write_graph(path, [(0, 1)], 4, labels=[10, 20, 30, 40])
+    n, m, labels = graph_info(path)
+    assert (n, m, labels.tolist()) == (4, 1, [10, 20, 30, 40])
+    assert load_graph(path).degrees.tolist() == [1, 1, 0, 0]
+    write_graph(path, np.zeros((0, 2), dtype=np.int64), 3)
+    assert load_graph(path).number_of_nodes() == 3 and load_graph(path).number_of_edges() == 0
+
+def test_text_edge_lists(tmp_path):
+    path = str(tmp_path / "graph.txt")
+    with open(path, "w") as f:
+        f.write("# comment\n% other comment\n1 2 0.5 x\n2\t3 1.5e3 y\n\n7 1 -2 z\n")
+    assert read_edgelist(path).tolist() == [[1, 2], [2, 3], [7, 1]]
+    for block in range(1, 40):
+        assert read_edgelist(path, block=block).tolist() == [[1, 2], [2, 3], [7, 1]]
+    assert np.concatenate(list(iter_edge_chunks(path, chunk=1))).tolist() == [[1, 2], [2, 3], [7, 1]]
+    with open(path, "w") as f:
+        f.write("1 2\n3\n")
+    with pytest.raises(ValueError):
+        read_edgelist(path)
+
+def test_convert_relabels_the_nodes(tmp_path):
+    src, dst = str(tmp_path / "graph.txt"), str(tmp_path / "graph.bin")
+    with open(src, "w") as f:
+        f.write("10 30\n30 20\n")
+    assert convert_edgelist(src, dst) == 2
+    n, m, labels = graph_info(dst)
+    assert (n, m, labels.tolist()) == (3, 2, [10, 20, 30])
+    assert load_edges(dst).tolist() == [[0, 2], [1, 2]]
+
+def test_open_graph_converts_once(tmp_path):
+    n = 300
+    edges = CSRGraph.from_edges(_edges(n), n).edges()
+    path = str(tmp_path / "graph.txt")
+    np.savetxt(path, edges, fmt="%d")
+    G = open_graph(path)
+    assert os.path.exists(path + ".bin")
+    # Nodes without edges are not in the text file, hence the others are relabeled
+    labels = np.arange(n) if G.labels is None else np.asarray(G.labels)
+    assert sorted(map(tuple, labels[G.edges()].tolist())) == sorted(map(tuple, edges.tolist()))
+    stamp = os.path.getmtime(path + ".bin")
+    open_graph(path)
+    assert os.path.getmtime(path + ".bin") == stamp
+
+@pytest.mark.parametrize("chunk", [1, 7, 1000, 1 << 20])
+def test_iter_edge_chunks_of_every_source(tmp_path, chunk):
+    import networkx as nx
+    n = 500
+    C = CSRGraph.from_edges(_edges(n), n)
+    expected = sorted(map(tuple, C.edges().tolist()))
+    binary, text = str(tmp_path / "graph.bin"), str(tmp_path / "graph.txt")
+    write_graph(binary, C.edges(), n)
+    np.savetxt(text, C.edges(), fmt="%d")
+    H = nx.Graph(C.edges().tolist())
+    for source in (C, binary, text, C.edges(), H):
+        chunks = list(iter_edge_chunks(source, chunk))
+        assert all(len(edges) <= max(chunk, 1) for edges in chunks if source is not C)
+        edges = np.concatenate(chunks)
+        assert sorted(tuple(sorted(edge)) for edge in edges.tolist()) == expected
@@ -0,0 +1,172 @@
+import numpy as np
+import pytest
+from scipy.stats import chisquare
+import networks_gen
+from networks_gen import randomG
+
+def _check_simple(edges, n):
+    # Edges (i, j) with j < i < n, without repeated edges
+    assert edges.ndim == 2 and edges.shape[1] == 2
+    assert (edges[:, 1] < edges[:, 0]).all() and (edges[:, 0] < n).all() and (edges[:, 1] >= 0).all()
+    assert len(np.unique(edges[:, 0] * n + edges[:, 1])) == len(edges)
+
+def test_pair_from_index():
+    k = np.arange(5000, dtype=np.int64)
+    expected = [(i, j) for i in range(200) for j in range(i)][:5000]
+    i, j = networks_gen._pair_from_index(k)
+    assert list(zip(i.tolist(), j.tolist())) == expected
+
+def test_random_graph_is_simple_and_seeded():
+    edges = randomG(2000, 0.01, 0, as_edges=True)
+    _check_simple(edges, 2000)
+    assert np.array_equal(edges, randomG(2000, 0.01, 0, as_edges=True))
+    assert not np.array_equal(edges, randomG(2000, 0.01, 1, as_edges=True))
+    G = randomG(2000, 0.01, 0)
+    assert G.number_of_nodes() == 2000 and {frozenset(edge) for edge in G.edges()} == {frozenset(edge) for edge in edges.tolist()}
+
+def test_random_graph_extreme_probabilities():
+    assert len(randomG(50, 0, 0, as_edges=True)) == 0
+    assert len(randomG(50, 1, 0, as_edges=True)) == 50 * 49 // 2
+    assert len(randomG(1, 0.5, 0, as_edges=True)) == 0
+    assert randomG(0, 0.5, 0).number_of_nodes() == 0
+
+def test_random_graph_selects_each_pair_with_probability_p():
+    # Every pair is selected in about a fraction p of the graphs, whatever its position in the enumeration
+    n, p, runs = 30, 0.2, 2000
+    counts = np.zeros((n, n))
+    for seed in range(runs):
+        edges = randomG(n, p, seed, as_edges=True)
+        counts[edges[:, 0], edges[:, 1]] += 1
+    selected = counts[np.tril_indices(n, -1)] / runs
+    sigma = (p * (1 - p) / runs) ** 0.5
+    assert abs(selected.mean() - p) < 3 * sigma / len(selected) ** 0.5
+    assert np.abs(selected - p).max() < 5 * sigma
+
+def test_configuration_graph_erase():
+    deg = networks_gen.power_law_degree(3000, 2.5)
+    edges, stats = networks_gen.configurationG(deg, 0, as_edges=True, report=True)
+    _check_simple(edges, len(deg))
+    degrees = np.bincount(edges.ravel(), minlength=len(deg))
+    assert (degrees <= deg).all()
+    assert stats["l1"] == int(np.abs(np.array(deg) - degrees).sum()) and stats["swaps"] == 0
+    assert stats["missing_edges"] == sum(deg) // 2 - len(edges)
+    assert np.array_equal(edges, networks_gen.configurationG(deg, 0, as_edges=True))
+
+def test_configuration_graph_rewire_preserves_the_degrees():
+    # A regular sequence has many self-loops and multi-edges when the degree is large, and all of them can be swapped away
+    deg = [20] * 200
+    erased = networks_gen.configurationG(deg, 0, as_edges=True, report=True)[1]
+    edges, stats = networks_gen.configurationG(deg, 0, mode="rewire", as_edges=True, report=True)
+    _check_simple(edges, len(deg))
+    assert erased["l1"] > 0
+    assert stats["l1"] == 0 and stats["missing_edges"] == 0 and stats["swaps"] > 0
+    assert np.bincount(edges.ravel(), minlength=len(deg)).tolist() == deg
+
+def test_configuration_graph_arguments():
+    with pytest.raises(ValueError):
+        networks_gen.configurationG([1, 1], mode="other")
+    assert networks_gen.configurationG([1, 1], 0).number_of_edges() == 1
+    assert len(networks_gen.configurationG([], 0, as_edges=True)) == 0
+
+@pytest.mark.parametrize("generator, args", [
+    (networks_gen.preferentialG, (0.5,)),
+    (networks_gen.multiPreferentialG, (0.5, 4)),
+    (networks_gen.degreePreferentialG, (0.5,)),
+])
+def test_preferential_graphs_are_simple_and_seeded(generator, args):
+    n = 3000
+    edges = generator(n, *args, seed=0, as_edges=True)
+    _check_simple(edges, n)
+    assert np.array_equal(edges, generator(n, *args, seed=0, as_edges=True))
+    # Every node creates at least one edge (two nodes choosing each other create the same one)
+    degrees = np.bincount(edges.ravel(), minlength=n)
+    assert (degrees >= 1).all()
+    k = args[1] if len(args) > 1 else 1
+    assert len(edges) <= n * k * (2 if generator is networks_gen.degreePreferentialG else 1)
+    assert len(edges) >= n * k * 0.95
+
+def test_preferential_attachment_concentrates_the_degrees():
+    n = 20000
+    uniform = np.bincount(networks_gen.preferentialG(n, 0, seed=0, as_edges=True).ravel()).max()
+    preferential = np.bincount(networks_gen.preferentialG(n, 1, seed=0, as_edges=True).ravel()).max()
+    assert preferential > 5 * uniform
+
+def test_triad_formation_raises_the_clustering():
+    import networkx as nx
+    n = 3000
+    plain = nx.transitivity(networks_gen.preferentialG(n, 1, seed=0))
+    triads = nx.transitivity(networks_gen.degreePreferentialG(n, 0.8, seed=0))
+    assert triads > 5 * plain
+
+def test_multi_preferential_graph_with_more_edges_than_nodes():
+    # Each node can choose at most n - 1 distinct neighbors
+    edges = networks_gen.multiPreferentialG(5, 0.5, 10, seed=0, as_edges=True)
+    assert len(edges) == 10
+
+def test_small_world_strong_ties_are_the_pairs_within_r():
+    n, r = 500, 0.08
+    rng = np.random.default_rng(3)
+    pts = rng.random((n, 2))
+    distance = np.sqrt(((pts[:, None, :] - pts[None, :, :]) ** 2).sum(axis=2))
+    i, j = np.nonzero(np.tril(distance <= r, -1))
+    # Without weak ties, the graph is the one of the pairs within distance r of the points drawn by the same generator
+    edges = networks_gen.GenWS2DG(n, r, 0, 2, seed=3, as_edges=True)
+    _check_simple(edges, n)
+    assert {tuple(edge) for edge in edges.tolist()} == set(zip(i.tolist(), j.tolist()))
+    weak = networks_gen.GenWS2DG(n, r, 2, 2, seed=3, as_edges=True)
+    _check_simple(weak, n)
+    assert {tuple(edge) for edge in edges.tolist()} <= {tuple(edge) for edge in weak.tolist()}
+
+@pytest.mark.parametrize("n, q", [(2, 2), (5, 0), (120, 2), (300, 3)])
+def test_kernel_ties_follow_the_inverse_power_of_the_distance(n, q):
+    # The weak ties of each node i are drawn with probability proportional to 1/dist(i, j)**q, both among the
+    # near nodes and, through rejection, in the cells of the interaction lists
+    k = 4000
+    pts = np.random.default_rng(n).random((n, 2))
+    ties = networks_gen._kernel_ties(pts, k, q, np.random.default_rng(0))
+    assert len(ties) == n * k
+    for i in (0, n // 2, n - 1):
+        targets = ties[ties[:, 0] == i, 1]
+        assert len(targets) == k and (targets != i).all()
+        weights = networks_gen._kernel(((pts - pts[i]) ** 2).sum(axis=1), q)
+        weights[i] = 0
+        expected = weights / weights.sum() * k
+        observed = np.bincount(targets, minlength=n)
+        if n == 2:
+            assert observed.tolist() == [i == 1 and k, i == 0 and k]
+            continue
+        # Chi-squared test, with the other nodes of small expected count merged in one bin
+        assert observed[i] == 0
+        rare = expected < 5
+        rare[i] = False
+        frequent = ~rare
+        frequent[i] = False
+        observed = np.append(observed[frequent], observed[rare].sum()) if rare.any() else observed[frequent]
+        expected = np.append(expected[frequent], expected[rare].sum()) if rare.any() else expected[frequent]
+        assert chisquare(observed, expected).pvalue > 1e-4
+
+def test_affiliation_graph_is_simple_and_seeded():
+    n = 3000
+    edges = networks_gen.affiliationG(n, 20, 0.5, 2, 0.1, 3, seed=0, as_edges=True, batch=1000)
+    _check_simple(edges, n)
+    assert np.array_equal(edges, networks_gen.affiliationG(n, 20, 0.5, 2, 0.1, 3, seed=0, as_edges=True, batch=1000))
+    assert not np.array_equal(edges, networks_gen.affiliationG(n, 20, 0.5, 2, 0.1, 3, seed=1, as_edges=True))
+
+def test_affiliation_graph_with_complete_communities():
+    # Nodes in a single community, linked to all its other members and to nobody else: the graph is a union of cliques
+    import networkx as nx
+    n, m = 500, 8
+    G = networks_gen.affiliationG(n, m, 0, 1, 1, 0, seed=0)
+    components = list(nx.connected_components(G))
+    assert len(components) <= m and sum(len(nodes) for nodes in components) == n
+    for nodes in components:
+        assert G.subgraph(nodes).number_of_edges() == len(nodes) * (len(nodes) - 1) // 2
+
+def test_affiliation_graph_weak_ties():
+    # Without strong ties, every node but the first links to at most s nodes, and the first ties are preferential
+    n, s = 2000, 3
+    assert len(networks_gen.affiliationG(n, 5, 0.5, 2, 0, 0, seed=0, as_edges=True)) == 0
+    edges = networks_gen.affiliationG(n, 5, 0.5, 2, 0, s, seed=0, as_edges=True)
+    _check_simple(edges, n)
+    assert n * s * 0.9 <= len(edges) <= n * s
+    assert np.bincount(edges.ravel()).max() > 10 * s
@@ -0,0 +1,46 @@
+import networkx as nx
+import numpy as np
+from csr_graph import CSRGraph
+from networks_gen import randomG
+from oracles import splitmix64, splitmix64_array, uniform, uniform_array, ValOracle, ProbOracle
+
+def test_splitmix64_scalar_and_array():
+    x = [0, 1, 2, 12345, (1 << 64) - 1, 1 << 63]
+    assert splitmix64_array(np.array(x, dtype=np.uint64)).tolist() == [splitmix64(v) for v in x]
+    # First output of the reference splitmix64 generator seeded with 0
+    assert splitmix64(0) == 0xE220A8397B1DCDAF
+
+def test_uniform_scalar_and_array():
+    t, us = 3, np.arange(-5, 1000)
+    r = uniform_array(7, 1, t, us)
+    assert r.tolist() == [uniform(7, 1, t, u) for u in us.tolist()]
+    assert (r >= 0).all() and (r < 1).all()
+    assert uniform(7, 1, 2) != uniform(8, 1, 2) and uniform(7, 1, 2) != uniform(7, 2, 1)
+
+def test_val_oracle():
+    val = ValOracle(seed=1, low=1, high=50)
+    us = list(range(20000))
+    values = val.batch(4, us)
+    assert values == [val(4, u) for u in us]
+    assert min(values) == 1 and max(values) == 50
+    assert abs(np.mean(values) - 25.5) < 0.5
+    assert values != ValOracle(seed=2).batch(4, us) and values != val.batch(5, us)
+
+def test_prob_oracle():
+    n = 2000
+    edges = randomG(n, 10 / n, 0, as_edges=True)
+    C = CSRGraph.from_edges(edges, n)
+    H = nx.Graph()
+    H.add_nodes_from(range(n))
+    H.add_edges_from(edges.tolist())
+    us, vs = C.edges().T.tolist()
+    for G in (C, H):
+        prob = ProbOracle(G, seed=3)
+        outcomes = prob.batch(us, vs, 9)
+        assert outcomes == [prob(u, v, 9) for u, v in zip(us, vs)]
+        assert all(prob.p(u, v) == prob.p(v, u) for u, v in zip(us[:100], vs[:100]))
+        assert ProbOracle(C, seed=3).batch(us, vs, 9) == outcomes
+    # The acceptance rate is the mean probability of the edges
+    prob = ProbOracle(C, seed=3)
+    rate = np.mean([np.mean(prob.batch(us, vs, t)) for t in range(20)])
+    assert abs(rate - np.mean([prob.p(u, v) for u, v in zip(us, vs)])) < 0.01
@@ -0,0 +1,83 @@
+import csv
+import json
+import random
+import pytest
+from csr_graph import CSRGraph
+from networks_gen import randomG
+from profiler import Profiler
+
+def test_histograms_and_counters():
+    profiler = Profiler()
+    profiler.add("explore", 1.0) # before any step, only the histogram is updated
+    profiler.begin(0)
+    for seconds in (0.5e-6, 1.5e-6, 3e-6, 3.5e-6):
+        profiler.add("prob", seconds)
+    profiler.count("waves", 2)
+    profiler.count("waves")
+    profiler.maximum("max_depth", 4)
+    profiler.maximum("max_depth", 3)
+    assert profiler.histograms["prob"] == [1, 1, 2]
+    assert profiler.steps == [{"step": 0, "time": {"prob": pytest.approx(8.5e-6)}, "counters": {"waves": 3, "max_depth": 4}}]
+    summary = profiler.summary()
+    assert summary["prob"]["count"] == 4 and summary["prob"]["histogram"] == {1e-6: 1, 2e-6: 1, 4e-6: 2}
+    assert summary["explore"] == {"count": 1, "total_s": 0.0, "histogram": {2**20 * 1e-6: 1}}
+
+def test_wrapped_oracles_count_the_queries():
+    class Batched:
+        def __call__(self, t, u):
+            return u
+        def batch(self, t, us):
+            return list(us)
+    profiler = Profiler()
+    profiler.begin(0)
+    plain, batched = profiler.wrap(lambda t, u: u, "val"), profiler.wrap(Batched(), "prob")
+    assert not hasattr(plain, "batch") and hasattr(batched, "batch")
+    assert plain(0, 3) == 3 and batched.batch(0, [1, 2, 3]) == [1, 2, 3] and batched(0, 4) == 4
+    assert profiler.steps[0]["counters"] == {"val_queries": 1, "prob_queries": 4}
+    assert sum(profiler.histograms["prob"]) == 2
+
+def test_json_and_csv(tmp_path):
+    profiler = Profiler()
+    for t in range(3):
+        profiler.begin(t)
+        profiler.add("step", 0.001 * (t + 1))
+        profiler.count("bidders", t)
+    profiler.add("auction", 0.002)
+    profiler.to_json(str(tmp_path / "profile.json"))
+    with open(tmp_path / "profile.json") as f:
+        saved = json.load(f)
+    assert saved["steps"] == profiler.steps and set(saved["summary"]) == {"step", "auction"}
+    profiler.to_csv(str(tmp_path / "profile.csv"))
+    with open(tmp_path / "profile.csv", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["step", "time_auction", "time_step", "bidders"]
+    assert [(int(row[0]), float(row[1]), int(row[3])) for row in rows[1:]] == [(0, 0.0, 0), (1, 0.0, 1), (2, 0.002, 2)]
+
+def _prob(u, v, t):
+    return random.Random("%d %d %d" % (u, v, t)).random() <= 0.6
+
+def _val(t, u):
+    return random.Random("%d %d" % (t, u)).randint(1, 50)
+
+def test_profiled_runs_give_the_same_revenues():
+    # SocNetMec needs the auctions of social_network_algorithms, next to the repository
+    SocNetMec = pytest.importorskip("final_mockup").SocNetMec
+    n = 500
+    G = CSRGraph.from_edges(randomG(n, 1.5 / n, 0, as_edges=True), n)
+    profiler = Profiler()
+    plain, profiled = SocNetMec(G, 20, 5), SocNetMec(G, 20, 5, profiler=profiler)
+    for t in range(20):
+        assert profiled.run(t, _prob, _val, random.Random(t)) == plain.run(t, _prob, _val, random.Random(t))
+        counters = profiler.steps[-1]["counters"]
+        assert counters["auctions"] == 5 and counters["invitations_accepted"] <= counters["invitations_sent"]
+        assert counters.get("prob_queries", 0) == counters["invitations_sent"]
+        # The value of a node is asked once, even if it accepts several invitations
+        assert counters.get("val_queries", 0) <= counters["invitations_accepted"]
+        assert counters["max_depth"] <= counters["waves"]
+    assert [step["step"] for step in profiler.steps] == list(range(20))
+    assert sum(step["counters"].get("val_queries", 0) for step in profiler.steps) > 0
+    assert {"choose_S", "reachable", "explore", "replay", "auction", "step"} <= set(profiler.summary())
+    assert profiler.summary()["step"]["count"] == 20
+    profiled.set_profiler(None)
+    assert profiled.run(20, _prob, _val, random.Random(20)) == plain.run(20, _prob, _val, random.Random(20))
+    assert len(profiler.steps) == 20
@@ -0,0 +1,117 @@
+import random
+import pytest
+import numpy as np
+from csr_graph import CSRGraph
+from networks_gen import randomG
+from reachable_cache import ReachableCache
+
+def _final_mockup():
+    # SocNetMec needs the auctions of social_network_algorithms, next to the repository
+    return pytest.importorskip("final_mockup")
+
+def _graph(clusters=300, size=40, seed=0):
+    # Disjoint dense random graphs: sellers are rarely in the same one, so that invitations spread,
+    # and nodes have tens of neighbors, so that the order of the sets of neighbors matters
+    # (nodes are shuffled, so that the neighbors of a node are not consecutive integers).
+    edges = [randomG(size, 0.6, seed * clusters + c, as_edges=True) + c * size for c in range(clusters)]
+    names = np.random.default_rng(seed).permutation(clusters * size)
+    return CSRGraph.from_edges(names[np.concatenate(edges)], clusters * size)
+
+def _prob(u, v, t):
+    return random.Random("%d %d %d" % (u, v, t)).random() <= 0.7
+
+def _val(t, u):
+    return random.Random("%d %d" % (t, u)).randint(1, 50)
+
+def _revenues(G, cache, steps=60):
+    snm = _final_mockup().SocNetMec(G, steps, 5, cache=cache)
+    rng = random.Random(0)
+    return [snm.run(t, _prob, _val, rng) for t in range(steps)]
+
+def _recording(monkeypatch, inputs):
+    # Every auction also appends the repr of its inputs to inputs: the repr of the reports follows the iteration
+    # order of their sets, which the revenue of an auction breaking ties in that order may depend on
+    def record(auction):
+        def recorded(k, seller_net, reports, bids):
+            inputs.append(repr((sorted(seller_net), reports, bids)))
+            return auction(k, seller_net, reports, bids)
+        return recorded
+    SocNetMec = _final_mockup().SocNetMec
+    registry = [dict(a, auction=record(a["auction"])) for a in SocNetMec._SocNetMec__registry]
+    monkeypatch.setattr(SocNetMec, "_SocNetMec__registry", registry)
+
+def test_storages_give_the_same_revenue(monkeypatch):
+    G = _graph()
+    inputs = []
+    _recording(monkeypatch, inputs)
+    expected, expected_inputs = _revenues(G, ReachableCache(storage="nodes")), list(inputs)
+    assert sum(expected) > 0
+    for storage in ("components", "bitset"):
+        inputs.clear()
+        assert _revenues(G, ReachableCache(storage=storage)) == expected
+        assert inputs == expected_inputs
+
+def test_spam_objects_have_the_size_of_the_spam_set():
+    component = [0, 0, 1, 1, 1, 2]
+    members = {0: [0, 1], 1: [2, 3, 4], 2: [5]}
+    for storage in ReachableCache.STORAGES:
+        spam = ReachableCache(storage=storage).put({0, 1, 2}, [0, 1], component, members, 6)
+        assert len(spam) == 5
+        assert [node in spam for node in range(6)] == [True] * 5 + [False]
+
+def test_save_load_round_trip(tmp_path):
+    final_mockup = _final_mockup()
+    G = _graph()
+    path = str(tmp_path / "cache.pkl")
+    for storage in ReachableCache.STORAGES:
+        snm = final_mockup.SocNetMec(G, 10, 5, cache=ReachableCache(storage=storage))
+        rng = random.Random(0)
+        expected = [snm.run(t, _prob, _val, rng) for t in range(10)]
+        snm.save_cache(path)
+
+        warm = final_mockup.SocNetMec(G, 10, 5, cache=ReachableCache(storage=storage))
+        assert warm.load_cache(path)
+        rng = random.Random(0)
+        assert [warm.run(t, _prob, _val, rng) for t in range(10)] == expected
+        assert warm.cache_stats()["misses"] == 0
+
+def test_load_rejects_other_graphs_and_storages(tmp_path):
+    import networkx as nx
+    final_mockup = _final_mockup()
+    G = _graph()
+    path = str(tmp_path / "cache.pkl")
+    snm = final_mockup.SocNetMec(G, 5, 5, cache=ReachableCache(storage="components"))
+    snm.run(0, _prob, _val, random.Random(0))
+    snm.save_cache(path)
+
+    H = nx.Graph()
+    H.add_nodes_from(range(G.number_of_nodes()))
+    H.add_edges_from(G.edges().tolist())
+    assert not final_mockup.SocNetMec(H, 5, 5, cache=ReachableCache(storage="components")).load_cache(path)
+    assert not final_mockup.SocNetMec(G, 5, 5, cache=ReachableCache(storage="bitset")).load_cache(path)
+    assert not final_mockup.SocNetMec(_graph(seed=1), 5, 5, cache=ReachableCache(storage="components")).load_cache(path)
+
+def test_lru_bounds():
+    component = list(range(10))
+    members = {label: [label] for label in range(10)}
+    cache = ReachableCache(max_entries=2)
+    for i in range(3):
+        cache.put({i}, [i], component, members, 10)
+    assert len(cache) == 2 and cache.get({0}, component) is None
+    assert cache.get({1}, component) == {1}
+    cache.put({3}, [3], component, members, 10)
+    # {1} was used after {2}, hence {2} is evicted
+    assert cache.get({2}, component) is None and cache.get({1}, component) == {1}
+    assert cache.stats() == {"entries": 2, "stored_nodes": 2, "hits": 2, "misses": 2, "evictions": 2}
+
+    cache = ReachableCache(max_entries=None, max_nodes=5)
+    cache.put({0}, [0, 1, 2], component, members, 10)
+    cache.put({1}, [3, 4, 5], component, members, 10)
+    assert cache.get({0}, component) is None and cache.stats()["stored_nodes"] == 3
+    cache.put({2}, list(range(6)), component, members, 10) # larger than the cache: returned, not stored
+    assert len(cache) == 1
+    assert len(ReachableCache(max_entries=0).put({0}, [0], component, members, 10)) == 1
+
+def test_unknown_storage():
+    with pytest.raises(ValueError):
+        ReachableCache(storage="array")
@@ -0,0 +1,34 @@
+import pytest
+from csr_graph import CSRGraph
+from networks_gen import randomG
+from oracles import ValOracle, ProbOracle
+
+# The simulation needs the auctions of social_network_algorithms, next to the repository
+simulation = pytest.importorskip("simulation")
+
+def _setup(n=3000, seed=0):
+    G = CSRGraph.from_edges(randomG(n, 2 / n, seed, as_edges=True), n)
+    return G, ProbOracle(G, seed, cap=0.9, scale=100), ValOracle(seed)
+
+def test_revenues_do_not_depend_on_the_workers():
+    G, prob, val = _setup()
+    T = 24
+    serial, total = simulation.simulate(G, T, 5, prob, val, seed=1, workers=1)
+    assert total == sum(serial) and total > 0
+    for workers, chunks in ((2, 1), (3, 4)):
+        assert simulation.simulate(G, T, 5, prob, val, seed=1, workers=workers, chunks_per_worker=chunks) == (serial, total)
+    assert simulation.simulate(G, T, 5, prob, val, seed=2, workers=1)[0] != serial
+
+def test_networkx_graph_gives_the_same_revenues():
+    import networkx as nx
+    G, prob, val = _setup()
+    H = nx.Graph()
+    H.add_nodes_from(range(G.number_of_nodes()))
+    H.add_edges_from(G.edges().tolist())
+    expected = simulation.simulate(G, 10, 5, prob, val, seed=0, workers=1)
+    assert simulation.simulate(H, 10, 5, prob, val, seed=0, workers=2) == expected
+
+def test_step_rng():
+    assert simulation.step_rng(0, 3).random() == simulation.step_rng(0, 3).random()
+    assert simulation.step_rng(0, 3).random() != simulation.step_rng(0, 4).random()
+    assert simulation.step_rng(0, 3).random() != simulation.step_rng(1, 3).random()